@@ -1,7 +1,13 @@
-from flask import Flask, jsonify, request
-from flask_socketio import SocketIO
-from mqtt.mqtt_subscriber import start_mqtt, get_stats, reset_stats, process_packet_data
+import gzip
+from flask import Flask, Response, jsonify, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
+from config import FLASK_PORT, GZIP_MIN_SIZE, GZIP_LEVEL, RECENT_ATTACKS_PAGE, HEAVY_HITTER_TOP
+from metrics import render_metrics
+from mqtt.mqtt_subscriber import (start_mqtt, get_stats, stats_version, reset_stats, ingest,
+                                  stats_stream, incidents, drift, get_distinct_series,
+                                  DISTINCT_METRICS)
 from models.classifier import get_classifier
+from subscriptions import FILTER_KEYS, subscriptions
 
 app = Flask(__name__)
 socketio = SocketIO(app, cors_allowed_origins="*")
@@ -17,25 +23,162 @@ else:
     print("⚠️  ML MODEL NOT LOADED - USING HEURISTICS")
 print("="*60 + "\n")
 
-start_mqtt(socketio)
+mqtt_client = start_mqtt(socketio)
+
+@app.after_request
+def compress(response):
+    """gzip JSON/text responses of GZIP_MIN_SIZE bytes or more for clients that accept it"""
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in ('application/json', 'text/plain')):
+        return response
+    response.vary.add('Accept-Encoding')
+    if 'gzip' in request.accept_encodings:
+        body = response.get_data()
+        if len(body) >= GZIP_MIN_SIZE:
+            response.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL))
+            response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+def _csv_arg(name):
+    value = request.args.get(name)
+    return [part.strip() for part in value.split(',') if part.strip()] if value else None
+
+def _int_arg(name, default, minimum=0):
+    value = request.args.get(name, default)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+    if value < minimum:
+        raise ValueError(f"{name} must be >= {minimum}")
+    return value
+
+# Socket.IO subscription filters (see subscriptions.py)
+def _apply_filter(raw):
+    old_room, new_room, normalized = subscriptions.subscribe(request.sid, raw)
+    if old_room and old_room != new_room:
+        leave_room(old_room)
+    if new_room and new_room != old_room:
+        join_room(new_room)
+    return normalized
+
+@socketio.on('connect')
+def on_connect(auth=None):
+    """Register the client's network_logs filter from its query string (or auth payload)"""
+    # The query string also carries Engine.IO's own parameters (EIO, transport, t)
+    raw = {k: v for k, v in request.args.items() if k in FILTER_KEYS}
+    try:
+        if auth is not None and not isinstance(auth, dict):
+            raise ValueError(f"auth must be an object of filter keys, got {type(auth).__name__}")
+        raw.update(auth or {})
+        _apply_filter(raw)
+    except ValueError as e:
+        _apply_filter({})
+        emit('subscription_error', {'error': str(e)})
+    emit('stats_snapshot', stats_stream.snapshot())
+
+@socketio.on('stats_resync')
+def on_stats_resync():
+    """A client missed a stats_delta (seq gap): acknowledge with a fresh snapshot"""
+    return stats_stream.snapshot()
+
+@socketio.on('subscribe')
+def on_subscribe(data):
+    """Replace this client's filter; acknowledges with the filter now in effect"""
+    try:
+        return {'filter': _apply_filter(data or {})}
+    except ValueError as e:
+        return {'error': str(e)}
+
+@socketio.on('disconnect')
+def on_disconnect():
+    subscriptions.disconnect(request.sid)
 
 # REST API Endpoints
 @app.route('/api/stats', methods=['GET'])
 def stats():
-    """Get current network statistics"""
-    return jsonify(get_stats())
+    """
+    Get current network statistics
+    
+    Query parameters:
+        scope=local              this instance only when scaled out (default global)
+        fields=a,b               only these top-level keys
+        recent=N                 recent attacks to include (default RECENT_ATTACKS_PAGE, 0 = none)
+        recent_offset=K          skip the K newest attacks (paging)
+        attack_fields=a,b        only these keys of each recent attack
+        top=N                    heavy hitters per dimension (default HEAVY_HITTER_TOP, 0 = none)
+    
+    Responses carry a weak ETag derived from a stats version counter; a poll
+    with a matching If-None-Match gets 304 without building the payload.
+    """
+    scope = request.args.get('scope', 'global')
+    etag = stats_version(scope)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        try:
+            recent = _int_arg('recent', RECENT_ATTACKS_PAGE)
+            recent_offset = _int_arg('recent_offset', 0)
+            top = _int_arg('top', HEAVY_HITTER_TOP)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        response = jsonify(get_stats(scope=scope, fields=_csv_arg('fields'), recent=recent,
+                                     recent_offset=recent_offset,
+                                     attack_fields=_csv_arg('attack_fields'), top=top))
+    response.set_etag(etag, weak=True)
+    response.cache_control.no_cache = True  # always revalidate, never serve stale counters
+    return response
 
 @app.route('/api/stats/reset', methods=['POST'])
 def reset():
     """Reset statistics"""
-    reset_stats()
+    socketio.emit('stats_snapshot', reset_stats())
     return jsonify({'message': 'Statistics reset'})
 
+@app.route('/api/incidents', methods=['GET'])
+def incident_list():
+    """Open and recently closed incidents (?status=open|closed|all, ?limit=N)"""
+    status = request.args.get('status', 'all')
+    if status not in ('all', 'open', 'closed'):
+        return jsonify({'error': "status must be one of all, open, closed"}), 400
+    try:
+        limit = _int_arg('limit', 0)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(incidents.snapshot(status, limit or None))
+
+@app.route('/api/distinct', methods=['GET'])
+def distinct_series():
+    """Distinct-count estimates per minute or hour (?metric=sessions|src_ip|dst_ip, ?window=minute|hour)"""
+    metric = request.args.get('metric', 'sessions')
+    window = request.args.get('window', 'minute')
+    if metric not in DISTINCT_METRICS:
+        return jsonify({'error': f"metric must be one of {', '.join(DISTINCT_METRICS)}"}), 400
+    if window not in ('minute', 'hour'):
+        return jsonify({'error': "window must be one of minute, hour"}), 400
+    return jsonify({'metric': metric, 'window': window, 'series': get_distinct_series(metric, window)})
+
+@app.route('/api/drift', methods=['GET'])
+def drift_scores():
+    """Per-feature PSI/KS of live traffic against the training profile, plus recent alerts"""
+    return jsonify(drift.snapshot())
+
+@app.route('/api/subscriptions', methods=['GET'])
+def subscription_rooms():
+    """Active network_logs filters and how many clients use each"""
+    return jsonify(subscriptions.summary())
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
     return jsonify({'status': 'ok', 'service': 'IDS Backend'})
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Hot-path counters and stage latency histograms (Prometheus text format)"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/inject-packet', methods=['POST'])
 def inject_packet():
     """Inject packet data directly (for local mode simulator)"""
@@ -45,11 +188,26 @@ def inject_packet():
             return jsonify({'error': 'No data provided'}), 400
         
         # Process the packet through the classifier
-        process_packet_data(data, socketio)
+        ingest([data], socketio)
         
         return jsonify({'status': 'success', 'message': 'Packet injected'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/inject-batch', methods=['POST'])
+def inject_batch():
+    """Inject a JSON list of packets in one request (pooled HTTP senders)"""
+    try:
+        packets = request.get_json()
+        if not isinstance(packets, list) or not packets:
+            return jsonify({'error': 'Expected a non-empty list of packets'}), 400
+        
+        ingest(packets, socketio)
+        
+        return jsonify({'status': 'success', 'message': f'{len(packets)} packets injected'})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 if __name__ == "__main__":
-    socketio.run(app, host='0.0.0.0', port=5000, debug=False)
+    # Flask-SocketIO refuses to start the Werkzeug dev server unless told explicitly
+    socketio.run(app, host='0.0.0.0', port=FLASK_PORT, debug=False, allow_unsafe_werkzeug=True)
@@ -0,0 +1,201 @@
+"""
+Classifier micro-benchmark
+Measures IDSClassifier latency/throughput per path and batch size, model load
+time and memory footprint, and compares against a stored JSON baseline
+
+    cd backend
+    python benchmarks/classifier_benchmark.py                    # compare to baseline
+    python benchmarks/classifier_benchmark.py --update-baseline  # record a new baseline
+
+Exit code is 1 when any metric regresses by more than --tolerance, and 2 when
+there is no baseline (unless --update-baseline). Per-path slowdowns smaller than
+--floor-us per classify call are ignored: at batch size 1-16 timer and scheduler
+noise alone exceeds the tolerance. Each case reports its fastest run, and model
+load time/memory have fixed floors too (LOAD_FLOORS).
+
+benchmarks/baselines/classifier.json is a committed reference run. Timings
+depend on the machine, so before comparing a change on another machine record
+a local baseline from the unchanged tree first:
+
+    git stash && python benchmarks/classifier_benchmark.py --update-baseline && git stash pop
+    python benchmarks/classifier_benchmark.py
+
+(commit the file only when accepting new reference numbers).
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from kdd_reader import read_kdd  # noqa: E402
+from models.classifier import IDSClassifier  # noqa: E402
+
+DEFAULT_DATASET = os.path.join(BACKEND_DIR, 'packet-sender', 'KDDTest-21.txt')
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, 'benchmarks', 'baselines', 'classifier.json')
+BATCH_SIZES = [1, 16, 256, 4096]
+FLOOR_US = 20.0  # Slowdown per classify call always treated as noise
+LOAD_FLOORS = {'load_time_s': 0.05, 'model_memory_mb': 1.0}  # Same for model load time/memory
+
+
+def load_feature_rows(filepath, feature_cols, count):
+    """Feature dicts in the shape process_packet_data hands to the classifier"""
+    df = read_kdd(filepath)
+    numeric = [c for c in feature_cols if c not in ('protocol_type', 'service', 'flag')]
+    df[numeric] = df[numeric].astype(float)
+    rows = df[feature_cols].to_dict('records')
+    while len(rows) < count:
+        rows = rows + rows
+    return rows[:count]
+
+
+def measure_load():
+    """Wall time and traced memory of constructing a classifier (loads the model from disk)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    classifier = IDSClassifier()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return classifier, {
+        'load_time_s': round(elapsed, 4),
+        'model_memory_mb': round(current / 1e6, 3),
+        'load_peak_memory_mb': round(peak / 1e6, 3),
+    }
+
+
+def time_call(fn, rows, min_time, min_repeats, size):
+    """Fastest per-row time in microseconds over repeated runs (noise only ever adds time)"""
+    per_row = []
+    started = time.perf_counter()
+    while len(per_row) < min_repeats or time.perf_counter() - started < min_time:
+        start = time.perf_counter()
+        fn(rows)
+        per_row.append((time.perf_counter() - start) / size * 1e6)
+    return min(per_row)
+
+
+def run_benchmarks(classifier, rows, batch_sizes, min_time, min_repeats):
+    """Benchmark every available path at every batch size"""
+    rules_only = IDSClassifier.__new__(IDSClassifier)
+    rules_only.__dict__.update(classifier.__dict__)
+    rules_only.model = None
+    engine = classifier.rules
+
+    paths = {
+        'rules_single': lambda batch: [rules_only._rule_classify(r) for r in batch],
+        'rules_batch': rules_only.classify_batch,
+        # Mask evaluation alone, on columns already built (the engine's ceiling)
+        'rules_columns': lambda columns: engine.classify_columns(columns),
+    }
+    if classifier.model is not None:
+        paths['ml_single'] = lambda batch: [classifier.classify_packet(r) for r in batch]
+        paths['ml_batch'] = classifier.classify_batch
+    else:
+        print("⚠️  No ML model loaded - benchmarking detection rule paths only")
+
+    results = {}
+    for name, fn in paths.items():
+        for size in batch_sizes:
+            batch = engine.columns(rows[:size]) if name == 'rules_columns' else rows[:size]
+            us_per_row = time_call(fn, batch, min_time, min_repeats, size)
+            key = f"{name}@{size}"
+            results[key] = {
+                'us_per_row': round(us_per_row, 3),
+                'rows_per_sec': round(1e6 / us_per_row, 1),
+            }
+            print(f"  {key:24} {us_per_row:12.2f} µs/row {1e6 / us_per_row:14.1f} rows/s")
+    return results
+
+
+def compare(current, baseline, tolerance, floor_us=FLOOR_US):
+    """List of human-readable regressions (higher is worse for every metric compared)"""
+    regressions = []
+    for key, metrics in current['paths'].items():
+        base = baseline.get('paths', {}).get(key)
+        if not base:
+            continue
+        size = int(key.rsplit('@', 1)[1])
+        slowdown = metrics['us_per_row'] - base['us_per_row']
+        if slowdown > base['us_per_row'] * tolerance and slowdown * size > floor_us:
+            regressions.append(
+                f"{key}: {metrics['us_per_row']} µs/row vs baseline {base['us_per_row']} µs/row")
+    for key, floor in LOAD_FLOORS.items():
+        base = baseline.get('load', {}).get(key)
+        growth = current['load'][key] - (base or 0)
+        if base and growth > base * tolerance and growth > floor:
+            regressions.append(f"{key}: {current['load'][key]} vs baseline {base}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IDSClassifier micro-benchmark")
+    parser.add_argument("--file", default=DEFAULT_DATASET, help="KDD dataset file for sample rows")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON path")
+    parser.add_argument("--output", help="Write this run's results to a JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Allowed fractional slowdown/growth before failing (0.15 = 15%%)")
+    parser.add_argument("--floor-us", type=float, default=FLOOR_US,
+                        help="Ignore path slowdowns below this many µs per classify call")
+    parser.add_argument("--batch-sizes", type=int, nargs='+', default=BATCH_SIZES)
+    parser.add_argument("--min-time", type=float, default=0.5, help="Minimum seconds per case")
+    parser.add_argument("--min-repeats", type=int, default=3, help="Minimum runs per case")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store this run as the new baseline instead of comparing")
+    args = parser.parse_args()
+
+    print("⏱️  Measuring model load...")
+    classifier, load = measure_load()
+    print(f"  load {load['load_time_s']}s | model memory {load['model_memory_mb']} MB "
+          f"(peak {load['load_peak_memory_mb']} MB)")
+
+    rows = load_feature_rows(args.file, classifier._feature_columns(), max(args.batch_sizes))
+    print(f"\n⏱️  Benchmarking classification paths ({len(rows)} sample rows)...")
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'model_loaded': classifier.model is not None,
+        'load': load,
+        'paths': run_benchmarks(classifier, rows, args.batch_sizes, args.min_time, args.min_repeats),
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if not args.update_baseline and not os.path.exists(args.baseline):
+        print(f"\n❌ No baseline at {args.baseline}; record one on this machine with --update-baseline")
+        return 2
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Baseline written to {args.baseline}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if (baseline.get('python'), baseline.get('machine')) != (results['python'], results['machine']):
+        print(f"\n⚠️  Baseline was recorded on Python {baseline.get('python')} / {baseline.get('machine')}, "
+              f"this run is Python {results['python']} / {results['machine']}")
+    regressions = compare(results, baseline, args.tolerance, args.floor_us)
+    if regressions:
+        print(f"\n❌ PERFORMANCE REGRESSION (tolerance {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"  • {line}")
+        return 1
+
+    print(f"\n✅ No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
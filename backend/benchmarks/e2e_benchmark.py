@@ -0,0 +1,201 @@
+"""
+End-to-end throughput / latency benchmark
+Publishes KDDTest-21 packets to a local MQTT broker at increasing rates and
+measures the time until the backend emits them over Socket.IO
+
+Runs fully offline:
+    cd backend
+    python benchmarks/e2e_benchmark.py --rates 250 500 1000 2000 --duration 5
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import paho.mqtt.client as mqtt
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.local_broker import LocalBroker  # noqa: E402
+from kdd_reader import read_kdd  # noqa: E402
+
+DEFAULT_DATASET = os.path.join(BACKEND_DIR, 'packet-sender', 'KDDTest-21.txt')
+
+
+def load_packets(filepath):
+    """Load KDD rows as payload dicts (same fields KDDMQTTSender publishes)"""
+    df = read_kdd(filepath)
+    df = df.rename(columns={'protocol_type': 'protocol'})
+    df['length'] = df['src_bytes'] + df['dst_bytes']
+    df['src_ip'] = '192.168.1.10'
+    df['dst_ip'] = '10.0.0.1'
+    df['client'] = 'E2E-Bench'
+    return df.drop(columns=['difficulty']).to_dict('records')
+
+
+class EmitRecorder:
+    """Wraps socketio.emit to timestamp every network_logs event"""
+
+    def __init__(self, socketio):
+        self.socketio = socketio
+        self._original = socketio.emit
+        self._lock = threading.Lock()
+        self.arrivals = {}
+        socketio.emit = self._emit
+
+    def _emit(self, event, *args, **kwargs):
+        if event == 'network_logs' and args:
+            seq = args[0].get('bench_seq')
+            if seq is not None:
+                now = time.perf_counter()
+                with self._lock:
+                    self.arrivals[seq] = now
+        return self._original(event, *args, **kwargs)
+
+    def take(self):
+        with self._lock:
+            arrivals, self.arrivals = self.arrivals, {}
+        return arrivals
+
+    def restore(self):
+        self.socketio.emit = self._original
+
+
+def run_step(publisher, topic, packets, rate, duration, recorder, drain_timeout, seq_start):
+    """Publish at `rate` packets/s for `duration` seconds and collect latencies"""
+    total = int(rate * duration)
+    sent_at = {}
+    sender_cpu_start = time.thread_time()
+    start = time.perf_counter()
+
+    for i in range(total):
+        # Deadline pacing: sleep only when ahead of schedule so the rate doesn't drift
+        deadline = start + i / rate
+        delay = deadline - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        seq = seq_start + i
+        packet = dict(packets[i % len(packets)])
+        packet['bench_seq'] = seq
+        now = time.perf_counter()
+        sent_at[seq] = now
+        publisher.publish(topic, json.dumps(packet))
+
+    publish_elapsed = time.perf_counter() - start
+    sender_cpu = time.thread_time() - sender_cpu_start
+
+    # Wait for the backend to drain whatever is still in flight
+    arrivals = {}
+    drain_deadline = time.perf_counter() + drain_timeout
+    while time.perf_counter() < drain_deadline:
+        arrivals.update(recorder.take())
+        if len(arrivals) >= total:
+            break
+        time.sleep(0.05)
+    arrivals.update(recorder.take())
+
+    received = [seq for seq in arrivals if seq in sent_at]
+    latencies_ms = np.array([(arrivals[s] - sent_at[s]) * 1000 for s in received])
+    last_arrival = max((arrivals[s] for s in received), default=start)
+
+    return {
+        'target_rate': rate,
+        'sent': total,
+        'received': len(received),
+        'dropped': total - len(received),
+        'achieved_publish_rate': round(total / publish_elapsed, 1) if publish_elapsed else 0.0,
+        'throughput': round(len(received) / (last_arrival - start), 1) if received else 0.0,
+        'p50_ms': round(float(np.percentile(latencies_ms, 50)), 3) if received else None,
+        'p95_ms': round(float(np.percentile(latencies_ms, 95)), 3) if received else None,
+        'p99_ms': round(float(np.percentile(latencies_ms, 99)), 3) if received else None,
+        'max_ms': round(float(latencies_ms.max()), 3) if received else None,
+        'cpu_sender_s': round(sender_cpu, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end MQTT -> Socket.IO benchmark")
+    parser.add_argument("--file", default=DEFAULT_DATASET, help="KDD dataset file path")
+    parser.add_argument("--rates", type=int, nargs='+', default=[250, 500, 1000, 2000, 4000],
+                        help="Target publish rates (packets/s), run in order")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per rate step")
+    parser.add_argument("--drain-timeout", type=float, default=10.0,
+                        help="Seconds to wait for in-flight packets after each step")
+    parser.add_argument("--max-p99-ms", type=float, default=250.0,
+                        help="A step counts as sustained if nothing dropped and p99 is under this")
+    parser.add_argument("--json", dest="json_path", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    broker = LocalBroker().start()
+    print(f"📡 Local broker on {broker.host}:{broker.port}")
+
+    # Point the real backend at the local broker before importing it
+    os.environ['MQTT_BROKER'] = broker.host
+    os.environ['MQTT_PORT'] = str(broker.port)
+    os.chdir(BACKEND_DIR)
+    import app as backend
+
+    recorder = EmitRecorder(backend.socketio)
+    dashboard = backend.socketio.test_client(backend.app)
+
+    from config import MQTT_TOPIC
+    wait_deadline = time.time() + 30
+    while broker.subscriber_count(MQTT_TOPIC) == 0:
+        if time.time() > wait_deadline:
+            print("❌ Backend never subscribed to the local broker")
+            sys.exit(1)
+        time.sleep(0.1)
+
+    publisher = mqtt.Client("e2e-bench-publisher")
+    publisher.connect(broker.host, broker.port, 60)
+    publisher.loop_start()
+
+    packets = load_packets(args.file)
+    print(f"📊 Loaded {len(packets)} packets from {args.file}\n")
+
+    results = []
+    seq = 0
+    for rate in args.rates:
+        dashboard.get_received()
+        cpu_start = time.process_time()
+        broker_cpu_start = broker.cpu_seconds
+
+        step = run_step(publisher, MQTT_TOPIC, packets, rate, args.duration,
+                        recorder, args.drain_timeout, seq)
+        seq += step['sent']
+
+        step['cpu_broker_s'] = round(broker.cpu_seconds - broker_cpu_start, 3)
+        step['cpu_backend_s'] = round(
+            time.process_time() - cpu_start - step['cpu_broker_s'] - step['cpu_sender_s'], 3)
+        step['socketio_delivered'] = sum(
+            1 for e in dashboard.get_received() if e['name'] == 'network_logs')
+        step['sustained'] = step['dropped'] == 0 and step['p99_ms'] is not None \
+            and step['p99_ms'] <= args.max_p99_ms
+        results.append(step)
+
+        print(f"[{rate:>6}/s] sent {step['sent']:>6} | recv {step['received']:>6} | "
+              f"drop {step['dropped']:>5} | thr {step['throughput']:>8}/s | "
+              f"p50 {step['p50_ms']}ms p95 {step['p95_ms']}ms p99 {step['p99_ms']}ms | "
+              f"cpu sender {step['cpu_sender_s']}s broker {step['cpu_broker_s']}s "
+              f"backend {step['cpu_backend_s']}s")
+
+    sustained = [r['target_rate'] for r in results if r['sustained']]
+    print(f"\n✅ Max sustained rate: {max(sustained) if sustained else 'none'} packets/s")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'dataset': args.file, 'duration': args.duration, 'steps': results}, f, indent=2)
+        print(f"💾 Results written to {args.json_path}")
+
+    publisher.loop_stop()
+    publisher.disconnect()
+    recorder.restore()
+    broker.stop()
+
+
+if __name__ == "__main__":
+    main()
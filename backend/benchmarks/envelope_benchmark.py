@@ -0,0 +1,102 @@
+"""
+MQTT envelope benchmark
+Compares one-packet-per-message publishing against batched (and compressed)
+envelopes: MQTT messages and bytes needed per packet, plus encode/decode cost
+
+    cd backend
+    python benchmarks/envelope_benchmark.py --sizes 1 10 100 1000 --codecs none zlib zstd
+
+Runs offline; the end-to-end effect on a broker can be checked with
+`kdd_mqtt_sender.py --rate ... --envelope-size N` against benchmarks/local_broker.py.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'packet-sender'))
+
+from kdd_reader import read_kdd  # noqa: E402
+from kdd_mqtt_sender import build_payloads  # noqa: E402
+from mqtt.envelope import CODECS, decode_message, encode_envelope, zstandard  # noqa: E402
+
+DEFAULT_DATASET = os.path.join(BACKEND_DIR, 'packet-sender', 'KDDTest-21.txt')
+MQTT_FIXED_OVERHEAD = 2 + 2 + len('nids/unique123/live_packets')  # fixed header + topic (QoS 0)
+
+
+def measure(payloads, size, codec, min_time):
+    """Per-packet wire bytes and encode/decode microseconds for one envelope size"""
+    groups = [payloads[i:i + size] for i in range(0, len(payloads), size)]
+    if size == 1:
+        messages = [p.encode('utf-8') for p in payloads]
+        encode = lambda: [p.encode('utf-8') for p in payloads]  # noqa: E731
+    else:
+        messages = [encode_envelope(g, CODECS[codec]) for g in groups]
+        encode = lambda: [encode_envelope(g, CODECS[codec]) for g in groups]  # noqa: E731
+
+    def timed(fn):
+        runs = []
+        started = time.perf_counter()
+        while len(runs) < 3 or time.perf_counter() - started < min_time:
+            start = time.perf_counter()
+            fn()
+            runs.append((time.perf_counter() - start) / len(payloads) * 1e6)
+        return statistics.median(runs)
+
+    wire_bytes = sum(len(m) + MQTT_FIXED_OVERHEAD for m in messages)
+    return {
+        'envelope_size': size,
+        'codec': codec if size > 1 else 'none',
+        'messages_per_1k_packets': round(len(messages) / len(payloads) * 1000, 2),
+        'bytes_per_packet': round(wire_bytes / len(payloads), 1),
+        'encode_us_per_packet': round(timed(encode), 3),
+        'decode_us_per_packet': round(timed(lambda: [decode_message(m) for m in messages]), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched MQTT envelope benchmark")
+    parser.add_argument("--file", default=DEFAULT_DATASET, help="KDD dataset file path")
+    parser.add_argument("--limit", type=int, default=20000, help="Packets to encode")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument("--codecs", nargs='+', default=['none', 'zlib', 'zstd'], choices=sorted(CODECS))
+    parser.add_argument("--min-time", type=float, default=0.5, help="Minimum seconds per case")
+    parser.add_argument("--json", dest="json_path", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    codecs = [c for c in args.codecs if c != 'zstd' or zstandard is not None]
+    if len(codecs) < len(args.codecs):
+        print("⚠️  'zstandard' not installed - skipping zstd")
+
+    df = read_kdd(args.file, limit=args.limit)
+    payloads, _ = build_payloads(df, '192.168.1.10', '10.0.0.1', 'Envelope-Bench')
+    print(f"📊 {len(payloads)} packets from {args.file}\n")
+    print(f"{'size':>6} {'codec':>6} {'msgs/1k pkts':>13} {'bytes/pkt':>10} "
+          f"{'encode µs/pkt':>14} {'decode µs/pkt':>14}")
+
+    results = []
+    for size in args.sizes:
+        for codec in (codecs if size > 1 else ['none']):
+            r = measure(payloads, size, codec, args.min_time)
+            results.append(r)
+            print(f"{r['envelope_size']:>6} {r['codec']:>6} {r['messages_per_1k_packets']:>13} "
+                  f"{r['bytes_per_packet']:>10} {r['encode_us_per_packet']:>14} {r['decode_us_per_packet']:>14}")
+
+    base = results[0]
+    best = min(results, key=lambda r: r['bytes_per_packet'])
+    print(f"\n✅ Best: size {best['envelope_size']} / {best['codec']} uses "
+          f"{base['bytes_per_packet'] / best['bytes_per_packet']:.1f}x fewer bytes and "
+          f"{base['messages_per_1k_packets'] / best['messages_per_1k_packets']:.0f}x fewer messages per packet")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'dataset': args.file, 'packets': len(payloads), 'results': results}, f, indent=2)
+        print(f"💾 Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
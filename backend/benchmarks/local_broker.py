@@ -0,0 +1,288 @@
+"""
+Minimal in-process MQTT 3.1.1 broker
+Stand-in for broker.hivemq.com so benchmarks and local runs work offline
+
+Supports CONNECT, PUBLISH (QoS 0/1/2 in, QoS 0 out), SUBSCRIBE/UNSUBSCRIBE
+with '+'/'#' wildcards, '$share/<group>/<filter>' shared subscriptions
+(round-robin within a group), PINGREQ and DISCONNECT. Not meant for production use.
+"""
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+CONNECT = 1
+PUBLISH = 3
+PUBACK = 4
+PUBREC = 5
+PUBREL = 6
+PUBCOMP = 7
+SUBSCRIBE = 8
+UNSUBSCRIBE = 10
+PINGREQ = 12
+DISCONNECT = 14
+
+
+def topic_matches(topic_filter, topic):
+    """Check an MQTT topic against a subscription filter with +/# wildcards"""
+    filter_parts = topic_filter.split('/')
+    topic_parts = topic.split('/')
+    for i, part in enumerate(filter_parts):
+        if part == '#':
+            return True
+        if i >= len(topic_parts):
+            return False
+        if part != '+' and part != topic_parts[i]:
+            return False
+    return len(filter_parts) == len(topic_parts)
+
+
+def split_shared(topic_filter):
+    """(group, filter) for '$share/<group>/<filter>', (None, topic_filter) otherwise"""
+    if topic_filter.startswith('$share/'):
+        parts = topic_filter.split('/', 2)
+        if len(parts) == 3:
+            return parts[1], parts[2]
+    return None, topic_filter
+
+
+def _encode_length(length):
+    out = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        if length:
+            byte |= 0x80
+        out.append(byte)
+        if not length:
+            return bytes(out)
+
+
+def _encode_string(value):
+    data = value.encode('utf-8')
+    return struct.pack('!H', len(data)) + data
+
+
+class _Session:
+    """One connected client"""
+
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.address = address
+        self.client_id = None
+        self.subscriptions = set()
+        self.send_lock = threading.Lock()
+        self.alive = True
+
+    def send(self, data):
+        try:
+            with self.send_lock:
+                self.sock.sendall(data)
+            return True
+        except OSError:
+            self.alive = False
+            return False
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        broker = self.server.broker
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        session = _Session(self.request, self.client_address)
+        reader = self.request.makefile('rb')
+        try:
+            while True:
+                header = reader.read(1)
+                if not header:
+                    break
+                length = 0
+                multiplier = 1
+                while True:
+                    byte = reader.read(1)
+                    if not byte:
+                        return
+                    length += (byte[0] & 0x7F) * multiplier
+                    if not byte[0] & 0x80:
+                        break
+                    multiplier *= 128
+                body = reader.read(length) if length else b''
+                if len(body) != length:
+                    break
+
+                cpu_start = time.thread_time()
+                keep_going = broker._handle_packet(session, header[0], body)
+                broker._add_cpu(time.thread_time() - cpu_start)
+                if not keep_going:
+                    break
+        finally:
+            broker._drop_session(session)
+            reader.close()
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class LocalBroker:
+    """Tiny threaded MQTT broker bound to localhost"""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self._server = _Server((host, port), _Handler)
+        self._server.broker = self
+        self.host, self.port = self._server.server_address
+        self._sessions = []
+        self._lock = threading.Lock()
+        self._share_cursor = {}
+        self._thread = None
+        self._cpu_lock = threading.Lock()
+        self.messages_in = 0
+        self.messages_out = 0
+        self.cpu_seconds = 0.0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            sessions = list(self._sessions)
+        for session in sessions:
+            try:
+                session.sock.close()
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def subscriber_count(self, topic):
+        """Number of live sessions whose subscriptions match `topic`"""
+        with self._lock:
+            return sum(
+                1 for s in self._sessions
+                if s.alive and any(topic_matches(split_shared(f)[1], topic) for f in s.subscriptions)
+            )
+
+    def _add_cpu(self, seconds):
+        with self._cpu_lock:
+            self.cpu_seconds += seconds
+
+    def _drop_session(self, session):
+        session.alive = False
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+
+    def _handle_packet(self, session, first_byte, body):
+        packet_type = first_byte >> 4
+        flags = first_byte & 0x0F
+
+        if packet_type == CONNECT:
+            proto_len = struct.unpack('!H', body[:2])[0]
+            offset = 2 + proto_len + 4  # protocol name, level, flags, keepalive
+            id_len = struct.unpack('!H', body[offset:offset + 2])[0]
+            session.client_id = body[offset + 2:offset + 2 + id_len].decode('utf-8', 'replace')
+            with self._lock:
+                self._sessions.append(session)
+            session.send(b'\x20\x02\x00\x00')
+
+        elif packet_type == PUBLISH:
+            qos = (flags >> 1) & 0x03
+            topic_len = struct.unpack('!H', body[:2])[0]
+            topic = body[2:2 + topic_len].decode('utf-8')
+            offset = 2 + topic_len
+            if qos:
+                packet_id = body[offset:offset + 2]
+                offset += 2
+                ack = PUBACK if qos == 1 else PUBREC
+                session.send(bytes([ack << 4, 0x02]) + packet_id)
+            self._route(topic, body[offset:])
+
+        elif packet_type == PUBREL:
+            session.send(bytes([PUBCOMP << 4, 0x02]) + body[:2])
+
+        elif packet_type == SUBSCRIBE:
+            packet_id = body[:2]
+            offset = 2
+            granted = bytearray()
+            while offset < len(body):
+                filter_len = struct.unpack('!H', body[offset:offset + 2])[0]
+                topic_filter = body[offset + 2:offset + 2 + filter_len].decode('utf-8')
+                offset += 2 + filter_len + 1  # skip requested QoS
+                session.subscriptions.add(topic_filter)
+                granted.append(0)
+            session.send(bytes([0x90]) + _encode_length(2 + len(granted)) + packet_id + bytes(granted))
+
+        elif packet_type == UNSUBSCRIBE:
+            packet_id = body[:2]
+            offset = 2
+            while offset < len(body):
+                filter_len = struct.unpack('!H', body[offset:offset + 2])[0]
+                session.subscriptions.discard(body[offset + 2:offset + 2 + filter_len].decode('utf-8'))
+                offset += 2 + filter_len
+            session.send(b'\xb0\x02' + packet_id)
+
+        elif packet_type == PINGREQ:
+            session.send(b'\xd0\x00')
+
+        elif packet_type == DISCONNECT:
+            return False
+
+        return True
+
+    def _route(self, topic, payload):
+        """
+        Deliver a message at QoS 0 to every matching subscriber; each shared
+        subscription group gets one copy, handed to its members in turn
+        """
+        variable = _encode_string(topic) + payload
+        packet = bytes([PUBLISH << 4]) + _encode_length(len(variable)) + variable
+        with self._lock:
+            targets = []
+            groups = {}
+            for s in self._sessions:
+                direct = False
+                for f in s.subscriptions:
+                    group, inner = split_shared(f)
+                    if not topic_matches(inner, topic):
+                        continue
+                    if group is None:
+                        direct = True
+                    else:
+                        groups.setdefault((group, inner), []).append(s)
+                if direct:
+                    targets.append(s)
+            for key, members in groups.items():
+                cursor = self._share_cursor.get(key, 0)
+                targets.append(members[cursor % len(members)])
+                self._share_cursor[key] = cursor + 1
+            self.messages_in += 1
+        for session in targets:
+            if session.send(packet):
+                with self._lock:
+                    self.messages_out += 1
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local MQTT broker stand-in")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=1883, help="Port to listen on")
+    args = parser.parse_args()
+
+    broker = LocalBroker(args.host, args.port).start()
+    print(f"📡 Local MQTT broker listening on {broker.host}:{broker.port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        broker.stop()
@@ -0,0 +1,73 @@
+"""
+Retained detection record memory
+Builds N enriched records from KDDTest-21 rows both as the old
+`{**payload, ..., 'ml_features': {...}}` dict and as a compact DetectionRecord,
+and reports the bytes each one keeps alive (tracemalloc)
+
+    cd backend
+    python benchmarks/record_memory_benchmark.py --records 20000
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.e2e_benchmark import load_packets, DEFAULT_DATASET  # noqa: E402
+from mqtt.mqtt_subscriber import _extract_features  # noqa: E402
+from records import DetectionRecord, NUMERIC_FEATURES  # noqa: E402
+
+CLASSIFICATION = {'attack_type': 'neptune', 'category': 'DoS', 'confidence': 97.53}
+
+
+def legacy_record(data, features, classification, timestamp):
+    """The enriched dict the subscriber used to keep in recent_attacks"""
+    ml_features = {name: features.get(name, 0) for name in NUMERIC_FEATURES}
+    ml_features.update(protocol_type=features['protocol_type'], service=features['service'],
+                       flag=features['flag'])
+    return {**data, 'attack_type': classification['attack_type'],
+            'attack_category': classification['category'],
+            'confidence': classification['confidence'], 'is_attack': True,
+            'timestamp': timestamp, 'ml_features': ml_features}
+
+
+def measure(build, rows, count):
+    """Bytes per record kept alive (payload parsing included, payloads themselves released)"""
+    tracemalloc.start()
+    kept = []
+    for i in range(count):
+        data = dict(rows[i % len(rows)])  # a fresh payload, as if just decoded
+        data['timestamp'] = datetime.now().isoformat()
+        kept.append(build(data, _extract_features(data), CLASSIFICATION, data['timestamp']))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / count, kept
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare retained memory per detection record")
+    parser.add_argument("--file", default=DEFAULT_DATASET, help="KDD dataset file path")
+    parser.add_argument("--records", type=int, default=20000, help="Records to build per variant")
+    args = parser.parse_args()
+
+    rows = load_packets(args.file)
+    legacy, _ = measure(legacy_record, rows, args.records)
+    compact, _ = measure(DetectionRecord, rows, args.records)
+
+    data = dict(rows[0], timestamp=datetime.now().isoformat())
+    features = _extract_features(data)
+    round_trips = (DetectionRecord(data, features, CLASSIFICATION, data['timestamp']).to_dict()
+                   == legacy_record(data, features, CLASSIFICATION, data['timestamp']))
+    print(f"{'Representation':<18}{'bytes/record':>14}")
+    print("-" * 32)
+    print(f"{'dict (legacy)':<18}{legacy:>14.0f}")
+    print(f"{'DetectionRecord':<18}{compact:>14.0f}")
+    print("-" * 32)
+    print(f"📉 {legacy / compact:.1f}x smaller; to_dict() round-trips: {round_trips}")
+
+
+if __name__ == "__main__":
+    main()
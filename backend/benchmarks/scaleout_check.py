@@ -0,0 +1,152 @@
+"""
+Shared-subscription scale-out check
+Starts a local broker and N backend processes in one '$share' group, publishes
+packets, and verifies that the broker spread them over the instances and that
+every instance's merged /api/stats view accounts for all of them
+
+    cd backend
+    python benchmarks/scaleout_check.py --instances 3 --packets 3000
+
+Exit code is 1 if packets went missing or the global views disagree.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import paho.mqtt.client as mqtt
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.e2e_benchmark import load_packets, DEFAULT_DATASET  # noqa: E402
+from benchmarks.local_broker import LocalBroker  # noqa: E402
+from config import CLUSTER_STATS_INTERVAL, MQTT_TOPIC  # noqa: E402
+
+
+def start_instances(broker, count, group, base_port, log_dir):
+    """
+    Launch `count` backends (python app.py) sharing `group`, one HTTP port each
+    
+    Each instance's output goes to <log_dir>/instance-N.log.
+    """
+    procs = []
+    for i in range(count):
+        env = dict(os.environ,
+                   MQTT_BROKER=broker.host, MQTT_PORT=str(broker.port),
+                   MQTT_SHARE_GROUP=group, FLASK_PORT=str(base_port + i),
+                   IDS_INSTANCE_ID=f"instance-{i + 1}")
+        log = open(os.path.join(log_dir, f"instance-{i + 1}.log"), 'w')
+        procs.append(subprocess.Popen([sys.executable, 'app.py'], cwd=BACKEND_DIR, env=env,
+                                      stdout=log, stderr=subprocess.STDOUT))
+        log.close()  # the child keeps its own handle
+    return procs
+
+
+def check_alive(procs, log_dir):
+    """Raise with the tail of its log if any instance has exited"""
+    for i, proc in enumerate(procs):
+        if proc.poll() is not None:
+            with open(os.path.join(log_dir, f"instance-{i + 1}.log")) as f:
+                tail = ''.join(f.readlines()[-20:])
+            raise RuntimeError(f"instance-{i + 1} exited with code {proc.returncode}:\n{tail}")
+
+
+def wait_for(predicate, timeout, what, alive=None):
+    deadline = time.time() + timeout
+    while not predicate():
+        if alive is not None:
+            alive()
+        if time.time() > deadline:
+            raise TimeoutError(f"Timed out waiting for {what}")
+        time.sleep(0.2)
+
+
+def fetch_stats(port, scope):
+    try:
+        return requests.get(f"http://127.0.0.1:{port}/api/stats",
+                            params={'scope': scope, 'fields': 'total_packets'}, timeout=2).json()
+    except requests.RequestException:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check load-balancing across a shared-subscription group")
+    parser.add_argument("--instances", type=int, default=3, help="Backend processes to start")
+    parser.add_argument("--packets", type=int, default=3000, help="Packets to publish")
+    parser.add_argument("--rate", type=float, default=1000, help="Publish rate (packets/s)")
+    parser.add_argument("--group", default="ids", help="Shared subscription group name")
+    parser.add_argument("--base-port", type=int, default=5100, help="HTTP port of the first instance")
+    parser.add_argument("--file", default=DEFAULT_DATASET, help="KDD dataset file path")
+    args = parser.parse_args()
+
+    broker = LocalBroker().start()
+    shared = f"$share/{args.group}/{MQTT_TOPIC}"
+    print(f"📡 Local broker on {broker.host}:{broker.port}, starting {args.instances} instances in '{shared}'")
+    log_dir = tempfile.mkdtemp(prefix='scaleout-')
+    print(f"📝 Instance logs in {log_dir}")
+    procs = start_instances(broker, args.instances, args.group, args.base_port, log_dir)
+    ports = [args.base_port + i for i in range(args.instances)]
+
+    def alive():
+        check_alive(procs, log_dir)
+
+    try:
+        wait_for(lambda: broker.subscriber_count(MQTT_TOPIC) >= args.instances, 60,
+                 "instances to subscribe", alive)
+        wait_for(lambda: all(fetch_stats(p, 'local') is not None for p in ports), 60, "HTTP APIs", alive)
+
+        publisher = mqtt.Client("scaleout-check-publisher")
+        publisher.connect(broker.host, broker.port, 60)
+        publisher.loop_start()
+        packets = load_packets(args.file)
+        start = time.perf_counter()
+        for i in range(args.packets):
+            delay = start + i / args.rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            publisher.publish(MQTT_TOPIC, json.dumps(packets[i % len(packets)]))
+        print(f"📤 Published {args.packets} packets")
+
+        def local_totals():
+            return [(fetch_stats(p, 'local') or {}).get('total_packets', 0) for p in ports]
+
+        try:
+            wait_for(lambda: sum(local_totals()) >= args.packets, 30, "instances to drain", alive)
+        except TimeoutError:
+            pass
+        # Let every instance receive at least two rounds of peer snapshots
+        time.sleep(CLUSTER_STATS_INTERVAL * 2.5)
+
+        split = local_totals()
+        views = [(fetch_stats(p, 'global') or {}).get('total_packets') for p in ports]
+        publisher.loop_stop()
+        publisher.disconnect()
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait(timeout=10)
+        broker.stop()
+
+    print("\n" + "=" * 48)
+    print(f"{'Instance':<14}{'Processed':>12}{'Global view':>14}")
+    print("-" * 48)
+    for i, (local, view) in enumerate(zip(split, views)):
+        print(f"{'instance-' + str(i + 1):<14}{local:>12}{str(view):>14}")
+    print("-" * 48)
+
+    ok = sum(split) == args.packets and all(v == args.packets for v in views)
+    if ok:
+        print(f"✅ {args.packets} packets spread over {args.instances} instances; all global views agree")
+        return 0
+    print(f"❌ processed {sum(split)}/{args.packets}; global views {views}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Distinct counts with HyperLogLog
+An exact set of every session/source/destination grows without bound. A
+HyperLogLog with precision p keeps 2**p one-byte registers (p=12: 4 KB) and
+estimates the number of distinct values with a relative standard error of
+1.04 / sqrt(2**p) (p=12: ~1.6%; ~95% of estimates within 2x that), whatever
+the cardinality.
+
+Sketches are mergeable: the union of two HLLs is the register-wise max, so
+minute buckets combine into longer windows and instances combine into a
+cluster-wide count without double counting. Hashes are blake2b, so every
+process maps a value to the same register.
+
+WindowedCardinality keeps one sketch per metric per wall-clock minute (last
+DISTINCT_MINUTES) and per hour (last DISTINCT_HOURS). Bucket ids are
+`int(time // 60)` / `int(time // 3600)`, so instances (and the per-lane
+copies within one instance) agree on them and merge bucket by bucket.
+"""
+import base64
+import hashlib
+import math
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+
+from config import DISTINCT_HOURS, DISTINCT_MINUTES, HLL_PRECISION
+
+WINDOWS = {'minute': 60, 'hour': 3600}
+
+
+def hash64(value):
+    """Stable 64-bit hash (unlike hash(), identical in every process)"""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def relative_error(precision=HLL_PRECISION):
+    """Relative standard error of an estimate"""
+    return 1.04 / math.sqrt(1 << precision)
+
+
+class HyperLogLog:
+    __slots__ = ('p', 'registers')
+
+    def __init__(self, p=HLL_PRECISION, registers=None):
+        self.p = p
+        self.registers = bytearray(1 << p) if registers is None else bytearray(registers)
+
+    def add_hash(self, h):
+        p = self.p
+        index = h >> (64 - p)
+        rest = h & ((1 << (64 - p)) - 1)
+        rank = (64 - p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def add(self, value):
+        self.add_hash(hash64(value))
+
+    def merge(self, other):
+        """In-place union with another sketch of the same precision"""
+        if other.p != self.p:
+            raise ValueError(f"Cannot merge HLL p={other.p} into p={self.p}")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def copy(self):
+        return HyperLogLog(self.p, self.registers)
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # linear counting for small cardinalities
+        return int(round(estimate))
+
+    def to_text(self):
+        """Compact transport form (zlib + base64; sparse sketches shrink to a few bytes)"""
+        return base64.b64encode(zlib.compress(bytes(self.registers))).decode('ascii')
+
+    @classmethod
+    def from_text(cls, text):
+        registers = zlib.decompress(base64.b64decode(text))
+        return cls(int(math.log2(len(registers))), registers)
+
+
+class WindowedCardinality:
+    """Per-minute and per-hour HLLs for each metric; thread-safe"""
+
+    def __init__(self, metrics, minutes=DISTINCT_MINUTES, hours=DISTINCT_HOURS, p=HLL_PRECISION):
+        self.metrics = tuple(metrics)
+        self.p = p
+        self.keep = {'minute': minutes, 'hour': hours}
+        self._lock = threading.Lock()
+        # (metric, window) -> OrderedDict(bucket id -> HyperLogLog), oldest first
+        self._buckets = {(metric, window): OrderedDict()
+                         for metric in self.metrics for window in WINDOWS}
+
+    def _sketch(self, metric, window, bucket):
+        buckets = self._buckets[(metric, window)]
+        sketch = buckets.get(bucket)
+        if sketch is None:
+            sketch = buckets[bucket] = HyperLogLog(self.p)
+            while len(buckets) > self.keep[window]:
+                buckets.popitem(last=False)
+        return sketch
+
+    def add(self, values, now=None):
+        """values: {metric: value} for one packet"""
+        now = time.time() if now is None else now
+        hashes = [(metric, hash64(value)) for metric, value in values.items()]
+        with self._lock:
+            for window, seconds in WINDOWS.items():
+                bucket = int(now // seconds)
+                for metric, h in hashes:
+                    self._sketch(metric, window, bucket).add_hash(h)
+
+    def union(self, metric, seconds, now=None):
+        """One sketch of the minute buckets overlapping the last `seconds`"""
+        now = time.time() if now is None else now
+        first = int((now - seconds) // 60)
+        with self._lock:
+            sketches = [s.copy() for b, s in self._buckets[(metric, 'minute')].items() if b >= first]
+        union = HyperLogLog(self.p)
+        for sketch in sketches:
+            union.merge(sketch)
+        return union
+
+    def current(self, now=None):
+        """{(metric, window): (bucket id, sketch copy)} for the running minute and hour"""
+        now = time.time() if now is None else now
+        with self._lock:
+            return {(metric, window): (int(now // seconds),
+                                       self._sketch(metric, window, int(now // seconds)).copy())
+                    for metric in self.metrics for window, seconds in WINDOWS.items()}
+
+    def buckets(self, metric, window):
+        """[(bucket id, sketch copy)] for every retained bucket, oldest first"""
+        with self._lock:
+            return [(b, s.copy()) for b, s in self._buckets[(metric, window)].items()]
+
+    def series(self, metric, window):
+        """Distinct count per retained bucket, oldest first"""
+        return merged_series([self], metric, window)
+
+    def reset(self):
+        with self._lock:
+            for buckets in self._buckets.values():
+                buckets.clear()
+
+
+def merge_into(target, sketches):
+    """Union `sketches` ({key: HyperLogLog}, owned by the caller) into `target` key by key"""
+    for key, sketch in sketches.items():
+        if key in target:
+            target[key].merge(sketch)
+        else:
+            target[key] = sketch
+    return target
+
+
+def merged_series(cardinalities, metric, window):
+    """series() of the union of several WindowedCardinality (e.g. one per ingest lane)"""
+    merged = {}
+    for cardinality in cardinalities:
+        merge_into(merged, dict(cardinality.buckets(metric, window)))
+    return [{'start': datetime.fromtimestamp(b * WINDOWS[window]).isoformat(),
+             'distinct': sketch.count()} for b, sketch in sorted(merged.items())]
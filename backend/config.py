@@ -1,16 +1,55 @@
 """
 Configuration file for IDS System
 """
+import os
+import socket
 
-# MQTT Configuration
-MQTT_BROKER = "broker.hivemq.com"  # Change to your MQTT broker
-MQTT_PORT = 1883
-MQTT_TOPIC = "nids/live_packets"
+# MQTT Configuration (broker/port can be overridden from the environment,
+# e.g. MQTT_BROKER=127.0.0.1 to run fully offline against a local broker)
+MQTT_BROKER = os.environ.get("MQTT_BROKER", "broker.hivemq.com")  # Change to your MQTT broker
+MQTT_PORT = int(os.environ.get("MQTT_PORT", 1883))
+MQTT_TOPIC = "nids/unique123/live_packets"
+
+# Horizontal scale-out: with MQTT_SHARE_GROUP set, every backend instance joins the
+# shared subscription '$share/<group>/<MQTT_TOPIC>' so the broker load-balances packets
+# between them, and instances exchange stats snapshots on MQTT_CLUSTER_TOPIC/<id>
+MQTT_SHARE_GROUP = os.environ.get("MQTT_SHARE_GROUP")  # e.g. "ids"; unset = single instance
+MQTT_CLUSTER_TOPIC = "nids/unique123/instance_stats"
+INSTANCE_ID = os.environ.get("IDS_INSTANCE_ID") or f"{socket.gethostname()}-{os.getpid()}"
+CLUSTER_STATS_INTERVAL = 1.0  # Seconds between stats snapshots published by each instance
+CLUSTER_STALE_AFTER = 5.0  # Drop a peer from the global view after N seconds of silence
+
+# Ingest lanes: packets are partitioned by hash(src_ip) onto this many worker
+# threads, each owning the statistics shard for its sources
+INGEST_LANES = int(os.environ.get("INGEST_LANES", 4))
+INGEST_QUEUE_SIZE = 10000  # Batches buffered per lane before MQTT/HTTP ingest blocks
+
+# Load shedding: once a lane falls behind (queue depth or queueing delay over the
+# threshold), packets the heuristic pre-filter calls normal are only sampled for
+# full classification; suspicious ones are always classified. Shed packets are
+# counted (shed_packets) but produce no network_logs event
+LOAD_SHEDDING = True
+SHED_QUEUE_DEPTH = 1000  # Batches waiting on a lane
+SHED_MAX_LAG = 1.0  # Seconds a batch waited in the lane queue
+SHED_SAMPLE_RATE = 0.05  # Fraction of obviously-normal packets still fully classified while shedding
+
+# Server-side KDD window features (feature_engine.py)
+# 'auto': derive count/srv_count/*_rate/dst_host_* for payloads that don't carry
+#         them (raw connection records); 'always': recompute for every packet,
+#         ignoring sender-supplied values; 'off': trust the payload
+FEATURE_ENGINE_MODE = os.environ.get("FEATURE_ENGINE_MODE", "auto")
+if FEATURE_ENGINE_MODE not in ("auto", "always", "off"):
+    raise ValueError(f"FEATURE_ENGINE_MODE must be auto, always or off, not {FEATURE_ENGINE_MODE!r}")
+FEATURE_TIME_WINDOW = 2.0  # Seconds (KDD time-based features)
+FEATURE_HOST_WINDOW = 100  # Connections per dst host / service (KDD host-based features)
+FEATURE_MAX_KEYS = 10000  # Hosts/services tracked before least recently seen are evicted
 
 # Flask Server Configuration
 FLASK_HOST = "0.0.0.0"
-FLASK_PORT = 5000
+FLASK_PORT = int(os.environ.get("FLASK_PORT", 5000))  # Override to run several instances on one host
 FLASK_DEBUG = False
+GZIP_MIN_SIZE = 1024  # Compress JSON/text responses from this many bytes (Accept-Encoding: gzip)
+GZIP_LEVEL = 6
 
 # Frontend Configuration
 FRONTEND_URL = "http://localhost:5173"
@@ -19,24 +58,79 @@ FRONTEND_API_URL = "http://localhost:5000"
 # Logging Configuration
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "[%(asctime)s] %(levelname)s - %(name)s - %(message)s"
+LOG_JSON = False  # Emit one JSON object per line instead of LOG_FORMAT text
+LOG_QUEUE_SIZE = 10000  # Records buffered for the log writer thread (overflow is dropped, not blocked on)
+LOG_PACKET_SAMPLE_RATE = 0.01  # Fraction of packets logged individually (0 disables per-packet logs)
+LOG_ERROR_BURST = 5  # Max identical errors logged per LOG_ERROR_INTERVAL...
+LOG_ERROR_INTERVAL = 10  # ...seconds; the rest are counted and summarized
 
 # Statistics Configuration
-MAX_RECENT_ATTACKS = 100  # Keep last N attacks in memory
+MAX_RECENT_ATTACKS = 1000  # Keep last N attacks in memory (compact records, ~0.3 KB each)
+RECENT_ATTACKS_PAGE = 100  # Recent attacks /api/stats returns unless ?recent= asks for more
+STATS_DELTA_INTERVAL = 1.0  # Seconds between stats_delta events (one background tick, not per packet)
 PACKETS_PER_SEC_WINDOW = 1  # Calculate packets/sec every N seconds
-ACTIVE_SESSION_TIMEOUT = 300  # Consider session inactive after N seconds
+ACTIVE_SESSION_TIMEOUT = 300  # active_sessions = distinct src/dst pairs seen in the last N seconds
+
+# Distinct counts (cardinality.py): HyperLogLog sketches of 2**HLL_PRECISION bytes,
+# relative standard error 1.04 / sqrt(2**HLL_PRECISION) (12 -> 4 KB, ~1.6%)
+HLL_PRECISION = 12
+DISTINCT_MINUTES = 60  # Per-minute sketches kept per metric
+DISTINCT_HOURS = 24  # Per-hour sketches kept per metric
+
+# Heavy hitters (heavy_hitters.py): top src_ip, dst_ip, service and (src_ip, attack_type)
+# in fixed memory; counts overestimate by at most packets / HEAVY_HITTER_CAPACITY
+HEAVY_HITTER_CAPACITY = 1000  # Counters per dimension per ingest lane
+HEAVY_HITTER_TOP = 10  # Entries per dimension in /api/stats (?top=N)
+
+# Incident aggregation (incidents.py): attacks with the same (src_ip, dst_ip, attack_type)
+# are folded into one incident with counts, first/last seen and peak rate
+INCIDENT_WINDOW = 30.0  # Seconds without a matching detection before an incident closes
+INCIDENT_UPDATE_INTERVAL = 1.0  # Seconds between batched incident_update / incident_close events
+INCIDENT_MAX_OPEN = 10000  # Open incidents kept; the least recently seen is closed early past this
+INCIDENT_HISTORY = 500  # Closed incidents kept for /api/incidents
+
+# Feature drift (drift.py): live feature histograms vs the training profile
+# saved by retrain_model.py
+DRIFT_REFERENCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    "models", "drift_reference.pkl")
+DRIFT_BINS = 10  # Quantile bins per numeric feature in the reference profile
+DRIFT_SAMPLE_RATE = 0.1  # Fraction of classified packets added to the histograms
+DRIFT_HALF_LIFE = 20000  # Sampled packets after which older traffic weighs half
+DRIFT_MIN_SAMPLES = 500  # No alerts before this many sampled packets
+DRIFT_PSI_ALERT = 0.25  # PSI above this is drift (< 0.1 stable, 0.1-0.25 moderate)
+DRIFT_CHECK_INTERVAL = 10.0  # Seconds between scoring passes (alerts, metrics)
+DRIFT_HISTORY = 100  # Past drift alerts kept for the API
 
 # ML Model Configuration
 MODEL_PATH = "models/ids_model.pkl"
 SCALER_PATH = "models/scaler.pkl"
 USE_HEURISTIC_FALLBACK = True  # Use heuristic classification if model not available
 
-# Attack Types
+# Attack Types (category -> KDD/NSL-KDD labels); the classifier's label -> category
+# map and the scenario category selectors are both built from this
 ATTACK_CATEGORIES = {
-    "DoS": ["back", "land", "neptune", "pod", "smurf", "teardrop", "mailbomb", "apache2"],
+    "DoS": ["back", "land", "neptune", "pod", "smurf", "teardrop", "mailbomb", "apache2",
+            "processtable", "udpstorm"],
     "Probe": ["satan", "ipsweep", "nmap", "portsweep", "mscan", "saint"],
-    "R2L": ["guess_passwd", "ftp_write", "imap", "phf", "multihop", "warezmaster", "httptunnel"],
+    "R2L": ["guess_passwd", "ftp_write", "imap", "phf", "multihop", "warezmaster", "warezclient",
+            "spy", "xlock", "xsnoop", "snmpguess", "snmpgetattack", "httptunnel", "sendmail", "named"],
     "U2R": ["shellcode", "loadmodule", "perl", "rootkit", "buffer_overflow", "xterm", "ps"],
 }
 
+# Detection rules (models/rules.py): the model fallback and the load-shedding
+# pre-filter. Tried by ascending priority; the first rule whose conditions all
+# hold sets attack_type/confidence. Conditions are (feature, op, operand) with
+# op in > >= < <= == != in not_in; operand (other_feature, k) compares against
+# k * other_feature
+DETECTION_RULES = [
+    {'name': 'syn_flood', 'attack_type': 'neptune', 'confidence': 85, 'priority': 10,
+     'when': [('count', '>', 10), ('serror_rate', '>', 0.5)]},
+    {'name': 'service_scan', 'attack_type': 'mscan', 'confidence': 80, 'priority': 20,
+     'when': [('srv_count', '>', 30), ('src_bytes', '<', 100)]},
+    {'name': 'download_tunnel', 'attack_type': 'httptunnel', 'confidence': 75, 'priority': 30,
+     'when': [('dst_bytes', '>', ('src_bytes', 5)), ('count', '<', 5)]},
+]
+RULE_DEFAULT = {'attack_type': 'normal', 'confidence': 95}  # No rule matched
+
 # Confidence Threshold
 MIN_CONFIDENCE_THRESHOLD = 50  # Only report attacks above this confidence
@@ -10,31 +10,25 @@ This script:
 """
 
 import requests
-import pandas as pd
 import time
 from datetime import datetime
 import json
+from traffic_scenarios import SCENARIOS, load_profile, compile_schedule, replay
+from http_sender import HttpSender
+from kdd_reader import KDD_COLUMNS, read_kdd
 
 # Flask API endpoint
 API_ENDPOINT = "http://localhost:5000/api/inject-packet"
+BATCH_ENDPOINT = "http://localhost:5000/api/inject-batch"
+
+# One keep-alive session for the sequential demos (no TCP handshake per packet)
+_session = requests.Session()
 
 # Dataset path (download from GitHub if not available)
 DATASET_PATH = "KDDTrain+.txt"
 
 # Column names for KDD dataset
-COLUMNS = [
-    'duration','protocol_type','service','flag','src_bytes','dst_bytes','land',
-    'wrong_fragment','urgent','hot','num_failed_logins','logged_in',
-    'num_compromised','root_shell','su_attempted','num_root',
-    'num_file_creations','num_shells','num_access_files','num_outbound_cmds',
-    'is_host_login','is_guest_login','count','srv_count','serror_rate',
-    'srv_serror_rate','rerror_rate','srv_rerror_rate','same_srv_rate',
-    'diff_srv_rate','srv_diff_host_rate','dst_host_count','dst_host_srv_count',
-    'dst_host_same_srv_rate','dst_host_diff_srv_rate',
-    'dst_host_same_src_port_rate','dst_host_srv_diff_host_rate',
-    'dst_host_serror_rate','dst_host_srv_serror_rate',
-    'dst_host_rerror_rate','dst_host_srv_rerror_rate','label','difficulty'
-]
+COLUMNS = KDD_COLUMNS
 
 # Map attack labels to IP addresses for visualization
 ATTACK_SOURCES = {
@@ -71,19 +65,17 @@ def classify_attack(label):
     else:
         return 'U2R'
 
-def load_dataset(filepath=DATASET_PATH, limit=None):
-    """Load KDD dataset"""
+def load_dataset(filepath=DATASET_PATH, limit=None, offset=0):
+    """Load KDD dataset (only the requested rows are parsed)"""
     try:
-        df = pd.read_csv(filepath, header=None, names=COLUMNS)
-        if limit:
-            df = df.head(limit)
+        df = read_kdd(filepath, offset=offset, limit=limit)
         print(f"✅ Loaded {len(df)} samples from {filepath}")
         return df
     except FileNotFoundError:
         print(f"❌ Dataset not found at {filepath}")
         print("📥 Downloading from GitHub...")
         download_dataset()
-        return load_dataset(filepath, limit)
+        return load_dataset(filepath, limit, offset)
 
 def download_dataset():
     """Download KDD dataset from GitHub"""
@@ -99,7 +91,7 @@ def download_dataset():
 def send_packet_to_api(packet_data):
     """Send packet data to Flask API"""
     try:
-        response = requests.post(API_ENDPOINT, json=packet_data, timeout=5)
+        response = _session.post(API_ENDPOINT, json=packet_data, timeout=5)
         if response.status_code == 200:
             return True
         else:
@@ -223,6 +215,39 @@ def demo_specific_attack(df, attack_name, limit=50, delay=0.3):
     
     print(f"\n✅ Complete! Sent {sent} {attack_name} packets")
 
+def demo_scenario(df, scenario="mixed", speed=1.0, concurrency=8):
+    """Run demo: Replay a declarative traffic scenario (bursts, trickles, ramps)"""
+    profile = load_profile(scenario)
+    schedule = compile_schedule(profile, df['label'].to_numpy())
+    
+    if len(schedule) == 0:
+        print(f"❌ Scenario produced no packets for this dataset")
+        return
+    
+    print("\n" + "="*60)
+    print(f"🎓 TRAFFIC SCENARIO: {scenario if isinstance(scenario, str) else 'custom'}")
+    print("="*60)
+    print(f"📊 {len(schedule)} packets over {schedule.duration:.0f}s scenario time "
+          f"({schedule.duration / speed:.0f}s at {speed}x)")
+    for stream, count in schedule.summary().items():
+        print(f"  • {stream:20} : {count:5} packets")
+    print(f"🔗 Open dashboard at http://localhost:5173")
+    print("="*60 + "\n")
+    
+    # Build every packet before the clock starts so sending stays on schedule
+    packets = [row_to_packet(row) for row in df.iloc[schedule.rows].to_dict('records')]
+    
+    # Bursts outrun one sequential connection, so send through the pooled sender
+    sender = HttpSender(API_ENDPOINT, concurrency=concurrency, batch_url=BATCH_ENDPOINT)
+    result = replay(schedule, packets, sender.submit, speed=speed)
+    stats = sender.close()
+    
+    print(f"\n✅ Scenario complete! Sent {stats['sent']} packets "
+          f"({stats['failed']} failed) in {result['elapsed_s']}s, "
+          f"max lag {result['max_lag_ms']}ms")
+    if stats['errors']:
+        print(f"⚠️  Errors: {stats['errors']}")
+
 if __name__ == "__main__":
     import sys
     
@@ -252,8 +277,9 @@ if __name__ == "__main__":
     print("  3. Show Probe attacks (nmap, ipsweep)")
     print("  4. Show R2L attacks (httptunnel)")
     print("  5. Show only normal traffic")
+    print(f"  6. Traffic scenario ({', '.join(SCENARIOS)})")
     
-    choice = input("\nSelect option (1-5) or enter attack name [default: 1]: ").strip()
+    choice = input("\nSelect option (1-6) or enter attack name [default: 1]: ").strip()
     
     if choice == "2":
         demo_specific_attack(df, "neptune", limit=100, delay=0.3)
@@ -264,6 +290,10 @@ if __name__ == "__main__":
     elif choice == "5":
         filtered = df[df['label'] == 'normal'].head(50)
         demo_run_all_attacks(filtered, delay=0.3)
+    elif choice == "6":
+        scenario = input("Scenario name or JSON profile path [default: mixed]: ").strip() or "mixed"
+        speed = input("Speed factor (2 = twice as fast) [default: 1]: ").strip()
+        demo_scenario(df, scenario, speed=float(speed) if speed else 1.0)
     elif choice and choice not in ["1", ""]:
         # Custom attack name
         demo_specific_attack(df, choice, limit=50, delay=0.3)
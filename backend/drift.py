@@ -0,0 +1,215 @@
+"""
+Feature drift monitor
+retrain_model.py saves a reference profile of the training data: quantile bin
+edges and bin proportions for every numeric model feature, and the category
+proportions of protocol_type/service/flag. Live traffic is counted into the
+same bins, so memory is fixed (a few hundred floats) whatever the traffic.
+
+A sample of classified packets (DRIFT_SAMPLE_RATE) is binned per batch with
+one searchsorted per feature. Counts decay with a half-life of
+DRIFT_HALF_LIFE sampled packets, so scores follow recent traffic.
+
+Scores per feature, computed from the bin counts:
+    psi  population stability index, sum((live - ref) * ln(live / ref));
+         < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 significant
+    ks   largest gap between the binned live and reference CDFs (numeric
+         features only; a lower bound of the exact KS statistic)
+
+A daemon thread scores every DRIFT_CHECK_INTERVAL seconds and emits
+'drift_alert' once when a feature's PSI crosses DRIFT_PSI_ALERT.
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+import metrics
+from config import (DRIFT_BINS, DRIFT_CHECK_INTERVAL, DRIFT_HALF_LIFE, DRIFT_HISTORY,
+                    DRIFT_MIN_SAMPLES, DRIFT_PSI_ALERT, DRIFT_REFERENCE_PATH, DRIFT_SAMPLE_RATE)
+from log import get_logger
+
+logger = get_logger('drift')
+
+_EPSILON = 1e-4  # floor for empty bins so PSI stays finite
+
+
+def build_reference(df, categorical_features, bins=DRIFT_BINS):
+    """Reference profile of a training DataFrame (model feature columns only)"""
+    profile = {'rows': len(df), 'numeric': {}, 'categorical': {}}
+    for feature in df.columns:
+        if feature in categorical_features:
+            shares = df[feature].astype(str).value_counts(normalize=True)
+            profile['categorical'][feature] = {'values': shares.index.tolist(),
+                                               'expected': shares.tolist() + [0.0]}
+        else:
+            values = df[feature].to_numpy(dtype=float)
+            edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+            counts = np.bincount(np.searchsorted(edges, values, side='right'),
+                                 minlength=len(edges) + 1)
+            profile['numeric'][feature] = {'edges': edges.tolist(),
+                                           'expected': (counts / len(values)).tolist()}
+    return profile
+
+
+def psi(expected, observed):
+    expected = np.maximum(expected, _EPSILON)
+    observed = np.maximum(observed, _EPSILON)
+    return float(np.sum((observed - expected) * np.log(observed / expected)))
+
+
+class DriftMonitor:
+    """Decayed live histograms compared against a reference profile; thread-safe"""
+
+    def __init__(self, reference=None, sample_rate=DRIFT_SAMPLE_RATE, half_life=DRIFT_HALF_LIFE,
+                 min_samples=DRIFT_MIN_SAMPLES, threshold=DRIFT_PSI_ALERT,
+                 interval=DRIFT_CHECK_INTERVAL, history=DRIFT_HISTORY):
+        self.reference = reference
+        self.stride = max(1, round(1 / sample_rate)) if sample_rate > 0 else 0
+        self.half_life = half_life
+        self.min_samples = min_samples
+        self.threshold = threshold
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._offered = 0  # packets offered to observe(), drives the sampling stride
+        self._alerts = deque(maxlen=history)
+        self._drifting = set()
+        self._stop = threading.Event()
+        if reference is None:
+            return
+        self.numeric = list(reference['numeric'])
+        self._edges = [np.asarray(reference['numeric'][f]['edges']) for f in self.numeric]
+        self._expected = {f: np.asarray(spec['expected'])
+                          for kind in ('numeric', 'categorical')
+                          for f, spec in reference[kind].items()}
+        # Category -> bin; unseen categories share the last ('other') bin
+        self._categories = {f: {value: i for i, value in enumerate(spec['values'])}
+                            for f, spec in reference['categorical'].items()}
+        self.reset()
+
+    @classmethod
+    def load(cls, path=DRIFT_REFERENCE_PATH, **kwargs):
+        """Monitor for the saved reference profile (disabled if there is none)"""
+        try:
+            reference = joblib.load(path)
+        except FileNotFoundError:
+            logger.info("No drift reference profile, drift monitor disabled",
+                        extra={'fields': {'path': path}})
+            reference = None
+        return cls(reference, **kwargs)
+
+    @property
+    def enabled(self):
+        return self.reference is not None and self.stride > 0
+
+    def reset(self):
+        if self.reference is None:
+            return
+        with self._lock:
+            self._counts = {f: np.zeros(len(expected)) for f, expected in self._expected.items()}
+            self._weight = 0.0  # decayed number of sampled packets
+            self._sampled = 0
+            self._drifting.clear()
+
+    def observe(self, rows):
+        """Count a sample of feature dicts (every stride-th packet offered)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            start = -self._offered % self.stride
+            self._offered += len(rows)
+            sample = rows[start::self.stride]
+            if not sample:
+                return
+            matrix = np.array([[row.get(f, 0) for f in self.numeric] for row in sample], dtype=float)
+            decay = 0.5 ** (len(sample) / self.half_life)
+            for counts in self._counts.values():
+                counts *= decay
+            for j, feature in enumerate(self.numeric):
+                bins = np.searchsorted(self._edges[j], matrix[:, j], side='right')
+                self._counts[feature] += np.bincount(bins, minlength=len(self._edges[j]) + 1)
+            for feature, index in self._categories.items():
+                counts = self._counts[feature]
+                other = len(counts) - 1
+                for row in sample:
+                    counts[index.get(row.get(feature), other)] += 1
+            self._weight = self._weight * decay + len(sample)
+            self._sampled += len(sample)
+
+    def scores(self):
+        """{feature: {'psi', 'ks', 'drifting'}} for the live window"""
+        with self._lock:
+            weight = self._weight
+            observed = {f: counts / weight for f, counts in self._counts.items()} if weight else {}
+        result = {}
+        for feature, shares in observed.items():
+            expected = self._expected[feature]
+            score = round(psi(expected, shares), 4)
+            ks = None
+            if feature in self.reference['numeric']:
+                ks = round(float(np.max(np.abs(np.cumsum(shares) - np.cumsum(expected)))), 4)
+            result[feature] = {'psi': score, 'ks': ks, 'drifting': score > self.threshold}
+        return result
+
+    def check(self, socketio=None, now=None):
+        """Score, update gauges and emit 'drift_alert' for features that started drifting"""
+        if not self.enabled or self._sampled < self.min_samples:
+            return []
+        now = time.time() if now is None else now
+        scores = self.scores()
+        alerts = []
+        cleared = []
+        # Transitions under the lock, so concurrent checks neither repeat nor drop an alert
+        with self._lock:
+            for feature, score in scores.items():
+                if score['drifting'] and feature not in self._drifting:
+                    self._drifting.add(feature)
+                    alerts.append({'feature': feature, 'psi': score['psi'], 'ks': score['ks'],
+                                   'threshold': self.threshold,
+                                   'time': datetime.fromtimestamp(now).isoformat()})
+                elif not score['drifting'] and feature in self._drifting:
+                    self._drifting.discard(feature)
+                    cleared.append((feature, score['psi']))
+            self._alerts.extendleft(alerts)
+        for feature, score in scores.items():
+            metrics.FEATURE_DRIFT_PSI.labels(feature).set(score['psi'])
+        for feature, score in cleared:
+            logger.info("Feature drift cleared", extra={'fields': {'feature': feature, 'psi': score}})
+        for alert in alerts:
+            metrics.DRIFT_ALERTS.inc()
+            logger.warning("Feature drift", extra={'fields': alert})
+            if socketio is not None:
+                socketio.emit('drift_alert', alert)
+        return alerts
+
+    def start(self, socketio):
+        """check() every `interval` seconds on a daemon thread"""
+        def run():
+            while not self._stop.wait(self.interval):
+                self.check(socketio)
+        if self.enabled:
+            threading.Thread(target=run, name='drift-monitor', daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self):
+        """Scores and recent alerts for the API"""
+        if not self.enabled:
+            return {'enabled': False, 'features': {}, 'alerts': []}
+        with self._lock:
+            drifting = sorted(self._drifting)
+            alerts = list(self._alerts)
+        return {
+            'enabled': True,
+            'reference_rows': self.reference['rows'],
+            'sampled_packets': self._sampled,
+            'window_weight': round(self._weight, 1),
+            'threshold': self.threshold,
+            'features': self.scores() if self._sampled else {},
+            'drifting': drifting,
+            'alerts': alerts,
+        }
@@ -0,0 +1,179 @@
+"""
+Incremental KDD traffic features
+Computes the KDD'99 time-based (2-second) and host-based (100-connection)
+traffic features from raw connection records, so packets that only carry
+basic fields (dst_ip, service, flag, src_port, ...) can be classified.
+
+Every window is a deque with running counters: a connection is added once and
+evicted once, so each update is O(1) amortized regardless of traffic rate.
+
+Time window (connections in the last `time_window` seconds):
+    count, serror_rate, rerror_rate, same_srv_rate, diff_srv_rate   same dst host
+    srv_count, srv_serror_rate, srv_rerror_rate, srv_diff_host_rate  same service
+Connection window (last `host_window` connections to the same dst host / service):
+    dst_host_count, dst_host_same_srv_rate, dst_host_diff_srv_rate,
+    dst_host_same_src_port_rate, dst_host_serror_rate, dst_host_rerror_rate
+                                                                   same dst host
+    dst_host_srv_count, dst_host_srv_diff_host_rate,
+    dst_host_srv_serror_rate, dst_host_srv_rerror_rate              same service
+
+Counts include the current connection.
+"""
+import time
+from collections import OrderedDict, deque
+
+SYN_ERROR_FLAGS = frozenset({'S0', 'S1', 'S2', 'S3'})
+REJ_ERROR_FLAGS = frozenset({'REJ'})
+
+class _Window:
+    """Connections in one sliding window with running per-key/port/error counters"""
+    __slots__ = ('entries', 'keys', 'ports', 'serror', 'rerror')
+
+    def __init__(self):
+        self.entries = deque()  # (ts, key, port, serror, rerror)
+        self.keys = {}
+        self.ports = {}
+        self.serror = 0
+        self.rerror = 0
+
+    def push(self, ts, key, port, serror, rerror):
+        self.entries.append((ts, key, port, serror, rerror))
+        self.keys[key] = self.keys.get(key, 0) + 1
+        if port is not None:
+            self.ports[port] = self.ports.get(port, 0) + 1
+        self.serror += serror
+        self.rerror += rerror
+
+    def pop(self):
+        _, key, port, serror, rerror = self.entries.popleft()
+        self._decrement(self.keys, key)
+        if port is not None:
+            self._decrement(self.ports, port)
+        self.serror -= serror
+        self.rerror -= rerror
+
+    @staticmethod
+    def _decrement(counter, key):
+        remaining = counter[key] - 1
+        if remaining:
+            counter[key] = remaining
+        else:
+            del counter[key]
+
+    def expire(self, cutoff):
+        entries = self.entries
+        while entries and entries[0][0] < cutoff:
+            self.pop()
+
+    def trim(self, size):
+        while len(self.entries) > size:
+            self.pop()
+
+
+class _WindowMap:
+    """Windows per host/service, least recently used evicted past `max_keys`"""
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._windows = OrderedDict()
+
+    def get(self, key):
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = _Window()
+            if len(self._windows) > self.max_keys:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(key)
+        return window
+
+    def __len__(self):
+        return len(self._windows)
+
+
+def _rate(part, total):
+    return round(part / total, 2) if total else 0.0
+
+
+class WindowFeatureEngine:
+    """
+    Stateful KDD feature extractor; feed connection records in arrival order
+
+    Not thread-safe: callers serialize update() (the backend does it in ingest()).
+    """
+
+    def __init__(self, time_window=2.0, host_window=100, max_keys=10000):
+        self.time_window = time_window
+        self.host_window = host_window
+        self._host_time = _WindowMap(max_keys)
+        self._srv_time = _WindowMap(max_keys)
+        self._host_conn = _WindowMap(max_keys)
+        self._srv_conn = _WindowMap(max_keys)
+
+    def update(self, record, ts=None):
+        """
+        Add one connection and return its window features
+
+        record: dict with dst_ip, service, flag and optionally src_port
+                (without it dst_host_same_src_port_rate is 0.0)
+        ts: connection time in seconds (defaults to now)
+        """
+        ts = time.time() if ts is None else ts
+        host = record.get('dst_ip', '')
+        service = record.get('service', 'other')
+        port = record.get('src_port')
+        flag = record.get('flag', 'SF')
+        serror = flag in SYN_ERROR_FLAGS
+        rerror = flag in REJ_ERROR_FLAGS
+        cutoff = ts - self.time_window
+
+        host_time = self._host_time.get(host)
+        host_time.expire(cutoff)
+        host_time.push(ts, service, port, serror, rerror)
+
+        srv_time = self._srv_time.get(service)
+        srv_time.expire(cutoff)
+        srv_time.push(ts, host, port, serror, rerror)
+
+        host_conn = self._host_conn.get(host)
+        host_conn.push(ts, service, port, serror, rerror)
+        host_conn.trim(self.host_window)
+
+        srv_conn = self._srv_conn.get(service)
+        srv_conn.push(ts, host, port, serror, rerror)
+        srv_conn.trim(self.host_window)
+
+        count = len(host_time.entries)
+        srv_count = len(srv_time.entries)
+        dst_host_count = len(host_conn.entries)
+        dst_host_srv_count = len(srv_conn.entries)
+        same_srv = _rate(host_time.keys[service], count)
+        dst_host_same_srv = _rate(host_conn.keys[service], dst_host_count)
+        # Connections without a port are never counted as sharing one
+        same_src_port = _rate(host_conn.ports[port], dst_host_count) if port is not None else 0.0
+
+        return {
+            'count': float(count),
+            'serror_rate': _rate(host_time.serror, count),
+            'rerror_rate': _rate(host_time.rerror, count),
+            'same_srv_rate': same_srv,
+            'diff_srv_rate': round(1 - same_srv, 2),
+            'srv_count': float(srv_count),
+            'srv_serror_rate': _rate(srv_time.serror, srv_count),
+            'srv_rerror_rate': _rate(srv_time.rerror, srv_count),
+            'srv_diff_host_rate': round(1 - _rate(srv_time.keys[host], srv_count), 2),
+            'dst_host_count': float(dst_host_count),
+            'dst_host_same_srv_rate': dst_host_same_srv,
+            'dst_host_diff_srv_rate': round(1 - dst_host_same_srv, 2),
+            'dst_host_same_src_port_rate': same_src_port,
+            'dst_host_serror_rate': _rate(host_conn.serror, dst_host_count),
+            'dst_host_rerror_rate': _rate(host_conn.rerror, dst_host_count),
+            'dst_host_srv_count': float(dst_host_srv_count),
+            'dst_host_srv_diff_host_rate': round(1 - _rate(srv_conn.keys[host], dst_host_srv_count), 2),
+            'dst_host_srv_serror_rate': _rate(srv_conn.serror, dst_host_srv_count),
+            'dst_host_srv_rerror_rate': _rate(srv_conn.rerror, dst_host_srv_count),
+        }
+
+    def tracked_keys(self):
+        """Hosts/services currently holding window state (bounded by max_keys each)"""
+        return {'hosts': len(self._host_conn), 'services': len(self._srv_conn)}
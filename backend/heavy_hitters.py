@@ -0,0 +1,132 @@
+"""
+Heavy-hitter tracking (Space-Saving)
+Exact per-key counters grow without bound under spoofed floods. SpaceSaving
+keeps at most `capacity` counters: an unseen key replaces the current minimum
+and inherits its count as `error`. Every estimate is an upper bound and
+overestimates by at most `error` <= total / capacity, and any key with a true
+count above total / capacity is guaranteed to be tracked.
+
+Counters sit in buckets of equal count kept in a doubly linked list in
+ascending order (the Stream-Summary structure), so an update moves one key
+to the neighbouring bucket: O(1) per packet with no heap or sort.
+
+Summaries with the same capacity are mergeable (merge_top), which is how the
+per-lane sketches become one view.
+"""
+from collections import defaultdict
+
+
+class _Bucket:
+    __slots__ = ('count', 'keys', 'prev', 'next')
+
+    def __init__(self, count):
+        self.count = count
+        self.keys = set()
+        self.prev = None
+        self.next = None
+
+
+class SpaceSaving:
+    """Top-k frequent keys in fixed memory; not thread-safe (one per ingest lane)"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.total = 0
+        self._bucket_of = {}  # key -> _Bucket
+        self._error = {}  # key -> overestimate inherited on replacement
+        self._min = None  # bucket with the smallest count (list head)
+
+    def __len__(self):
+        return len(self._bucket_of)
+
+    def add(self, key):
+        self.total += 1
+        bucket = self._bucket_of.get(key)
+        if bucket is not None:
+            self._move_up(key, bucket)
+            return
+        if len(self._bucket_of) < self.capacity:
+            self._error[key] = 0
+            head = self._min
+            if head is not None and head.count == 1:
+                target = head
+            else:
+                target = _Bucket(1)
+                target.next = head
+                if head is not None:
+                    head.prev = target
+                self._min = target
+            target.keys.add(key)
+            self._bucket_of[key] = target
+            return
+        # Replace a key with the minimum count; the newcomer inherits it as error
+        head = self._min
+        victim = head.keys.pop()
+        del self._bucket_of[victim]
+        del self._error[victim]
+        head.keys.add(key)
+        self._bucket_of[key] = head
+        self._error[key] = head.count
+        self._move_up(key, head)
+
+    def _move_up(self, key, bucket):
+        count = bucket.count + 1
+        following = bucket.next
+        if following is not None and following.count == count:
+            target = following
+        else:
+            target = _Bucket(count)
+            target.prev = bucket
+            target.next = following
+            if following is not None:
+                following.prev = target
+            bucket.next = target
+        bucket.keys.discard(key)
+        target.keys.add(key)
+        self._bucket_of[key] = target
+        if not bucket.keys:
+            self._unlink(bucket)
+
+    def _unlink(self, bucket):
+        if bucket.prev is not None:
+            bucket.prev.next = bucket.next
+        else:
+            self._min = bucket.next
+        if bucket.next is not None:
+            bucket.next.prev = bucket.prev
+
+    def min_count(self):
+        """Count any untracked key may have had (0 until the summary is full)"""
+        if len(self._bucket_of) < self.capacity or self._min is None:
+            return 0
+        return self._min.count
+
+    def counts(self):
+        """{key: (estimated count, error)} for every tracked key"""
+        error = self._error
+        return {key: (bucket.count, error.get(key, 0))
+                for key, bucket in list(self._bucket_of.items())}
+
+
+def merge_top(summaries, k):
+    """
+    Top k of several SpaceSaving summaries as [(key, count, error)], largest first
+
+    A key missing from a full summary may still have occurred there up to that
+    summary's min_count times, which is added to both its count and its error.
+    """
+    snapshots = [(summary.counts(), summary.min_count()) for summary in summaries]
+    merged = defaultdict(lambda: [0, 0])
+    for counts, _ in snapshots:
+        for key, (count, error) in counts.items():
+            entry = merged[key]
+            entry[0] += count
+            entry[1] += error
+    for counts, floor in snapshots:
+        if floor:
+            for key, entry in merged.items():
+                if key not in counts:
+                    entry[0] += floor
+                    entry[1] += floor
+    top = sorted(merged.items(), key=lambda item: item[1][0], reverse=True)[:k]
+    return [(key, count, error) for key, (count, error) in top]
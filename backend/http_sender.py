@@ -0,0 +1,117 @@
+"""
+Pooled, concurrent HTTP packet sender
+Shared by local_sender.py and demo_dataset_runner.py so HTTP-mode replay
+reuses keep-alive connections instead of opening one TCP connection per packet
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+INJECT_URL = "http://localhost:5000/api/inject-packet"
+BATCH_URL = "http://localhost:5000/api/inject-batch"
+
+
+class HttpSender:
+    """
+    Sends packets to the backend from a thread pool
+
+    Each worker thread keeps its own requests.Session (keep-alive pool). With
+    batch_size > 1 packets are grouped and POSTed to the batch endpoint.
+    submit() never blocks for the response; it only waits when more than
+    `max_pending` requests are already in flight.
+    """
+
+    def __init__(self, url=INJECT_URL, concurrency=8, batch_size=1, batch_url=BATCH_URL,
+                 timeout=5, max_pending=None):
+        self.url = url
+        self.batch_url = batch_url
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='http-sender')
+        self._local = threading.local()
+        self._pending = threading.BoundedSemaphore(max_pending or concurrency * 4)
+        self._batch = []
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.requests = 0
+        self.errors = {}
+        self.started = time.perf_counter()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+            session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+            self._local.session = session
+        return session
+
+    def _record_error(self, key, count):
+        with self._lock:
+            self.failed += count
+            self.errors[key] = self.errors.get(key, 0) + count
+
+    def _post(self, url, body, count):
+        try:
+            response = self._session().post(url, json=body, timeout=self.timeout)
+            if response.status_code == 200:
+                with self._lock:
+                    self.sent += count
+                    self.requests += 1
+            else:
+                self._record_error(f"HTTP {response.status_code}", count)
+        except requests.exceptions.ConnectionError:
+            self._record_error('connection', count)
+        except requests.exceptions.Timeout:
+            self._record_error('timeout', count)
+        except Exception as e:
+            self._record_error(type(e).__name__, count)
+        finally:
+            self._pending.release()
+
+    def _dispatch(self, url, body, count):
+        self._pending.acquire()
+        self._pool.submit(self._post, url, body, count)
+
+    def submit(self, packet):
+        """Queue one packet for sending; returns True once accepted"""
+        if self.batch_size == 1:
+            self._dispatch(self.url, packet, 1)
+            return True
+        with self._lock:
+            self._batch.append(packet)
+            if len(self._batch) < self.batch_size:
+                return True
+            batch, self._batch = self._batch, []
+        self._dispatch(self.batch_url, batch, len(batch))
+        return True
+
+    def flush(self):
+        """Send any partially filled batch"""
+        with self._lock:
+            batch, self._batch = self._batch, []
+        if batch:
+            self._dispatch(self.batch_url, batch, len(batch))
+
+    def close(self):
+        """Flush, wait for every in-flight request and return the final stats"""
+        self.flush()
+        self._pool.shutdown(wait=True)
+        return self.stats()
+
+    def stats(self):
+        """Counts and throughput so far"""
+        elapsed = time.perf_counter() - self.started
+        with self._lock:
+            return {
+                'sent': self.sent,
+                'failed': self.failed,
+                'requests': self.requests,
+                'errors': dict(self.errors),
+                'elapsed_s': round(elapsed, 3),
+                'packets_per_sec': round(self.sent / elapsed, 1) if elapsed else 0.0,
+            }
@@ -0,0 +1,185 @@
+"""
+Incident aggregation
+A flood produces thousands of identical detections. Attacks are folded into
+incidents keyed by (src_ip, dst_ip, attack_type): each detection updates the
+count, last seen time, per-second rate and peak rate of its incident in O(1).
+An incident closes after INCIDENT_WINDOW seconds without a new detection.
+
+Socket.IO events scale with time, not packets: every INCIDENT_UPDATE_INTERVAL
+at most one of each is sent, each a list of incidents
+    incident_open    incidents first seen since the last interval
+    incident_update  incidents that changed
+    incident_close   incidents that went idle, or were evicted past INCIDENT_MAX_OPEN
+                     (at most the last INCIDENT_MAX_OPEN evictions per event)
+An incident that opens and closes within one interval only appears in incident_close.
+
+Only the detection that opens an incident becomes a network_logs event and a
+recent_attacks entry; later ones are folded into the incident (observe()
+returns False) and reach dashboards through incident_update.
+
+In a shared-subscription group each instance tracks the incidents of the
+packets it received.
+"""
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+
+import metrics
+from config import INCIDENT_HISTORY, INCIDENT_MAX_OPEN, INCIDENT_UPDATE_INTERVAL, INCIDENT_WINDOW
+
+
+class Incident:
+    __slots__ = ('id', 'src_ip', 'dst_ip', 'attack_type', 'category', 'first_seen', 'last_seen',
+                 'count', 'max_confidence', 'rate_second', 'rate_count', 'peak_rate', 'closed')
+
+    def __init__(self, incident_id, record, now):
+        self.id = incident_id
+        self.src_ip = record.src_ip
+        self.dst_ip = record.dst_ip
+        self.attack_type = record.attack_type
+        self.category = record.category
+        self.first_seen = now
+        self.last_seen = now
+        self.count = 0
+        self.max_confidence = 0.0
+        self.rate_second = int(now)  # current 1-second bucket...
+        self.rate_count = 0  # ...and detections in it
+        self.peak_rate = 0
+        self.closed = False
+
+    def add(self, confidence, now):
+        self.count += 1
+        self.last_seen = now
+        if confidence > self.max_confidence:
+            self.max_confidence = confidence
+        second = int(now)
+        if second != self.rate_second:
+            self.rate_second = second
+            self.rate_count = 0
+        self.rate_count += 1
+        if self.rate_count > self.peak_rate:
+            self.peak_rate = self.rate_count
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': 'closed' if self.closed else 'open',
+            'src_ip': self.src_ip,
+            'dst_ip': self.dst_ip,
+            'attack_type': self.attack_type,
+            'attack_category': self.category,
+            'count': self.count,
+            'first_seen': datetime.fromtimestamp(self.first_seen).isoformat(),
+            'last_seen': datetime.fromtimestamp(self.last_seen).isoformat(),
+            'duration_s': round(self.last_seen - self.first_seen, 3),
+            'peak_rate': self.peak_rate,
+            'max_confidence': self.max_confidence,
+        }
+
+
+class IncidentTracker:
+    """Open incidents (least recently seen first) plus a bounded history of closed ones"""
+
+    def __init__(self, window=INCIDENT_WINDOW, update_interval=INCIDENT_UPDATE_INTERVAL,
+                 max_open=INCIDENT_MAX_OPEN, history=INCIDENT_HISTORY):
+        self.window = window
+        self.update_interval = update_interval
+        self.max_open = max_open
+        self._lock = threading.Lock()
+        self._open = OrderedDict()  # key -> Incident, ordered by last_seen
+        self._dirty = {}  # key -> Incident changed since the last update event
+        self._opened = {}  # key -> Incident opened since the last sweep
+        self._evicted = deque(maxlen=max_open)  # Incidents evicted since the last sweep
+        self._closed = deque(maxlen=history)
+        self._ids = itertools.count(1)
+        self._stop = threading.Event()
+
+    def observe(self, record, now=None):
+        """
+        Fold one attack DetectionRecord into its incident (events go out from sweep())
+
+        Returns True if the record opened a new incident, False if an open one absorbed it.
+        """
+        now = time.time() if now is None else now
+        key = (record.src_ip, record.dst_ip, record.attack_type)
+        with self._lock:
+            incident = self._open.get(key)
+            if incident is None:
+                incident = self._open[key] = self._opened[key] = Incident(next(self._ids), record, now)
+                incident.add(record.confidence, now)
+                if len(self._open) > self.max_open:
+                    self._evicted.append(self._close(*self._open.popitem(last=False)))
+                return True
+            self._open.move_to_end(key)
+            incident.add(record.confidence, now)
+            if key not in self._opened:
+                self._dirty[key] = incident
+            return False
+
+    def _close(self, key, incident):
+        # Caller holds the lock
+        incident.closed = True
+        self._dirty.pop(key, None)
+        self._opened.pop(key, None)
+        self._closed.appendleft(incident)
+        return incident
+
+    def sweep(self, socketio, now=None):
+        """Emit the batched incident_open, incident_update and incident_close events"""
+        now = time.time() if now is None else now
+        cutoff = now - self.window
+        with self._lock:
+            closed = list(self._evicted)
+            self._evicted.clear()
+            while self._open:
+                key, incident = next(iter(self._open.items()))
+                if incident.last_seen >= cutoff:
+                    break
+                del self._open[key]
+                closed.append(self._close(key, incident))
+            opened = [incident.to_dict() for incident in self._opened.values()]
+            updated = [incident.to_dict() for incident in self._dirty.values()]
+            closed = [incident.to_dict() for incident in closed]
+            self._opened.clear()
+            self._dirty.clear()
+        if opened:
+            socketio.emit('incident_open', opened)
+            metrics.INCIDENTS_OPENED.inc(len(opened))
+        if updated:
+            socketio.emit('incident_update', updated)
+            metrics.INCIDENTS_UPDATED.inc(len(updated))
+        if closed:
+            socketio.emit('incident_close', closed)
+            metrics.INCIDENTS_CLOSED.inc(len(closed))
+
+    def start(self, socketio):
+        """sweep() every update_interval seconds on a daemon thread"""
+        def run():
+            while not self._stop.wait(self.update_interval):
+                self.sweep(socketio)
+        threading.Thread(target=run, name='incident-sweeper', daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self, status='all', limit=None):
+        """Incidents for the API: open ones (most recently seen first), then closed ones"""
+        with self._lock:
+            rows = []
+            if status in ('all', 'open'):
+                rows.extend(incident.to_dict() for incident in reversed(self._open.values()))
+            if status in ('all', 'closed'):
+                rows.extend(incident.to_dict() for incident in self._closed)
+            open_count = len(self._open)
+        return {'open_count': open_count, 'incidents': rows[:limit] if limit else rows}
+
+    def reset(self):
+        with self._lock:
+            self._open.clear()
+            self._dirty.clear()
+            self._opened.clear()
+            self._evicted.clear()
+            self._closed.clear()
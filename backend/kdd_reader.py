@@ -0,0 +1,92 @@
+"""
+Streaming KDD dataset reader
+Yields typed DataFrame chunks with constant memory, so senders can start on
+multi-GB files (full KDD'99, our own captures) within milliseconds and
+--limit/--offset never load the whole file
+"""
+import itertools
+
+import pandas as pd
+
+KDD_COLUMNS = [
+    'duration','protocol_type','service','flag','src_bytes','dst_bytes','land',
+    'wrong_fragment','urgent','hot','num_failed_logins','logged_in',
+    'num_compromised','root_shell','su_attempted','num_root',
+    'num_file_creations','num_shells','num_access_files','num_outbound_cmds',
+    'is_host_login','is_guest_login','count','srv_count','serror_rate',
+    'srv_serror_rate','rerror_rate','srv_rerror_rate','same_srv_rate',
+    'diff_srv_rate','srv_diff_host_rate','dst_host_count','dst_host_srv_count',
+    'dst_host_same_srv_rate','dst_host_diff_srv_rate',
+    'dst_host_same_src_port_rate','dst_host_srv_diff_host_rate',
+    'dst_host_serror_rate','dst_host_srv_serror_rate',
+    'dst_host_rerror_rate','dst_host_srv_rerror_rate','label','difficulty'
+]
+
+CATEGORICAL_COLUMNS = ['protocol_type', 'service', 'flag', 'label']
+
+# Explicit dtypes skip pandas' type inference and keep chunks consistent
+KDD_DTYPES = {
+    col: (str if col in CATEGORICAL_COLUMNS else 'float64')
+    for col in KDD_COLUMNS
+}
+KDD_DTYPES['difficulty'] = 'float64'
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def iter_kdd_chunks(filepath, chunksize=DEFAULT_CHUNK_SIZE, offset=0, limit=None, usecols=None,
+                    shard=None):
+    """
+    Stream a KDD-format CSV as typed DataFrame chunks
+
+    Args:
+        filepath: Comma-separated KDD file (no header; NSL-KDD 'difficulty' column optional)
+        chunksize: Rows per chunk (memory use is proportional to this, not the file)
+        offset: Rows to skip from the start of the file (skipped lines are not parsed)
+        limit: Maximum rows to yield in total
+        usecols: Optional subset of KDD_COLUMNS to parse
+        shard: Optional (index, count); keep only rows where row_number % count == index
+
+    Yields:
+        DataFrames with at most `chunksize` rows; the index is the global row number
+    """
+    reader = pd.read_csv(
+        filepath,
+        header=None,
+        names=KDD_COLUMNS,
+        dtype=KDD_DTYPES,
+        usecols=usecols,
+        skiprows=offset or None,
+        nrows=limit,
+        chunksize=chunksize,
+    )
+    with reader:
+        for chunk in reader:
+            chunk.index += offset
+            if shard is not None:
+                chunk = chunk[chunk.index % shard[1] == shard[0]]
+                if not len(chunk):
+                    continue
+            if 'label' in chunk.columns:
+                # Original KDD'99 labels end with '.', NSL-KDD ones don't
+                chunk = chunk.assign(label=chunk['label'].str.rstrip('.'))
+            yield chunk
+
+
+def cycle_kdd_chunks(filepath, **kwargs):
+    """Stream the file over and over (for duration-based load tests)"""
+    for _ in itertools.count():
+        empty = True
+        for chunk in iter_kdd_chunks(filepath, **kwargs):
+            empty = False
+            yield chunk
+        if empty:
+            return
+
+
+def read_kdd(filepath, offset=0, limit=None, usecols=None):
+    """Whole (offset/limited) selection as one DataFrame, for callers that need random access"""
+    chunks = list(iter_kdd_chunks(filepath, offset=offset, limit=limit, usecols=usecols))
+    if not chunks:
+        return pd.DataFrame(columns=usecols or KDD_COLUMNS)
+    return pd.concat(chunks)
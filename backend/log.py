@@ -0,0 +1,133 @@
+"""
+Non-blocking structured logging
+Records are queued on the calling thread and formatted/written by a background
+listener thread, so the packet hot path never does stdout I/O
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+import metrics
+from config import (
+    LOG_LEVEL, LOG_FORMAT, LOG_JSON, LOG_QUEUE_SIZE,
+    LOG_PACKET_SAMPLE_RATE, LOG_ERROR_BURST, LOG_ERROR_INTERVAL,
+)
+
+LOG_RECORDS_DROPPED = metrics.Counter('ids_log_records_dropped_total',
+                                      'Log records dropped because the log queue was full')
+
+_configure_lock = threading.Lock()
+_listener = None
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never formats or blocks on the caller's thread"""
+
+    def prepare(self, record):
+        # Formatting is deferred to the listener thread; callers pass plain values
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+class StructuredFormatter(logging.Formatter):
+    """LOG_FORMAT text with the record's structured fields appended as key=value"""
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' | ' + ' '.join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _configure():
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JsonFormatter() if LOG_JSON else StructuredFormatter(LOG_FORMAT))
+
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        root = logging.getLogger('ids')
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(_NonBlockingQueueHandler(log_queue))
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+def get_logger(name):
+    """Logger under the 'ids' hierarchy, backed by the shared async queue"""
+    _configure()
+    return logging.getLogger(f'ids.{name}')
+
+
+class PacketSampler:
+    """Deterministic 1-in-N sampling for per-packet log lines"""
+
+    def __init__(self, rate=LOG_PACKET_SAMPLE_RATE):
+        self.every = int(round(1 / rate)) if rate > 0 else 0
+        self._seen = 0
+
+    def should_log(self):
+        if not self.every:
+            return False
+        self._seen += 1
+        return self._seen % self.every == 0
+
+
+class ErrorRateLimiter:
+    """At most `burst` error records per key per `interval` seconds; the rest are counted"""
+
+    def __init__(self, logger, burst=LOG_ERROR_BURST, interval=LOG_ERROR_INTERVAL):
+        self.logger = logger
+        self.burst = burst
+        self.interval = interval
+        self._windows = {}  # key -> [window_start, logged, suppressed]
+        self._lock = threading.Lock()
+
+    def error(self, key, msg, **fields):
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                if window is not None and window[2]:
+                    self.logger.warning("Suppressed repeated errors",
+                                        extra={'fields': {'key': key, 'suppressed': window[2]}})
+                window = self._windows[key] = [now, 0, 0]
+            if window[1] >= self.burst:
+                window[2] += 1
+                return
+            window[1] += 1
+        self.logger.error(msg, extra={'fields': fields})
@@ -0,0 +1,199 @@
+"""
+Lightweight in-process metrics for the packet hot path
+Counters and fixed-bucket latency histograms, rendered in the Prometheus
+text exposition format by the /metrics endpoint
+"""
+import threading
+from bisect import bisect_left
+
+# Upper bounds (seconds) for stage latency buckets: 10µs .. 1s
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0,
+)
+
+_registry = []
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = [f'{n}="{v}"' for n, v in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        _registry.append(self)
+
+    def labels(self, *values):
+        """Child metric for one combination of label values (cached)"""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(child.render(self.name, self.labelnames, values))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def render(self, name, labelnames, values):
+        return [f"{name}{_format_labels(labelnames, values)} {self.value}"]
+
+
+class _GaugeChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def render(self, name, labelnames, values):
+        return [f"{name}{_format_labels(labelnames, values)} {self.value}"]
+
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def render(self, name, labelnames, values):
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += bucket_count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            labels = _format_labels(labelnames, values, 'le="%s"' % le)
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        labels = _format_labels(labelnames, values)
+        lines.append(f"{name}_sum{labels} {self.sum}")
+        lines.append(f"{name}_count{labels} {self.count}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic counter, optionally labelled"""
+    type_name = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._children[()].inc(amount)
+
+
+class Gauge(_Metric):
+    """Last-value gauge, optionally labelled"""
+    type_name = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self._children[()].set(value)
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram, optionally labelled"""
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._children[()].observe(value)
+
+
+def render_metrics():
+    """All registered metrics in Prometheus text format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# Hot-path metrics
+PACKETS_IN = Counter('ids_packets_in_total', 'Packets received (MQTT or HTTP injection)')
+PACKETS_SHED = Counter('ids_packets_shed_total', 'Obviously-normal packets skipped by load shedding')
+ENVELOPES_IN = Counter('ids_envelopes_in_total', 'Batched MQTT envelopes received')
+PACKETS_CLASSIFIED = Counter('ids_packets_classified_total', 'Packets classified', ['result'])
+ERRORS = Counter('ids_errors_total', 'Packets dropped because of an error', ['stage'])
+HEURISTIC_FALLBACKS = Counter('ids_heuristic_fallbacks_total',
+                              'Classifications served by the heuristic fallback', ['reason'])
+INGEST_QUEUE_DEPTH = Gauge('ids_ingest_queue_depth', 'Batches waiting per ingest lane', ['lane'])
+NETWORK_LOGS = Counter('ids_network_logs_total',
+                       'network_logs events by outcome (sent to >=1 room, no subscriber wanted it, '
+                       'or an attack folded into an open incident)',
+                       ['result'])
+STATS_EVENTS = Counter('ids_stats_events_total', 'Dashboard stats events sent', ['kind'])
+INCIDENT_EVENTS = Counter('ids_incident_events_total',
+                          'Incidents opened, updated (per event entry) and closed', ['kind'])
+FEATURE_DRIFT_PSI = Gauge('ids_feature_drift_psi',
+                          'Population stability index of live traffic vs the training profile',
+                          ['feature'])
+DRIFT_ALERTS = Counter('ids_drift_alerts_total', 'Features that crossed the drift threshold')
+STAGE_SECONDS = Histogram('ids_stage_seconds', 'Time spent per hot-path stage', ['stage'])
+
+# Pre-bind children so the hot path does a plain attribute call
+DECODE_SECONDS = STAGE_SECONDS.labels('decode')
+FEATURES_SECONDS = STAGE_SECONDS.labels('features')
+WINDOW_FEATURES_SECONDS = STAGE_SECONDS.labels('window_features')
+PREDICT_SECONDS = STAGE_SECONDS.labels('predict')
+PREDICT_BATCH_SECONDS = STAGE_SECONDS.labels('predict_batch')
+STATS_SECONDS = STAGE_SECONDS.labels('stats')
+EMIT_SECONDS = STAGE_SECONDS.labels('emit')
+TOTAL_SECONDS = STAGE_SECONDS.labels('total')
+ATTACKS_CLASSIFIED = PACKETS_CLASSIFIED.labels('attack')
+NORMAL_CLASSIFIED = PACKETS_CLASSIFIED.labels('normal')
+LOGS_EMITTED = NETWORK_LOGS.labels('sent')
+LOGS_SUPPRESSED = NETWORK_LOGS.labels('suppressed')
+LOGS_FOLDED = NETWORK_LOGS.labels('folded')
+STATS_DELTAS = STATS_EVENTS.labels('delta')
+STATS_SNAPSHOTS = STATS_EVENTS.labels('snapshot')
+INCIDENTS_OPENED = INCIDENT_EVENTS.labels('open')
+INCIDENTS_UPDATED = INCIDENT_EVENTS.labels('update')
+INCIDENTS_CLOSED = INCIDENT_EVENTS.labels('close')
+DECODE_ERRORS = ERRORS.labels('decode')
+PROCESS_ERRORS = ERRORS.labels('process')
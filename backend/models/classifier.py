@@ -7,14 +7,22 @@ import numpy as np
 import pandas as pd
 import os
 import warnings
+import metrics
+from config import ATTACK_CATEGORIES, DETECTION_RULES, RULE_DEFAULT
+from log import get_logger, ErrorRateLimiter
+from models.rules import RuleEngine
 
 warnings.filterwarnings('ignore')
 
+error_limiter = ErrorRateLimiter(get_logger('classifier'))
+
 class IDSClassifier:
     """Intrusion Detection System Classifier using trained Random Forest Pipeline"""
     
-    def __init__(self, model_path=None, label_encoder_path=None, selected_features_path=None):
+    def __init__(self, model_path=None, label_encoder_path=None, selected_features_path=None,
+                 rules=DETECTION_RULES, rule_default=RULE_DEFAULT):
         self.model = None
+        self.rules = RuleEngine(rules, rule_default)
         self.label_encoder = None
         self.selected_features = None
         
@@ -29,48 +37,10 @@ class IDSClassifier:
             'dst_host_rerror_rate'
         ]
         
-        # Map attack labels to categories
-        self.attack_categories = {
-            'normal': 'normal',
-            'back': 'DoS',
-            'land': 'DoS',
-            'neptune': 'DoS',
-            'pod': 'DoS',
-            'smurf': 'DoS',
-            'teardrop': 'DoS',
-            'mailbomb': 'DoS',
-            'apache2': 'DoS',
-            'processtable': 'DoS',
-            'udpstorm': 'DoS',
-            'satan': 'Probe',
-            'ipsweep': 'Probe',
-            'nmap': 'Probe',
-            'portsweep': 'Probe',
-            'mscan': 'Probe',
-            'saint': 'Probe',
-            'guess_passwd': 'R2L',
-            'ftp_write': 'R2L',
-            'imap': 'R2L',
-            'phf': 'R2L',
-            'multihop': 'R2L',
-            'warezmaster': 'R2L',
-            'warezclient': 'R2L',
-            'spy': 'R2L',
-            'xlock': 'R2L',
-            'xsnoop': 'R2L',
-            'snmpguess': 'R2L',
-            'snmpgetattack': 'R2L',
-            'httptunnel': 'R2L',
-            'sendmail': 'R2L',
-            'named': 'R2L',
-            'shellcode': 'U2R',
-            'loadmodule': 'U2R',
-            'perl': 'U2R',
-            'rootkit': 'U2R',
-            'buffer_overflow': 'U2R',
-            'xterm': 'U2R',
-            'ps': 'U2R',
-        }
+        # Map attack labels to categories (config.ATTACK_CATEGORIES is the single source)
+        self.attack_categories = {'normal': 'normal'}
+        for category, labels in ATTACK_CATEGORIES.items():
+            self.attack_categories.update(dict.fromkeys(labels, category))
         
         # Try to load pre-trained models
         if model_path and os.path.exists(model_path):
@@ -92,7 +62,7 @@ class IDSClassifier:
                 self.load_model(model_path, label_encoder_path, selected_features_path)
                 return
         
-        print("⚠️  No pre-trained model found. Using heuristic classification.")
+        print("⚠️  No pre-trained model found. Using detection rules (config.DETECTION_RULES).")
     
     def load_model(self, model_path, label_encoder_path=None, selected_features_path=None):
         """Load pre-trained model and related files"""
@@ -110,12 +80,12 @@ class IDSClassifier:
             
         except Exception as e:
             print(f"⚠️  Error loading model: {e}")
-            print(f"Will use heuristic classification as fallback")
+            print(f"Will use detection rules as fallback")
             self.model = None
     
     def classify_packet(self, features_dict):
         """
-        Classify a packet using trained model or heuristics
+        Classify a packet using trained model or detection rules
         
         Args:
             features_dict: Dictionary with packet features
@@ -127,19 +97,88 @@ class IDSClassifier:
             if self.model is not None:
                 return self._ml_classify(features_dict)
             else:
-                return self._heuristic_classify(features_dict)
+                metrics.HEURISTIC_FALLBACKS.labels('no_model').inc()
+                return self._rule_classify(features_dict)
         except Exception as e:
-            print(f"Classification error: {e}")
-            return self._heuristic_classify(features_dict)
+            error_limiter.error('classify', "Classification error, using detection rules", error=repr(e))
+            metrics.HEURISTIC_FALLBACKS.labels('error').inc()
+            return self._rule_classify(features_dict)
+    
+    def classify_batch(self, features_list):
+        """
+        Classify many packets with a single model call
+        
+        Args:
+            features_list: List of feature dictionaries
+            
+        Returns:
+            List of classification result dictionaries (same order as input)
+        """
+        if not features_list:
+            return []
+        try:
+            if self.model is not None:
+                return self._ml_classify_batch(features_list)
+            else:
+                metrics.HEURISTIC_FALLBACKS.labels('no_model').inc(len(features_list))
+                return self._rule_classify_batch(features_list)
+        except Exception as e:
+            error_limiter.error('classify_batch', "Batch classification error, using detection rules",
+                                error=repr(e), batch_size=len(features_list))
+            metrics.HEURISTIC_FALLBACKS.labels('error').inc(len(features_list))
+            return self._rule_classify_batch(features_list)
+    
+    def _feature_columns(self):
+        """Feature columns expected by the loaded pipeline"""
+        if self.selected_features:
+            return self.selected_features
+        return self.selected_features_list
+    
+    def classify_frame(self, df):
+        """
+        Classify a DataFrame of feature columns in one vectorized pass (bulk scoring)
+        
+        Unlike classify_batch there is no silent fallback: if the model fails the
+        error propagates, so offline audits never mix model and rule output.
+        
+        Returns:
+            (attack_types, confidences) arrays in row order
+        """
+        if self.model is not None:
+            return self._ml_predict(df.reindex(columns=self._feature_columns(), fill_value=0))
+        return self.rules.classify_columns(self.rules.frame_columns(df), len(df))
+    
+    def _ml_predict(self, df_batch):
+        """(attack_types, confidences) arrays from one predict_proba call"""
+        probabilities = self.model.predict_proba(df_batch)
+        best = probabilities.argmax(axis=1)
+        confidences = np.round(probabilities[np.arange(len(best)), best] * 100, 2)
+        predictions = self.model.classes_[best]
+        
+        if self.label_encoder:
+            predictions = self.label_encoder.inverse_transform(predictions)
+        return predictions.astype(str).astype(object), confidences
+    
+    def _ml_classify_batch(self, features_list):
+        """Vectorized ML classification: one predict_proba call for the whole batch"""
+        feature_cols = self._feature_columns()
+        df_batch = pd.DataFrame.from_records(features_list, columns=feature_cols).fillna(0)
+        attack_types, confidences = self._ml_predict(df_batch)
+        
+        return [
+            {
+                'attack_type': attack_type,
+                'confidence': float(confidence),
+                'category': self.attack_categories.get(attack_type, 'Unknown')
+            }
+            for attack_type, confidence in zip(attack_types, confidences)
+        ]
     
     def _ml_classify(self, features_dict):
         """Classify using trained ML model pipeline"""
         try:
             # Get selected features - determine dynamically if we have them
-            if self.selected_features:
-                feature_cols = self.selected_features
-            else:
-                feature_cols = self.selected_features_list
+            feature_cols = self._feature_columns()
             
             # Create a DataFrame with the required columns
             # Fill missing columns with default values
@@ -170,40 +209,41 @@ class IDSClassifier:
                 'category': self.attack_categories.get(attack_type, 'Unknown')
             }
         except Exception as e:
-            print(f"ML classification failed: {e}, using heuristics")
-            return self._heuristic_classify(features_dict)
+            error_limiter.error('ml_classify', "ML classification failed, using detection rules",
+                                error=repr(e))
+            metrics.HEURISTIC_FALLBACKS.labels('error').inc()
+            return self._rule_classify(features_dict)
     
-    def _heuristic_classify(self, features_dict):
-        """Heuristic-based classification for fallback"""
-        src_bytes = features_dict.get('src_bytes', 0)
-        dst_bytes = features_dict.get('dst_bytes', 0)
-        count = features_dict.get('count', 0)
-        srv_count = features_dict.get('srv_count', 0)
-        serror_rate = features_dict.get('serror_rate', 0)
-        
-        attack_type = 'normal'
-        confidence = 95
-        
-        # DoS detection
-        if count > 10 and serror_rate > 0.5:
-            attack_type = 'neptune'
-            confidence = 85
-        
-        # Port scan detection
-        elif srv_count > 30 and src_bytes < 100:
-            attack_type = 'mscan'
-            confidence = 80
-        
-        # R2L detection
-        elif dst_bytes > src_bytes * 5 and count < 5:
-            attack_type = 'httptunnel'
-            confidence = 75
-        
+    def is_suspicious(self, features_dict):
+        """Cheap pre-filter used by load shedding: False only when no detection rule fires"""
+        return self.rules.classify(features_dict)[0] != self.rules.default_type
+    
+    def suspicious_batch(self, features_list):
+        """is_suspicious() for many packets as one NumPy mask evaluation"""
+        columns = self.rules.columns(features_list)
+        return self.rules.suspicious_mask(columns, len(features_list))
+    
+    def _rule_classify(self, features_dict):
+        """Classification by the configured detection rules (model fallback)"""
+        attack_type, confidence = self.rules.classify(features_dict)
         return {
             'attack_type': attack_type,
             'confidence': confidence,
             'category': self.attack_categories.get(attack_type, 'Unknown')
         }
+    
+    def _rule_classify_batch(self, features_list):
+        """Detection rules over a whole batch, evaluated as NumPy masks"""
+        columns = self.rules.columns(features_list)
+        attack_types, confidences = self.rules.classify_columns(columns, len(features_list))
+        return [
+            {
+                'attack_type': attack_type,
+                'confidence': float(confidence),
+                'category': self.attack_categories.get(attack_type, 'Unknown')
+            }
+            for attack_type, confidence in zip(attack_types.tolist(), confidences.tolist())
+        ]
 
 # Global classifier instance
 _classifier = None
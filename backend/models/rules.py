@@ -0,0 +1,154 @@
+"""
+Vectorized detection rules
+Rules are declared in config.DETECTION_RULES and compiled once. Each rule is
+a conjunction of conditions on model features; rules are tried in priority
+order (lowest number first) and the first match decides the attack type and
+confidence. No match gives config.RULE_DEFAULT (normal traffic).
+
+A condition is (feature, op, operand) with op one of > >= < <= == != in not_in.
+The operand is a constant, a list (for in / not_in), or (other_feature, scale)
+to compare against another feature, e.g. ('dst_bytes', '>', ('src_bytes', 5)).
+
+The same compiled conditions run on one feature dict (classify) or on whole
+columns as NumPy boolean masks (classify_columns), which evaluates millions of
+rows per second and serves as the model fallback and the load-shedding
+pre-filter.
+"""
+import operator
+
+import numpy as np
+
+_COMPARISONS = {
+    '>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le,
+    '==': operator.eq, '!=': operator.ne,
+}
+_MEMBERSHIP = ('in', 'not_in')
+SYMBOLIC_FEATURES = ('protocol_type', 'service', 'flag')
+
+
+class _Condition:
+    __slots__ = ('feature', 'op', 'operand', 'other', 'scale')
+
+    def __init__(self, feature, op, operand):
+        if op not in _COMPARISONS and op not in _MEMBERSHIP:
+            raise ValueError(f"Unknown rule operator {op!r} "
+                             f"(use {', '.join([*_COMPARISONS, *_MEMBERSHIP])})")
+        self.feature = feature
+        self.op = op
+        self.other = None
+        self.scale = 1
+        if op in _MEMBERSHIP:
+            self.operand = frozenset(operand)
+        elif isinstance(operand, (tuple, list)):
+            self.other, self.scale = operand
+            self.operand = None
+        else:
+            self.operand = operand
+
+    def features(self):
+        return (self.feature,) if self.other is None else (self.feature, self.other)
+
+    def test(self, row):
+        value = row.get(self.feature, 0)
+        if self.op == 'in':
+            return value in self.operand
+        if self.op == 'not_in':
+            return value not in self.operand
+        operand = self.operand if self.other is None else row.get(self.other, 0) * self.scale
+        return _COMPARISONS[self.op](value, operand)
+
+    def mask(self, columns):
+        values = columns[self.feature]
+        if self.op in _MEMBERSHIP:
+            mask = np.isin(values, list(self.operand))
+            return mask if self.op == 'in' else ~mask
+        operand = self.operand if self.other is None else columns[self.other] * self.scale
+        return _COMPARISONS[self.op](values, operand)
+
+
+class Rule:
+    __slots__ = ('name', 'attack_type', 'confidence', 'priority', 'conditions')
+
+    def __init__(self, name, attack_type, confidence, when, priority=100):
+        self.name = name
+        self.attack_type = attack_type
+        self.confidence = confidence
+        self.priority = priority
+        self.conditions = [_Condition(*condition) for condition in when]
+        if not self.conditions:
+            raise ValueError(f"Rule {name!r} has no conditions")
+
+    def test(self, row):
+        return all(condition.test(row) for condition in self.conditions)
+
+    def mask(self, columns):
+        conditions = iter(self.conditions)
+        mask = next(conditions).mask(columns)
+        for condition in conditions:
+            mask = mask & condition.mask(columns)
+        return mask
+
+
+class RuleEngine:
+    """Compiled rule set; rows as feature dicts or as columns (name -> 1-D array)"""
+
+    def __init__(self, rules, default):
+        self.rules = sorted((Rule(**rule) for rule in rules), key=lambda rule: rule.priority)
+        self.default_type = default['attack_type']
+        self.default_confidence = default['confidence']
+        self.features = sorted({feature for rule in self.rules
+                                for condition in rule.conditions for feature in condition.features()})
+        # Outcome i is rule i; the last one is the default
+        self.attack_types = np.array([rule.attack_type for rule in self.rules] + [self.default_type],
+                                     dtype=object)
+        self.confidences = np.array([rule.confidence for rule in self.rules] + [self.default_confidence],
+                                    dtype=float)
+
+    def classify(self, row):
+        """(attack_type, confidence) for one feature dict"""
+        for rule in self.rules:
+            if rule.test(row):
+                return rule.attack_type, rule.confidence
+        return self.default_type, self.default_confidence
+
+    def columns(self, rows):
+        """Columns for the features the rules reference, built from feature dicts"""
+        columns = {}
+        for feature in self.features:
+            if feature in SYMBOLIC_FEATURES:
+                columns[feature] = np.array([row.get(feature, '') for row in rows], dtype=object)
+            else:
+                columns[feature] = np.fromiter((row.get(feature, 0) for row in rows),
+                                               dtype=float, count=len(rows))
+        return columns
+
+    def frame_columns(self, df):
+        """Columns for the features the rules reference, taken from a DataFrame"""
+        columns = {}
+        for feature in self.features:
+            if feature in SYMBOLIC_FEATURES:
+                columns[feature] = (df[feature].to_numpy(dtype=object) if feature in df.columns
+                                    else np.full(len(df), '', dtype=object))
+            else:
+                columns[feature] = (df[feature].to_numpy(dtype=float) if feature in df.columns
+                                    else np.zeros(len(df)))
+        return columns
+
+    def match_index(self, columns, size=None):
+        """Index of the first matching rule per row (len(rules) = no rule matched)"""
+        if size is None:
+            size = len(next(iter(columns.values()))) if columns else 0
+        index = np.full(size, len(self.rules), dtype=np.intp)
+        # Walk from the last rule to the first so higher-priority matches overwrite lower ones
+        for i in range(len(self.rules) - 1, -1, -1):
+            index[self.rules[i].mask(columns)] = i
+        return index
+
+    def classify_columns(self, columns, size=None):
+        """(attack_types, confidences) arrays for whole columns"""
+        index = self.match_index(columns, size)
+        return self.attack_types[index], self.confidences[index]
+
+    def suspicious_mask(self, columns, size=None):
+        """True where some rule flags the row as an attack"""
+        return self.attack_types[self.match_index(columns, size)] != self.default_type
@@ -0,0 +1,137 @@
+"""
+Cluster stats for horizontally scaled backends
+Each instance in an MQTT shared-subscription group only sees its share of the
+packets. Instances publish a small snapshot of their counters every
+CLUSTER_STATS_INTERVAL seconds and merge the latest snapshot of every live
+peer into a global view, so any instance can answer /api/stats for the group.
+"""
+import json
+import threading
+import time
+from collections import defaultdict
+
+from cardinality import HyperLogLog
+from config import CLUSTER_STALE_AFTER, CLUSTER_STATS_INTERVAL, INSTANCE_ID, MQTT_CLUSTER_TOPIC
+
+# Counters that are simply summed across instances
+SUMMED_FIELDS = ('total_packets', 'classified_packets', 'shed_packets', 'attack_count',
+                 'packets_per_sec')
+# Shown per instance; distinct counts merge as sketches (merge_sketches), not sums
+INSTANCE_FIELDS = SUMMED_FIELDS + ('active_sessions',)
+
+
+class ClusterStats:
+    """Publishes this instance's counters and keeps the latest snapshot of every peer"""
+
+    def __init__(self, instance_id=INSTANCE_ID, topic=MQTT_CLUSTER_TOPIC,
+                 interval=CLUSTER_STATS_INTERVAL, stale_after=CLUSTER_STALE_AFTER):
+        self.instance_id = instance_id
+        self.topic = topic
+        self.interval = interval
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._peers = {}  # instance id -> (received monotonic time, snapshot)
+        self._peer_totals = self._empty()
+        self._peer_sketches = {}  # key -> union of every peer's HyperLogLog for that key
+        self.version = 0  # bumped whenever the peer totals change (stats ETags)
+        self._stop = threading.Event()
+
+    @staticmethod
+    def _empty():
+        totals = {field: 0 for field in SUMMED_FIELDS}
+        totals['attack_distribution'] = defaultdict(int)
+        totals['shedding'] = False
+        return totals
+
+    def subscribe(self, client):
+        """Listen to every instance's snapshots (call from on_connect)"""
+        client.subscribe(f"{self.topic}/+")
+
+    def start(self, client, snapshot):
+        """Publish snapshot() every `interval` seconds on a daemon thread"""
+        def run():
+            while not self._stop.wait(self.interval):
+                payload = dict(snapshot(), instance=self.instance_id)
+                client.publish(f"{self.topic}/{self.instance_id}", json.dumps(payload))
+                self._expire()
+        threading.Thread(target=run, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def handle(self, msg):
+        """Consume a peer snapshot; False if the message isn't a cluster message"""
+        if not msg.topic.startswith(self.topic + '/'):
+            return False
+        snapshot = json.loads(msg.payload)
+        instance = snapshot.get('instance')
+        if instance and instance != self.instance_id:
+            with self._lock:
+                self._peers[instance] = (time.monotonic(), snapshot)
+                self._recompute()
+        return True
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.stale_after
+        with self._lock:
+            stale = [i for i, (seen, _) in self._peers.items() if seen < cutoff]
+            for instance in stale:
+                del self._peers[instance]
+            if stale:
+                self._recompute()
+
+    def _recompute(self):
+        # Caller holds the lock; peers change once per interval, so summing here
+        # keeps merge() cheap for the periodic stats_delta tick and every /api/stats
+        totals = self._empty()
+        for _, snapshot in self._peers.values():
+            for field in SUMMED_FIELDS:
+                totals[field] += snapshot.get(field, 0)
+            totals['shedding'] = totals['shedding'] or snapshot.get('shedding', False)
+            for attack, count in snapshot.get('attack_distribution', {}).items():
+                totals['attack_distribution'][attack] += count
+        sketches = {}
+        for _, snapshot in self._peers.values():
+            for key, text in snapshot.get('distinct', {}).items():
+                sketch = HyperLogLog.from_text(text)
+                if key in sketches:
+                    sketches[key].merge(sketch)
+                else:
+                    sketches[key] = sketch
+        self._peer_totals = totals
+        self._peer_sketches = sketches
+        self.version += 1
+
+    def merge(self, local):
+        """Global counters: this instance's `local` stats plus every live peer's last snapshot"""
+        peers = self._peer_totals
+        merged = dict(local)
+        for field in SUMMED_FIELDS:
+            merged[field] = local[field] + peers[field]
+        distribution = dict(local['attack_distribution'])
+        for attack, count in peers['attack_distribution'].items():
+            distribution[attack] = distribution.get(attack, 0) + count
+        merged['attack_distribution'] = distribution
+        merged['shedding'] = local.get('shedding', False) or peers['shedding']
+        return merged
+
+    def merge_sketches(self, local):
+        """
+        Union of this instance's distinct-count sketches with the peers' sketches
+        under the same key; keys encode the time bucket, so a peer still on the
+        previous minute simply doesn't contribute to the new one
+        """
+        peers = self._peer_sketches
+        return {key: sketch.copy().merge(peers[key]) if key in peers else sketch
+                for key, sketch in local.items()}
+
+    def instances(self, local):
+        """Per-instance breakdown for the stats API"""
+        now = time.monotonic()
+        rows = [{'instance': self.instance_id, 'age_s': 0.0,
+                 **{field: local[field] for field in INSTANCE_FIELDS}}]
+        with self._lock:
+            for instance, (seen, snapshot) in sorted(self._peers.items()):
+                rows.append({'instance': instance, 'age_s': round(now - seen, 2),
+                             **{field: snapshot.get(field, 0) for field in INSTANCE_FIELDS}})
+        return rows
@@ -0,0 +1,135 @@
+"""
+Batched MQTT envelopes
+Packs many JSON packets into one MQTT message, optionally compressed
+
+Wire format (all integers big-endian):
+    magic    4 bytes  b'KDDE'
+    version  1 byte   ENVELOPE_VERSION
+    codec    1 byte   0 = none, 1 = zlib, 2 = zstd
+    count    4 bytes  number of packets
+    body     rest     JSON array of packet objects, compressed with `codec`
+
+Messages that don't start with the magic are treated as a single plain JSON
+packet, so old senders keep working against a new backend.
+"""
+import json
+import struct
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; zlib is always available
+    zstandard = None
+
+MAGIC = b'KDDE'
+ENVELOPE_VERSION = 1
+HEADER = struct.Struct('!4sBBI')
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODECS = {'none': CODEC_NONE, 'zlib': CODEC_ZLIB, 'zstd': CODEC_ZSTD}
+
+_zstd_compressor = zstandard.ZstdCompressor(level=3) if zstandard else None
+_zstd_decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+
+class EnvelopeError(ValueError):
+    """Malformed or unsupported envelope"""
+
+
+def _compress(body, codec):
+    if codec == CODEC_NONE:
+        return body
+    if codec == CODEC_ZLIB:
+        return zlib.compress(body, 1)
+    if codec == CODEC_ZSTD:
+        if _zstd_compressor is None:
+            raise EnvelopeError("zstd codec requested but the 'zstandard' package is not installed")
+        return _zstd_compressor.compress(body)
+    raise EnvelopeError(f"Unknown codec {codec}")
+
+
+def _decompress(body, codec):
+    if codec == CODEC_NONE:
+        return body
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(body)
+    if codec == CODEC_ZSTD:
+        if _zstd_decompressor is None:
+            raise EnvelopeError("zstd envelope received but the 'zstandard' package is not installed")
+        return _zstd_decompressor.decompress(body)
+    raise EnvelopeError(f"Unknown codec {codec}")
+
+
+def encode_envelope(payloads, codec=CODEC_ZLIB):
+    """
+    Pack packets into one envelope
+
+    Args:
+        payloads: Already serialized JSON strings (cheap: joined, not re-encoded)
+        codec: CODEC_NONE, CODEC_ZLIB or CODEC_ZSTD
+    """
+    body = ('[' + ','.join(payloads) + ']').encode('utf-8')
+    return HEADER.pack(MAGIC, ENVELOPE_VERSION, codec, len(payloads)) + _compress(body, codec)
+
+
+def decode_message(payload):
+    """List of packet dicts from an envelope or a single plain JSON packet"""
+    if not payload.startswith(MAGIC):
+        return [json.loads(payload)]
+    if len(payload) < HEADER.size:
+        raise EnvelopeError("Truncated envelope header")
+    _, version, codec, count = HEADER.unpack_from(payload)
+    if version != ENVELOPE_VERSION:
+        raise EnvelopeError(f"Unsupported envelope version {version}")
+    packets = json.loads(_decompress(payload[HEADER.size:], codec))
+    if len(packets) != count:
+        raise EnvelopeError(f"Envelope header says {count} packets, body has {len(packets)}")
+    return packets
+
+
+class EnvelopeBatcher:
+    """
+    Accumulates serialized packets and emits an envelope when `max_count`
+    packets are buffered or the oldest one has waited `max_delay` seconds
+
+    publish: callable(envelope_bytes) -> anything; its return value is passed back
+    """
+
+    def __init__(self, publish, max_count=100, max_delay=0.05, codec=CODEC_ZLIB):
+        self.publish = publish
+        self.max_count = max_count
+        self.max_delay = max_delay
+        self.codec = codec
+        self._buffer = []
+        self._first_at = None
+        self.envelopes = 0
+        self.packets = 0
+        self.bytes = 0
+
+    def add(self, payload):
+        """Buffer one packet; returns the publish result if this flushed an envelope, else None"""
+        if not self._buffer:
+            self._first_at = time.perf_counter()
+        self._buffer.append(payload)
+        if len(self._buffer) >= self.max_count:
+            return self.flush()
+        return None
+
+    def poll(self):
+        """Flush if the oldest buffered packet is older than max_delay"""
+        if self._buffer and time.perf_counter() - self._first_at >= self.max_delay:
+            return self.flush()
+        return None
+
+    def flush(self):
+        if not self._buffer:
+            return None
+        envelope = encode_envelope(self._buffer, self.codec)
+        self.envelopes += 1
+        self.packets += len(self._buffer)
+        self.bytes += len(envelope)
+        self._buffer = []
+        return self.publish(envelope)
@@ -1,143 +1,467 @@
+import heapq
+import itertools
 import json
 import paho.mqtt.client as mqtt
 import threading
 import time
+import zlib
+import metrics
+from config import (MQTT_BROKER, MQTT_PORT, MQTT_TOPIC, MQTT_SHARE_GROUP, INGEST_LANES,
+                    INGEST_QUEUE_SIZE, MAX_RECENT_ATTACKS, RECENT_ATTACKS_PAGE, LOAD_SHEDDING,
+                    SHED_QUEUE_DEPTH, SHED_MAX_LAG, SHED_SAMPLE_RATE, FEATURE_ENGINE_MODE,
+                    FEATURE_TIME_WINDOW, FEATURE_HOST_WINDOW, FEATURE_MAX_KEYS,
+                    HEAVY_HITTER_CAPACITY, HEAVY_HITTER_TOP, ACTIVE_SESSION_TIMEOUT)
+from cardinality import WindowedCardinality, merge_into, merged_series, relative_error
+from drift import DriftMonitor
+from feature_engine import WindowFeatureEngine
+from heavy_hitters import SpaceSaving, merge_top
+from incidents import IncidentTracker
+from records import DetectionRecord
+from stats_stream import StatsStream
+from subscriptions import subscriptions
+from log import get_logger, PacketSampler, ErrorRateLimiter
+from mqtt.cluster import ClusterStats
+from mqtt.envelope import decode_message, EnvelopeError
+from mqtt.lanes import IngestLanes
 from models.classifier import get_classifier
-from collections import defaultdict
+from collections import defaultdict, deque
 from datetime import datetime
 
-# Global statistics
-network_stats = {
-    'total_packets': 0,
-    'attack_count': 0,
-    'packets_per_sec': 0,
-    'active_sessions': set(),
-    'attack_distribution': defaultdict(int),
-    'recent_attacks': [],
-    'last_packet_time': time.time()
+logger = get_logger('mqtt')
+packet_sampler = PacketSampler()
+error_limiter = ErrorRateLimiter(logger)
+
+# Set when this instance is one of several in an MQTT shared-subscription group
+cluster = ClusterStats() if MQTT_SHARE_GROUP else None
+
+# Top-k dimensions; tuple-valued ones are tracked as (src_ip, attack_type) pairs
+HEAVY_HITTER_DIMENSIONS = {
+    'src_ip': 'src_ip',
+    'dst_ip': 'dst_ip',
+    'service': 'service',
+    'src_ip_attack': ('src_ip', 'attack_type'),
 }
 
-def process_packet_data(data, socketio):
-    """Process packet data (used by both MQTT and HTTP injection)"""
+# Distinct sessions (src:dst pairs), sources and destinations per minute and
+# hour as HyperLogLog sketches (see cardinality.py), one set per lane shard;
+# readers merge them (HLL unions are lossless)
+DISTINCT_METRICS = ('sessions', 'src_ip', 'dst_ip')
+_distinct_cache = {}  # scope -> (computed at, view, checksum of the view)
+
+def _new_shard():
+    """Statistics owned by one ingest lane (every source IP maps to exactly one lane)"""
+    return {
+        'total_packets': 0,  # classified + shed
+        'shed_packets': 0,
+        'shedding': False,
+        'shed_sampled': 0,  # obviously-normal packets seen while shedding (drives sampling)
+        'attack_count': 0,
+        'packets_per_sec': 0,
+        'attack_distribution': defaultdict(int),
+        'recent_attacks': deque(maxlen=MAX_RECENT_ATTACKS),  # (arrival seq, DetectionRecord), newest first
+        'heavy_hitters': {dimension: SpaceSaving(HEAVY_HITTER_CAPACITY)
+                          for dimension in HEAVY_HITTER_DIMENSIONS},
+        'distinct': WindowedCardinality(DISTINCT_METRICS),
+        'last_packet_time': time.time()
+    }
+
+# One statistics shard per lane; lanes only ever write their own shard, and
+# readers merge all of them (every counter is keyed by src_ip, so shards are disjoint;
+# the distinct-count sketches can overlap on dst_ip and are merged as HLL unions)
+shards = [_new_shard() for _ in range(INGEST_LANES)]
+_arrival_seq = itertools.count()
+_stats_generation = 0  # bumped by reset_stats()
+_lanes = None
+_lanes_lock = threading.Lock()
+
+# Window features need every connection to a host/service in arrival order,
+# which crosses source lanes, so they are computed in ingest() before dispatch
+feature_engine = None if FEATURE_ENGINE_MODE == 'off' else WindowFeatureEngine(
+    FEATURE_TIME_WINDOW, FEATURE_HOST_WINDOW, FEATURE_MAX_KEYS)
+_feature_lock = threading.Lock()
+
+def _extract_features(data):
+    """20 selected features required by the trained model, with defaults for missing fields"""
+    return {
+        'src_bytes': float(data.get('src_bytes', 0)),
+        'same_srv_rate': float(data.get('same_srv_rate', 0)),
+        'flag': data.get('flag', 'S0'),
+        'dst_host_serror_rate': float(data.get('dst_host_serror_rate', 0)),
+        'srv_serror_rate': float(data.get('srv_serror_rate', 0)),
+        'dst_host_same_srv_rate': float(data.get('dst_host_same_srv_rate', 0.5)),
+        'diff_srv_rate': float(data.get('diff_srv_rate', 0)),
+        'count': float(data.get('packet_count', data.get('count', 1))),
+        'dst_host_srv_serror_rate': float(data.get('dst_host_srv_serror_rate', 0)),
+        'serror_rate': float(data.get('serror_rate', 0)),
+        'dst_host_same_src_port_rate': float(data.get('dst_host_same_src_port_rate', 0)),
+        'dst_host_srv_diff_host_rate': float(data.get('dst_host_srv_diff_host_rate', 0)),
+        'dst_bytes': float(data.get('dst_bytes', data.get('length', 0))),
+        'dst_host_diff_srv_rate': float(data.get('dst_host_diff_srv_rate', 0)),
+        'protocol_type': data.get('protocol', 'tcp'),
+        'dst_host_srv_count': float(data.get('dst_host_srv_count', 1)),
+        'service': data.get('service', 'http'),
+        'srv_count': float(data.get('srv_count', 1)),
+        'dst_host_count': float(data.get('dst_host_count', 1)),
+        'dst_host_rerror_rate': float(data.get('dst_host_rerror_rate', 0)),
+    }
+
+def _counters():
+    """This instance's counters, merged over all lane shards (what dashboards see, via stats_stream)"""
+    distribution = defaultdict(int)
+    totals = {'total_packets': 0, 'classified_packets': 0, 'shed_packets': 0, 'attack_count': 0,
+              'packets_per_sec': 0, 'active_sessions': 0}
+    shedding = False
+    for shard in shards:
+        totals['total_packets'] += shard['total_packets']
+        totals['shed_packets'] += shard['shed_packets']
+        shedding = shedding or shard['shedding']
+        totals['attack_count'] += shard['attack_count']
+        totals['packets_per_sec'] += shard['packets_per_sec']
+        for attack, count in list(shard['attack_distribution'].items()):
+            distribution[attack] += count
+    totals['classified_packets'] = totals['total_packets'] - totals['shed_packets']
+    totals['attack_distribution'] = dict(distribution)
+    totals['shedding'] = shedding
+    totals['active_sessions'] = _distinct_view('local')['active_sessions']
+    return totals
+
+def _count_heavy_hitters(shard, data, service, attack_type=None):
+    """O(1) sketch updates for one packet (attack_type only for attacks)"""
+    sketches = shard['heavy_hitters']
+    src_ip = data.get('src_ip', '')
+    sketches['src_ip'].add(src_ip)
+    sketches['dst_ip'].add(data.get('dst_ip', ''))
+    sketches['service'].add(service)
+    if attack_type is not None:
+        sketches['src_ip_attack'].add((src_ip, attack_type))
+
+def _heavy_hitters(k):
+    """Top k per dimension merged over all lanes, with each count's maximum overestimate"""
+    result = {}
+    for dimension, fields in HEAVY_HITTER_DIMENSIONS.items():
+        rows = []
+        sketches = [shard['heavy_hitters'][dimension] for shard in shards]
+        for key, count, error in merge_top(sketches, k):
+            row = dict(zip(fields, key)) if isinstance(fields, tuple) else {fields: key}
+            row['count'] = count
+            row['error'] = error
+            rows.append(row)
+        result[dimension] = rows
+    return result
+
+def _count_distinct(shard, data):
+    src_ip = str(data.get('src_ip') or '')
+    dst_ip = str(data.get('dst_ip') or '')
+    shard['distinct'].add({'sessions': f"{src_ip}:{dst_ip}", 'src_ip': src_ip, 'dst_ip': dst_ip})
+
+def _distinct_sketches(now=None):
+    """
+    This instance's sketches keyed 'metric/window/bucket' for the running minute
+    and hour, plus 'sessions/active' (the last ACTIVE_SESSION_TIMEOUT seconds),
+    merged over all lane shards
+    """
+    now = time.time() if now is None else now
+    sketches = {}
+    for shard in shards:
+        distinct = shard['distinct']
+        lane = {'sessions/active': distinct.union('sessions', ACTIVE_SESSION_TIMEOUT, now)}
+        for (metric, window), (bucket, sketch) in distinct.current(now).items():
+            lane[f"{metric}/{window}/{bucket}"] = sketch
+        merge_into(sketches, lane)
+    return sketches
+
+def get_distinct_series(metric, window):
+    """Distinct count per retained minute/hour bucket of this instance, oldest first"""
+    return merged_series([shard['distinct'] for shard in shards], metric, window)
+
+def _distinct_view(scope='global'):
+    """
+    {'active_sessions': n, 'distinct': {window: {metric: n}}}, recomputed at most
+    once a second (unions and estimates take a few ms)
+    """
+    return _distinct_entry(scope)[1]
+
+def _distinct_entry(scope):
+    now = time.time()
+    cached = _distinct_cache.get(scope)
+    if cached is not None and now - cached[0] < 1.0:
+        return cached
+    sketches = _distinct_sketches(now)
+    if cluster is not None and scope == 'global':
+        sketches = cluster.merge_sketches(sketches)
+    view = {'active_sessions': sketches.pop('sessions/active').count(),
+            'distinct': {'relative_error': round(relative_error(), 4)}}
+    for key, sketch in sketches.items():
+        metric, window, _ = key.split('/')
+        view['distinct'].setdefault(window, {})[metric] = sketch.count()
+    entry = _distinct_cache[scope] = (now, view, zlib.crc32(repr(view).encode()))
+    return entry
+
+def _cluster_snapshot():
+    """Counters plus serialized distinct-count sketches for the peers"""
+    return dict(_counters(), distinct={key: sketch.to_text()
+                                       for key, sketch in _distinct_sketches().items()})
+
+def _dashboard_counters():
+    counters = _counters()
+    if cluster is None:
+        return counters
+    merged = cluster.merge(counters)
+    merged['active_sessions'] = _distinct_view('global')['active_sessions']
+    return merged
+
+# Repeated detections folded into incidents (see incidents.py)
+incidents = IncidentTracker()
+
+# Live feature histograms vs the training profile (see drift.py)
+drift = DriftMonitor.load()
+
+# Dashboards get a snapshot on connect, then only changed counters (see stats_stream.py)
+stats_stream = StatsStream(_dashboard_counters)
+
+def _recent_attacks(limit=MAX_RECENT_ATTACKS, offset=0, fields=None):
+    """Newest attacks across all lanes (at most MAX_RECENT_ATTACKS), newest first"""
+    stop = min(offset + limit, MAX_RECENT_ATTACKS)
+    merged = heapq.merge(*(list(shard['recent_attacks']) for shard in shards),
+                         key=lambda item: item[0], reverse=True)
+    page = (record.to_dict() for _, record in itertools.islice(merged, offset, max(offset, stop)))
+    if fields is None:
+        return list(page)
+    return [{k: attack[k] for k in fields if k in attack} for attack in page]
+
+def _record_result(shard, data, features, classification, socketio, started, predict_done):
+    """Update the lane's statistics shard, emit to the dashboard and log for one classified packet"""
+    # Update statistics
+    shard['total_packets'] += 1
+    _count_distinct(shard, data)
+    
+    is_attack = classification['attack_type'] != 'normal'
+    if is_attack:
+        shard['attack_count'] += 1
+        shard['attack_distribution'][classification['attack_type']] += 1
+    _count_heavy_hitters(shard, data, features['service'],
+                         classification['attack_type'] if is_attack else None)
+    
+    # Compact record; the enriched dict is only built for subscribers that want it
+    record = DetectionRecord(data, features, classification,
+                             data['timestamp'] if 'timestamp' in data else datetime.now().isoformat())
+    
+    # Track recent attacks: only the first detection of an incident, the rest
+    # are folded into it and go out with the batched incident_update
+    folded = is_attack and not incidents.observe(record)
+    if is_attack and not folded:
+        shard['recent_attacks'].appendleft((next(_arrival_seq), record))
+    
+    # Calculate packets per second
+    current_time = time.time()
+    if current_time - shard['last_packet_time'] > 1:
+        shard['packets_per_sec'] = shard['total_packets']
+        shard['last_packet_time'] = current_time
+    
+    stats_done = time.perf_counter()
+    metrics.STATS_SECONDS.observe(stats_done - predict_done)
+    
+    # Emit to frontend: once per subscription room that wants this event
+    if folded:
+        metrics.LOGS_FOLDED.inc()
+    else:
+        rooms = subscriptions.rooms_for(record)
+        if rooms:
+            event = record.to_dict()
+            for room in rooms:
+                socketio.emit("network_logs", event, to=room)
+        (metrics.LOGS_EMITTED if rooms else metrics.LOGS_SUPPRESSED).inc()
+    
+    emit_done = time.perf_counter()
+    metrics.EMIT_SECONDS.observe(emit_done - stats_done)
+    metrics.TOTAL_SECONDS.observe(emit_done - started)
+    (metrics.ATTACKS_CLASSIFIED if is_attack else metrics.NORMAL_CLASSIFIED).inc()
+    
+    if packet_sampler.should_log():
+        logger.info("Packet classified", extra={'fields': {
+            'src_ip': data.get('src_ip'),
+            'dst_ip': data.get('dst_ip'),
+            'attack_type': classification['attack_type'],
+            'confidence': classification['confidence'],
+            'lane_packets': shard['total_packets'],
+        }})
+
+def process_packet_data(data, socketio, shard):
+    """Classify one packet and record it in `shard` (runs on the packet's ingest lane)"""
+    started = time.perf_counter()
+    metrics.PACKETS_IN.inc()
     try:
         classifier = get_classifier()
+        features = _extract_features(data)
+        drift.observe([features])
         
-        # Prepare features for classification (20 selected features required by trained model)
-        features = {
-            'src_bytes': float(data.get('src_bytes', 0)),
-            'same_srv_rate': float(data.get('same_srv_rate', 0)),
-            'flag': data.get('flag', 'S0'),
-            'dst_host_serror_rate': float(data.get('dst_host_serror_rate', 0)),
-            'srv_serror_rate': float(data.get('srv_serror_rate', 0)),
-            'dst_host_same_srv_rate': float(data.get('dst_host_same_srv_rate', 0.5)),
-            'diff_srv_rate': float(data.get('diff_srv_rate', 0)),
-            'count': float(data.get('packet_count', data.get('count', 1))),
-            'dst_host_srv_serror_rate': float(data.get('dst_host_srv_serror_rate', 0)),
-            'serror_rate': float(data.get('serror_rate', 0)),
-            'dst_host_same_src_port_rate': float(data.get('dst_host_same_src_port_rate', 0)),
-            'dst_host_srv_diff_host_rate': float(data.get('dst_host_srv_diff_host_rate', 0)),
-            'dst_bytes': float(data.get('dst_bytes', data.get('length', 0))),
-            'dst_host_diff_srv_rate': float(data.get('dst_host_diff_srv_rate', 0)),
-            'protocol_type': data.get('protocol', 'tcp'),
-            'dst_host_srv_count': float(data.get('dst_host_srv_count', 1)),
-            'service': data.get('service', 'http'),
-            'srv_count': float(data.get('srv_count', 1)),
-            'dst_host_count': float(data.get('dst_host_count', 1)),
-            'dst_host_rerror_rate': float(data.get('dst_host_rerror_rate', 0)),
-        }
+        features_done = time.perf_counter()
+        metrics.FEATURES_SECONDS.observe(features_done - started)
         
         # Get classification
         classification = classifier.classify_packet(features)
+        predict_done = time.perf_counter()
+        metrics.PREDICT_SECONDS.observe(predict_done - features_done)
         
-        # Update statistics
-        network_stats['total_packets'] += 1
-        session_key = f"{data.get('src_ip', '')}:{data.get('dst_ip', '')}"
-        network_stats['active_sessions'].add(session_key)
-        
-        is_attack = classification['attack_type'] != 'normal'
-        if is_attack:
-            network_stats['attack_count'] += 1
-            network_stats['attack_distribution'][classification['attack_type']] += 1
-        
-        # Prepare enriched data
-        enriched_data = {
-            **data,
-            'attack_type': classification['attack_type'],
-            'attack_category': classification['category'],
-            'confidence': classification['confidence'],
-            'is_attack': is_attack,
-            'timestamp': data.get('timestamp', datetime.now().isoformat()),
-            # Include all ML features used for classification
-            'ml_features': {
-                'src_bytes': features['src_bytes'],
-                'dst_bytes': features['dst_bytes'],
-                'count': features['count'],
-                'srv_count': features['srv_count'],
-                'serror_rate': features['serror_rate'],
-                'srv_serror_rate': features['srv_serror_rate'],
-                'rerror_rate': features.get('rerror_rate', 0),
-                'same_srv_rate': features['same_srv_rate'],
-                'diff_srv_rate': features['diff_srv_rate'],
-                'dst_host_count': features['dst_host_count'],
-                'dst_host_serror_rate': features['dst_host_serror_rate'],
-                'dst_host_same_srv_rate': features['dst_host_same_srv_rate'],
-                'dst_host_diff_srv_rate': features['dst_host_diff_srv_rate'],
-                'dst_host_same_src_port_rate': features['dst_host_same_src_port_rate'],
-                'dst_host_srv_diff_host_rate': features['dst_host_srv_diff_host_rate'],
-                'dst_host_srv_count': features['dst_host_srv_count'],
-                'dst_host_rerror_rate': features['dst_host_rerror_rate'],
-                'protocol_type': features['protocol_type'],
-                'service': features['service'],
-                'flag': features['flag'],
-            }
-        }
-        
-        # Track recent attacks
-        if is_attack:
-            network_stats['recent_attacks'].insert(0, enriched_data)
-            network_stats['recent_attacks'] = network_stats['recent_attacks'][:100]  # Keep last 100
+        _record_result(shard, data, features, classification, socketio, started, predict_done)
         
-        # Calculate packets per second
-        current_time = time.time()
-        if current_time - network_stats['last_packet_time'] > 1:
-            network_stats['packets_per_sec'] = network_stats['total_packets']
-            network_stats['last_packet_time'] = current_time
-        
-        # Emit to frontend
-        socketio.emit("network_logs", enriched_data)
-        socketio.emit("stats_update", {
-            'total_packets': network_stats['total_packets'],
-            'attack_count': network_stats['attack_count'],
-            'packets_per_sec': network_stats['packets_per_sec'],
-            'active_sessions': len(network_stats['active_sessions']),
-            'attack_distribution': dict(network_stats['attack_distribution'])
-        })
+    except Exception as e:
+        metrics.PROCESS_ERRORS.inc()
+        error_limiter.error('process', "Error processing packet", error=repr(e))
+
+def process_packet_batch(packets, socketio, shard):
+    """
+    Process many packets of one lane with a single vectorized classifier call
+    
+    Stats and emits stay per packet so the dashboard sees exactly the same events.
+    """
+    started = time.perf_counter()
+    metrics.PACKETS_IN.inc(len(packets))
+    try:
+        classifier = get_classifier()
+        features_list = [_extract_features(data) for data in packets]
+        drift.observe(features_list)
         
-        print(f"[{enriched_data['timestamp'].split('T')[1][:8]}] {data.get('src_ip')} → {data.get('dst_ip')} | "
-              f"Type: {classification['attack_type']} | Confidence: {classification['confidence']}%")
+        features_done = time.perf_counter()
+        metrics.FEATURES_SECONDS.observe(features_done - started)
         
+        classifications = classifier.classify_batch(features_list)
+        predict_done = time.perf_counter()
+        metrics.PREDICT_BATCH_SECONDS.observe(predict_done - features_done)
     except Exception as e:
-        print(f"Error processing packet: {e}")
+        metrics.PROCESS_ERRORS.inc(len(packets))
+        error_limiter.error('process', "Error processing packet batch",
+                            error=repr(e), packets=len(packets))
+        return
+    
+    for data, features, classification in zip(packets, features_list, classifications):
+        try:
+            _record_result(shard, data, features, classification, socketio, started, predict_done)
+        except Exception as e:
+            metrics.PROCESS_ERRORS.inc()
+            error_limiter.error('process', "Error processing packet", error=repr(e))
 
-def start_mqtt(socketio):
+def _shed(packets, shard, classifier):
+    """
+    Drop obviously-normal packets (all but every 1/SHED_SAMPLE_RATE-th) from a
+    lagging lane; returns the packets that still need full classification
+    """
+    keep_every = max(1, round(1 / SHED_SAMPLE_RATE)) if SHED_SAMPLE_RATE > 0 else 0
+    features_list = []
+    malformed = []
+    for i, data in enumerate(packets):
+        try:
+            features_list.append(_extract_features(data))
+        except Exception:
+            features_list.append({})
+            malformed.append(i)
+    # One vectorized pass of the detection rules over the whole batch
+    suspicious = classifier.suspicious_batch(features_list).tolist()
+    for i in malformed:
+        suspicious[i] = True  # let the full path report the malformed packet
+    kept = []
+    shed_features = []
+    for i, (data, is_suspicious) in enumerate(zip(packets, suspicious)):
+        if not is_suspicious:
+            shard['shed_sampled'] += 1
+            if not keep_every or shard['shed_sampled'] % keep_every:
+                shed_features.append(features_list[i])
+                _count_distinct(shard, data)
+                _count_heavy_hitters(shard, data, features_list[i]['service'])
+                continue
+        kept.append(data)
+    if shed_features:
+        drift.observe(shed_features)  # kept packets are observed when they are classified
+        shed = len(shed_features)
+        shard['total_packets'] += shed
+        shard['shed_packets'] += shed
+        metrics.PACKETS_IN.inc(shed)
+        metrics.PACKETS_SHED.inc(shed)
+    return kept
+
+def _get_lanes(socketio):
+    global _lanes
+    if _lanes is None:
+        with _lanes_lock:
+            if _lanes is None:
+                def handle(lane, packets, waited):
+                    shard = shards[lane]
+                    depth = _lanes.queues[lane].qsize()
+                    metrics.INGEST_QUEUE_DEPTH.labels(str(lane)).set(depth)
+                    if LOAD_SHEDDING:
+                        shedding = depth >= SHED_QUEUE_DEPTH or waited >= SHED_MAX_LAG
+                        if shedding != shard['shedding']:
+                            shard['shedding'] = shedding
+                            logger.warning("Load shedding " + ("started" if shedding else "stopped"),
+                                           extra={'fields': {'lane': lane, 'queue_depth': depth,
+                                                             'lag_s': round(waited, 3)}})
+                        if shedding:
+                            packets = _shed(packets, shard, get_classifier())
+                    if len(packets) == 1:
+                        process_packet_data(packets[0], socketio, shard)
+                    elif packets:
+                        process_packet_batch(packets, socketio, shard)
+                _lanes = IngestLanes(INGEST_LANES, handle, INGEST_QUEUE_SIZE).start()
+                incidents.start(socketio)
+                drift.start(socketio)
+    return _lanes
+
+def _add_window_features(packets):
+    """Fill in KDD window features from the engine (see FEATURE_ENGINE_MODE)"""
+    always = FEATURE_ENGINE_MODE == 'always'
+    started = time.perf_counter()
+    with _feature_lock:
+        for data in packets:
+            if always or ('count' not in data and 'packet_count' not in data):
+                ts = data.get('ts')
+                data.update(feature_engine.update(data, ts if isinstance(ts, (int, float)) else None))
+    metrics.WINDOW_FEATURES_SECONDS.observe(time.perf_counter() - started)
+
+def ingest(packets, socketio):
+    """
+    Entry point for MQTT and HTTP injection: derive window features, then route
+    packets by src_ip onto the ingest lanes, where they are classified in
+    per-source order
+    """
+    if feature_engine is not None:
+        _add_window_features(packets)
+    _get_lanes(socketio).submit(packets)
+
+def start_mqtt(socketio, broker=MQTT_BROKER, port=MQTT_PORT, topic=MQTT_TOPIC,
+               share_group=MQTT_SHARE_GROUP):
+    """
+    Connect to the MQTT broker in the background and feed packets to the classifier
+    
+    With share_group set, subscribes as '$share/<group>/<topic>' so the broker
+    spreads packets over every instance in the group.
+    """
+    subscription = f"$share/{share_group}/{topic}" if share_group else topic
+    
     def on_message(client, userdata, msg):
         try:
-            print(f"📨 MQTT message received on topic {msg.topic}")
-            data = json.loads(msg.payload.decode())
-            print(f"📦 Processing packet: {data.get('src_ip')} → {data.get('dst_ip')}")
-            process_packet_data(data, socketio)
-        except json.JSONDecodeError:
-            print(f"Invalid JSON received: {msg.payload}")
+            if cluster is not None and cluster.handle(msg):
+                return
+            decode_start = time.perf_counter()
+            packets = decode_message(msg.payload)
+            metrics.DECODE_SECONDS.observe(time.perf_counter() - decode_start)
+            if len(packets) > 1:
+                metrics.ENVELOPES_IN.inc()
+            ingest(packets, socketio)
+        except (json.JSONDecodeError, UnicodeDecodeError, EnvelopeError, zlib.error):
+            metrics.DECODE_ERRORS.inc()
+            error_limiter.error('decode', "Invalid JSON or envelope received",
+                                topic=msg.topic, payload=msg.payload[:200])
         except Exception as e:
-            print(f"Error processing message: {e}")
+            error_limiter.error('message', "Error processing message", error=repr(e))
 
     def on_connect(client, userdata, flags, rc):
         if rc == 0:
-            print(f"✅ MQTT Connected successfully")
-            client.subscribe("nids/unique123/live_packets")
-            print(f"✅ Subscribed to nids/unique123/live_packets")
+            client.subscribe(subscription)
+            if cluster is not None:
+                cluster.subscribe(client)
+            logger.info("MQTT connected and subscribed", extra={'fields': {'topic': subscription}})
         else:
-            print(f"❌ MQTT Connection failed with code {rc}")
+            logger.error("MQTT connection failed", extra={'fields': {'rc': rc}})
 
     client = mqtt.Client()
     client.on_message = on_message
@@ -146,38 +470,95 @@ def start_mqtt(socketio):
     def try_connect():
         for attempt in range(1, 6):
             try:
-                print(f"🔗 MQTT connect attempt {attempt}/5 to broker.hivemq.com:1883...")
-                client.connect("broker.hivemq.com", 1883, 60)
+                logger.info("MQTT connect attempt", extra={'fields': {
+                    'attempt': attempt, 'broker': broker, 'port': port}})
+                client.connect(broker, port, 60)
                 client.loop_start()
-                print(f"✅ MQTT loop started")
                 return
             except Exception as e:
-                print(f"❌ MQTT connect attempt {attempt} failed: {e}")
+                logger.warning("MQTT connect attempt failed", extra={'fields': {
+                    'attempt': attempt, 'error': repr(e)}})
                 time.sleep(5)
-        print("❌ MQTT: all connect attempts failed — continuing without MQTT")
+        logger.error("MQTT: all connect attempts failed, continuing without MQTT")
 
     threading.Thread(target=try_connect, daemon=True).start()
+    # Ticks whether or not packets (or the broker) ever arrive: peer snapshots
+    # and distinct-count windows change the counters too
+    stats_stream.start(socketio)
+    if cluster is not None:
+        cluster.start(client, _cluster_snapshot)
+    return client
 
-def get_stats():
-    """Return current network statistics"""
-    return {
-        'total_packets': network_stats['total_packets'],
-        'attack_count': network_stats['attack_count'],
-        'packets_per_sec': network_stats['packets_per_sec'],
-        'active_sessions': len(network_stats['active_sessions']),
-        'attack_distribution': dict(network_stats['attack_distribution']),
-        'recent_attacks': network_stats['recent_attacks']
-    }
+def stats_version(scope='global'):
+    """
+    Changes whenever get_stats() could return something different (ETag source)
+    
+    Every counter and recent attack moves with total_packets; resets and peer
+    snapshots are counted separately. active_sessions and distinct also change
+    with the clock alone (windows roll over), so the served distinct view is
+    part of the version through its checksum.
+    """
+    version = (f"{_stats_generation}.{sum(shard['total_packets'] for shard in shards)}"
+               f".{_distinct_entry(scope)[2]:x}")
+    if cluster is not None and scope == 'global':
+        version += f".{cluster.version}"
+    return version
+
+def get_stats(scope='global', fields=None, recent=RECENT_ATTACKS_PAGE, recent_offset=0,
+              attack_fields=None, top=HEAVY_HITTER_TOP):
+    """
+    Return current network statistics
+    
+    total_packets counts every packet received; under load shedding only
+    classified_packets went through the model, shed_packets were judged
+    obviously normal and skipped (attack counts cover classified packets).
+    
+    In a shared-subscription group, scope='global' merges the counters of every
+    live instance and adds a per-instance breakdown; scope='local' (and
+    recent_attacks in either scope) covers only this instance.
+    
+    fields: top-level keys to return (None = all); recent/recent_offset page
+    through recent_attacks (recent=0 leaves them out) and attack_fields
+    projects each attack record. top sets the heavy_hitters entries per
+    dimension (0 leaves them out); they cover this instance only.
+    
+    active_sessions and distinct are HyperLogLog estimates (relative standard
+    error in distinct['relative_error']); in global scope they are unions of
+    every instance's sketches, so pairs seen by several instances count once.
+    """
+    wanted = (lambda key: True) if fields is None else set(fields).__contains__
+    stats = _counters()
+    if cluster is not None and scope == 'global':
+        if wanted('instances'):
+            stats['instances'] = cluster.instances(stats)
+        stats = cluster.merge(stats)
+        stats['instance'] = cluster.instance_id
+    if wanted('active_sessions') or wanted('distinct'):
+        view = _distinct_view(scope)
+        stats['active_sessions'] = view['active_sessions']
+        stats['distinct'] = view['distinct']
+    if recent and wanted('recent_attacks'):
+        stats['recent_attacks'] = _recent_attacks(recent, recent_offset, attack_fields)
+        stats['recent_attacks_total'] = min(sum(len(shard['recent_attacks']) for shard in shards),
+                                            MAX_RECENT_ATTACKS)
+    if top and wanted('heavy_hitters'):
+        stats['heavy_hitters'] = _heavy_hitters(top)
+    if fields is not None:
+        stats = {key: stats[key] for key in fields if key in stats}
+    return stats
 
 def reset_stats():
-    """Reset all statistics"""
-    global network_stats
-    network_stats = {
-        'total_packets': 0,
-        'attack_count': 0,
-        'packets_per_sec': 0,
-        'active_sessions': set(),
-        'attack_distribution': defaultdict(int),
-        'recent_attacks': [],
-        'last_packet_time': time.time()
-    }
+    """
+    Reset all statistics (this instance only)
+    
+    Returns the new stats snapshot; deltas cannot express removed attack types,
+    so the caller broadcasts it as 'stats_snapshot'.
+    """
+    global _stats_generation
+    for lane in range(len(shards)):
+        shards[lane] = _new_shard()
+    incidents.reset()
+    drift.reset()
+    _distinct_cache.clear()
+    _stats_generation += 1
+    return stats_stream.snapshot(resync=True)
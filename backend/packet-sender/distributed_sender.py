@@ -0,0 +1,164 @@
+"""
+Distributed KDD Load Generator
+Forks N KDDMQTTSender processes from one machine, each acting as a separate
+client (own MQTT client ID, synthetic source IP range and dataset shard),
+and aggregates their counts and rates
+
+    python distributed_sender.py --clients 8 --rate 20000 --duration 60 --ips-per-client 512
+"""
+import argparse
+import ipaddress
+import multiprocessing as mp
+import queue
+import time
+
+from kdd_mqtt_sender import CODECS, KDDMQTTSender, MQTT_BROKER, MQTT_TOPIC
+
+
+def synthetic_ips(ip_base, index, ips_per_client):
+    """Contiguous block of source IPs owned by client `index`"""
+    first = ipaddress.ip_address(ip_base) + index * ips_per_client
+    return [str(first + i) for i in range(ips_per_client)]
+
+
+def run_worker(index, args, events, start_event):
+    """One simulated client: connect, wait for the start signal, stream its shard"""
+    name = f"{args.name_prefix}-{index + 1}"
+    ips = synthetic_ips(args.ip_base, index, args.ips_per_client)
+    try:
+        sender = KDDMQTTSender(broker=args.broker, client_name=name, target_ip=args.target)
+        if not sender.connect():
+            events.put(('error', name, 'could not connect to MQTT broker'))
+            return
+
+        events.put(('ready', name, None))
+        start_event.wait()
+
+        summary = sender.send_load_test(
+            args.file,
+            rate=args.rate / args.clients,
+            limit=args.limit,
+            duration=args.duration,
+            qos=args.qos,
+            shard=(index, args.clients),
+            src_ips=ips,
+            on_progress=lambda sent, attacks: events.put(('progress', name, (sent, attacks))),
+            verbose=False,
+            envelope_size=args.envelope_size,
+            codec=args.codec,
+        )
+        summary['client'] = name
+        summary['src_ips'] = f"{ips[0]} - {ips[-1]}"
+        events.put(('done', name, summary))
+        sender.disconnect()
+    except Exception as e:
+        events.put(('error', name, repr(e)))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulate many KDD sender clients from one machine"
+    )
+    parser.add_argument("--clients", type=int, default=4, help="Number of sender processes")
+    parser.add_argument("--rate", type=float, default=1000,
+                        help="Total target packets/s, split evenly across clients")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="Cycle each shard for this many seconds (default: send shard once)")
+    parser.add_argument("--file", type=str, default="KDDTest-21.txt", help="KDD dataset file path")
+    parser.add_argument("--limit", type=int, default=None, help="Use only the first N rows before sharding")
+    parser.add_argument("--broker", type=str, default=MQTT_BROKER, help="MQTT broker address")
+    parser.add_argument("--target", type=str, default="127.0.0.1",
+                        help="IP address of the system running the website dashboard")
+    parser.add_argument("--name-prefix", type=str, default="SimClient", help="Client name prefix")
+    parser.add_argument("--ip-base", type=str, default="10.100.0.1",
+                        help="First synthetic source IP; clients get consecutive blocks")
+    parser.add_argument("--ips-per-client", type=int, default=256,
+                        help="Synthetic source IPs per client")
+    parser.add_argument("--qos", type=int, default=0, choices=[0, 1, 2], help="MQTT QoS level")
+    parser.add_argument("--envelope-size", type=int, default=1,
+                        help="Pack up to N packets per MQTT message (1 = one packet per message)")
+    parser.add_argument("--codec", type=str, default="zlib", choices=sorted(CODECS),
+                        help="Envelope compression")
+    args = parser.parse_args()
+
+    events = mp.Queue()
+    start_event = mp.Event()
+    workers = [
+        mp.Process(target=run_worker, args=(i, args, events, start_event), daemon=True)
+        for i in range(args.clients)
+    ]
+
+    print(f"🚀 Launching {args.clients} sender processes → {args.broker} ({MQTT_TOPIC})")
+    print(f"🌐 {args.clients * args.ips_per_client} synthetic sources from {args.ip_base}\n")
+    for worker in workers:
+        worker.start()
+
+    # Wait until every client is connected
+    ready = 0
+    failed = 0
+    while ready + failed < args.clients:
+        kind, name, detail = events.get()
+        if kind == 'ready':
+            ready += 1
+            print(f"  ✅ {name} ready")
+        elif kind == 'error':
+            failed += 1
+            print(f"  ❌ {name}: {detail}")
+
+    if not ready:
+        print("❌ No clients ready, aborting")
+        return
+
+    print(f"\n🏁 Starting {ready} clients\n")
+    start = time.perf_counter()
+    start_event.set()
+
+    progress = {}
+    summaries = []
+    last_report = start
+    while len(summaries) + failed < args.clients:
+        try:
+            kind, name, detail = events.get(timeout=1)
+        except queue.Empty:
+            if not any(w.is_alive() for w in workers):
+                break
+            continue
+        if kind == 'progress':
+            progress[name] = detail
+        elif kind == 'done':
+            summaries.append(detail)
+            progress[name] = (detail['sent'], detail['attacks'])
+        elif kind == 'error':
+            failed += 1
+            print(f"  ❌ {name}: {detail}")
+
+        now = time.perf_counter()
+        if now - last_report >= 5:
+            sent = sum(p[0] for p in progress.values())
+            print(f"[controller] {sent} packets sent | {sent / (now - start):,.0f}/s aggregate")
+            last_report = now
+
+    elapsed = time.perf_counter() - start
+    for worker in workers:
+        worker.join(timeout=5)
+
+    total_sent = sum(s['sent'] for s in summaries)
+    total_attacks = sum(s['attacks'] for s in summaries)
+    total_messages = sum(s['messages'] for s in summaries)
+    total_bytes = sum(s['bytes'] for s in summaries)
+
+    print("\n" + "=" * 72)
+    print(f"{'Client':<16}{'Sources':<30}{'Sent':>9}{'Attacks':>9}{'Rate/s':>10}")
+    print("-" * 72)
+    for s in sorted(summaries, key=lambda s: s['client']):
+        print(f"{s['client']:<16}{s['src_ips']:<30}{s['sent']:>9}{s['attacks']:>9}{s['achieved_rate']:>10,.0f}")
+    print("-" * 72)
+    print(f"✅ {len(summaries)} clients | {total_sent} packets ({total_attacks} attacks) in {elapsed:.2f}s")
+    print(f"📈 Aggregate rate: {total_sent / elapsed:,.0f}/s (target {args.rate:,.0f}/s)")
+    print(f"📨 {total_messages / elapsed:,.0f} MQTT messages/s | {total_bytes / elapsed / 1e6:.2f} MB/s")
+    if failed:
+        print(f"⚠️  {failed} clients failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,29 +9,119 @@ import json
 import time
 import argparse
 import random
+import os
+import sys
 import socket  # Added to detect real IP
+import threading
+import queue
+import numpy as np
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from kdd_reader import KDD_COLUMNS, iter_kdd_chunks, cycle_kdd_chunks, read_kdd
+from mqtt.envelope import CODECS, EnvelopeBatcher
+
 # MQTT Config
 MQTT_BROKER = "broker.hivemq.com"
 MQTT_PORT = 1883
 MQTT_TOPIC = "nids/unique123/live_packets"
 
 # KDD Dataset columns
-COLUMNS = [
-    'duration','protocol_type','service','flag','src_bytes','dst_bytes','land',
-    'wrong_fragment','urgent','hot','num_failed_logins','logged_in',
-    'num_compromised','root_shell','su_attempted','num_root',
-    'num_file_creations','num_shells','num_access_files','num_outbound_cmds',
-    'is_host_login','is_guest_login','count','srv_count','serror_rate',
-    'srv_serror_rate','rerror_rate','srv_rerror_rate','same_srv_rate',
-    'diff_srv_rate','srv_diff_host_rate','dst_host_count','dst_host_srv_count',
-    'dst_host_same_srv_rate','dst_host_diff_srv_rate',
-    'dst_host_same_src_port_rate','dst_host_srv_diff_host_rate',
-    'dst_host_serror_rate','dst_host_srv_serror_rate',
-    'dst_host_rerror_rate','dst_host_srv_rerror_rate','label','difficulty'
+COLUMNS = KDD_COLUMNS
+
+# Numeric KDD columns carried in every payload (as floats)
+PAYLOAD_NUMERIC_FIELDS = [
+    'src_bytes', 'dst_bytes', 'count', 'srv_count', 'serror_rate',
+    'srv_serror_rate', 'rerror_rate', 'same_srv_rate', 'diff_srv_rate',
+    'dst_host_count', 'dst_host_srv_count', 'dst_host_same_srv_rate',
+    'dst_host_diff_srv_rate', 'dst_host_same_src_port_rate',
+    'dst_host_srv_diff_host_rate', 'dst_host_serror_rate',
+    'dst_host_srv_serror_rate', 'dst_host_rerror_rate'
 ]
 
+def build_payloads(df, src_ip, dst_ip, client_name):
+    """
+    Serialize every row to its JSON payload in one vectorized pass
+    
+    Returns (payloads, is_attack): a list of JSON strings and a boolean array.
+    Payloads carry no timestamp, so the backend stamps them on arrival.
+    """
+    out = df[['protocol_type', 'service', 'flag']].rename(columns={'protocol_type': 'protocol'})
+    numeric = df[PAYLOAD_NUMERIC_FIELDS].astype(float)
+    out.insert(0, 'src_ip', src_ip)
+    out.insert(1, 'dst_ip', dst_ip)
+    out = pd.concat([out, numeric], axis=1)
+    out.insert(5, 'length', numeric['src_bytes'] + numeric['dst_bytes'])
+    out['client'] = client_name
+    
+    payloads = out.to_json(orient='records', lines=True).splitlines()
+    is_attack = (df['label'] != 'normal').to_numpy()
+    return payloads, is_attack
+
+class Pacer:
+    """
+    Hands out send permits on an absolute schedule: packet n is due at start + n / rate
+    
+    Unlike a token bucket with a small burst, time lost to a stall (GC, a slow
+    chunk) is caught up afterwards, so the average rate holds over the run.
+    """
+    def __init__(self, rate):
+        self.rate = float(rate)
+        self.start = time.perf_counter()
+        self.issued = 0
+    
+    def consume(self, max_count):
+        """Block until at least one packet is due, then take up to max_count of the due ones"""
+        while True:
+            due = int((time.perf_counter() - self.start) * self.rate) - self.issued
+            if due >= 1:
+                taken = min(due, max_count)
+                self.issued += taken
+                return taken
+            time.sleep(max(0.0, (self.issued + 1) / self.rate - (time.perf_counter() - self.start)))
+
+def prefetch(iterable, depth=2):
+    """
+    Iterate `iterable` on a background thread, at most `depth` items ahead
+    
+    Keeps chunk parsing and serialization out of the paced publish loop.
+    Exceptions are re-raised in the consumer; the thread stops when the
+    consumer does.
+    """
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+    
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def run():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except Exception as e:
+            put((done, e))
+    
+    threading.Thread(target=run, name='prefetch', daemon=True).start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
 def get_local_ip():
     """Finds the local IP address of this machine"""
     try:
@@ -56,6 +146,12 @@ class KDDMQTTSender:
         
         self.client.on_connect = self._on_connect
         self.client.on_disconnect = self._on_disconnect
+        self.client.on_publish = self._on_publish
+        
+        # Publish-latency sampling for load tests: mid -> perf_counter() at publish/ack
+        self._latency_lock = threading.Lock()
+        self._published_at = {}
+        self._acked_at = {}
     
     def _on_connect(self, client, userdata, flags, rc):
         if rc == 0:
@@ -69,6 +165,11 @@ class KDDMQTTSender:
         if rc != 0:
             print(f"⚠️  Unexpected disconnection")
     
+    def _on_publish(self, client, userdata, mid):
+        # QoS 0: called once the message is written to the socket; QoS 1/2: once acked
+        with self._latency_lock:
+            self._acked_at[mid] = time.perf_counter()
+    
     def connect(self):
         try:
             print(f"🔗 Connecting to MQTT broker: {self.broker}:{MQTT_PORT}...")
@@ -93,62 +194,57 @@ class KDDMQTTSender:
             self.client.disconnect()
             self.client.loop_stop()
     
-    def send_kdd_dataset(self, filepath, limit=None, interval=0.1):
-        """Send KDD dataset via MQTT with real IP addresses"""
+    def send_kdd_dataset(self, filepath, limit=None, interval=0.1, offset=0):
+        """Send KDD dataset via MQTT with real IP addresses (streamed in chunks)"""
         try:
-            print(f"📂 Loading dataset: {filepath}")
-            df = pd.read_csv(filepath, header=None, names=COLUMNS)
-            
-            if limit:
-                df = df.head(limit)
-            
-            print(f"📊 Loaded {len(df)} samples")
+            print(f"📂 Streaming dataset: {filepath}")
             print(f"🚀 Sender IP: {self.my_real_ip} | Target IP: {self.target_ip}")
             print(f"🚀 Sending via MQTT...\n")
             
             sent_count = 0
             attack_count = 0
             
-            for idx, row in df.iterrows():
-                packet = {
-                    "src_ip": self.my_real_ip,  # Actual IP of this computer
-                    "dst_ip": self.target_ip,   # IP of the system running the website
-                    "protocol": row['protocol_type'],
-                    "service": row['service'],
-                    "flag": row['flag'],
-                    "src_bytes": float(row['src_bytes']),
-                    "dst_bytes": float(row['dst_bytes']),
-                    "length": float(row['src_bytes']) + float(row['dst_bytes']),
-                    "count": float(row['count']),
-                    "srv_count": float(row['srv_count']),
-                    "serror_rate": float(row['serror_rate']),
-                    "srv_serror_rate": float(row['srv_serror_rate']),
-                    "rerror_rate": float(row['rerror_rate']),
-                    "same_srv_rate": float(row['same_srv_rate']),
-                    "diff_srv_rate": float(row['diff_srv_rate']),
-                    "dst_host_count": float(row['dst_host_count']),
-                    "dst_host_srv_count": float(row['dst_host_srv_count']),
-                    "dst_host_same_srv_rate": float(row['dst_host_same_srv_rate']),
-                    "dst_host_diff_srv_rate": float(row['dst_host_diff_srv_rate']),
-                    "dst_host_same_src_port_rate": float(row['dst_host_same_src_port_rate']),
-                    "dst_host_srv_diff_host_rate": float(row['dst_host_srv_diff_host_rate']),
-                    "dst_host_serror_rate": float(row['dst_host_serror_rate']),
-                    "dst_host_srv_serror_rate": float(row['dst_host_srv_serror_rate']),
-                    "dst_host_rerror_rate": float(row['dst_host_rerror_rate']),
-                    "client": self.client_name,
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                self.client.publish(MQTT_TOPIC, json.dumps(packet))
-                sent_count += 1
-                
-                if row['label'] != 'normal':
-                    attack_count += 1
-                
-                if sent_count % 10 == 0:
-                    print(f"[{self.client_name}] Sent {sent_count} packets ({attack_count} attacks)")
-                
-                time.sleep(interval)
+            for chunk in iter_kdd_chunks(filepath, offset=offset, limit=limit):
+                for idx, row in chunk.iterrows():
+                    packet = {
+                        "src_ip": self.my_real_ip,  # Actual IP of this computer
+                        "dst_ip": self.target_ip,   # IP of the system running the website
+                        "protocol": row['protocol_type'],
+                        "service": row['service'],
+                        "flag": row['flag'],
+                        "src_bytes": float(row['src_bytes']),
+                        "dst_bytes": float(row['dst_bytes']),
+                        "length": float(row['src_bytes']) + float(row['dst_bytes']),
+                        "count": float(row['count']),
+                        "srv_count": float(row['srv_count']),
+                        "serror_rate": float(row['serror_rate']),
+                        "srv_serror_rate": float(row['srv_serror_rate']),
+                        "rerror_rate": float(row['rerror_rate']),
+                        "same_srv_rate": float(row['same_srv_rate']),
+                        "diff_srv_rate": float(row['diff_srv_rate']),
+                        "dst_host_count": float(row['dst_host_count']),
+                        "dst_host_srv_count": float(row['dst_host_srv_count']),
+                        "dst_host_same_srv_rate": float(row['dst_host_same_srv_rate']),
+                        "dst_host_diff_srv_rate": float(row['dst_host_diff_srv_rate']),
+                        "dst_host_same_src_port_rate": float(row['dst_host_same_src_port_rate']),
+                        "dst_host_srv_diff_host_rate": float(row['dst_host_srv_diff_host_rate']),
+                        "dst_host_serror_rate": float(row['dst_host_serror_rate']),
+                        "dst_host_srv_serror_rate": float(row['dst_host_srv_serror_rate']),
+                        "dst_host_rerror_rate": float(row['dst_host_rerror_rate']),
+                        "client": self.client_name,
+                        "timestamp": datetime.now().isoformat()
+                    }
+                    
+                    self.client.publish(MQTT_TOPIC, json.dumps(packet))
+                    sent_count += 1
+                    
+                    if row['label'] != 'normal':
+                        attack_count += 1
+                    
+                    if sent_count % 10 == 0:
+                        print(f"[{self.client_name}] Sent {sent_count} packets ({attack_count} attacks)")
+                    
+                    time.sleep(interval)
             
             print(f"\n✅ Complete! Sent {sent_count} packets ({attack_count} attacks)")
         
@@ -157,6 +253,184 @@ class KDDMQTTSender:
         except Exception as e:
             print(f"❌ Error: {e}")
 
+    def send_load_test(self, filepath, rate, limit=None, offset=0, duration=None, qos=0,
+                       latency_sample=100, shard=None, src_ips=None, on_progress=None, verbose=True,
+                       envelope_size=1, envelope_delay=0.05, codec='zlib'):
+        """
+        High-throughput load generation for capacity testing
+        
+        The file is streamed in chunks; each chunk is serialized in one
+        vectorized pass on a background thread (a couple of chunks ahead) and
+        published on a fixed schedule of `rate` packets/s. Runs through the dataset once, or cycles it for
+        `duration` seconds. Memory stays constant regardless of file size.
+        
+        shard: optional (index, count) to send only this client's share of rows
+        src_ips: optional list of source IPs to cycle through instead of this machine's IP
+        on_progress: optional callback(sent, attacks) invoked every ~5s instead of printing
+        envelope_size: >1 packs up to this many packets per MQTT message (see
+            backend/mqtt/envelope.py), flushed early after `envelope_delay` seconds
+        codec: envelope compression, 'none', 'zlib' or 'zstd'
+        
+        Returns a summary dict (includes MQTT messages/s and bytes/s).
+        """
+        if verbose:
+            print(f"📂 Streaming dataset: {filepath}")
+            total_text = f"{int(rate * duration)} packets" if duration else "dataset"
+            print(f"🚀 Load test: {total_text} at {rate}/s (QoS {qos}) → {MQTT_TOPIC}\n")
+        
+        read_kwargs = {'offset': offset, 'limit': limit, 'shard': shard}
+        chunks = cycle_kdd_chunks(filepath, **read_kwargs) if duration else iter_kdd_chunks(filepath, **read_kwargs)
+        
+        def batches():
+            for chunk in chunks:
+                chunk_ips = self.my_real_ip
+                if src_ips is not None:
+                    chunk_ips = np.resize(np.asarray(src_ips), len(chunk))
+                yield build_payloads(chunk, chunk_ips, self.target_ip, self.client_name)
+        
+        total = int(rate * duration) if duration else None
+        batcher = None
+        if envelope_size > 1:
+            batcher = EnvelopeBatcher(lambda envelope: self.client.publish(MQTT_TOPIC, envelope, qos=qos),
+                                      max_count=envelope_size, max_delay=envelope_delay,
+                                      codec=CODECS[codec])
+            if verbose:
+                print(f"📦 Envelopes: up to {envelope_size} packets / {envelope_delay * 1000:.0f}ms, codec {codec}\n")
+        return self._publish_paced(prefetch(batches()), rate, total, qos, latency_sample, on_progress, verbose, batcher)
+    
+    def _publish_paced(self, batches, rate, total, qos, latency_sample, on_progress, verbose, batcher=None):
+        """
+        Publish pre-serialized (payloads, is_attack) batches at `rate`, up to `total` (None = all)
+        
+        With a batcher, packets are paced the same way but go out packed into envelopes.
+        """
+        with self._latency_lock:
+            self._published_at.clear()
+            self._acked_at.clear()
+        
+        if batcher is None:
+            message_bytes = [0]
+            
+            def publish_one(payload):
+                message_bytes[0] += len(payload)
+                return self.client.publish(MQTT_TOPIC, payload, qos=qos)
+        else:
+            publish_one = batcher.add
+        
+        pacer = Pacer(rate)
+        sent_count = 0
+        attack_count = 0
+        message_count = 0
+        next_report = rate * 5
+        info = None
+        start = time.perf_counter()
+        
+        for payloads, is_attack in batches:
+            i = 0
+            n_payloads = len(payloads)
+            while i < n_payloads:
+                want = n_payloads - i
+                if total is not None:
+                    want = min(want, total - sent_count)
+                    if want <= 0:
+                        break
+                permits = pacer.consume(want)
+                for j in range(i, i + permits):
+                    published = publish_one(payloads[j])
+                    if published is not None:
+                        info = published
+                        if message_count % latency_sample == 0:
+                            with self._latency_lock:
+                                self._published_at[info.mid] = time.perf_counter()
+                        message_count += 1
+                    if is_attack[j]:
+                        attack_count += 1
+                    sent_count += 1
+                i += permits
+                
+                if batcher is not None:
+                    published = batcher.poll()
+                    if published is not None:
+                        info = published
+                        message_count += 1
+                
+                if sent_count >= next_report:
+                    if on_progress:
+                        on_progress(sent_count, attack_count)
+                    else:
+                        elapsed = time.perf_counter() - start
+                        print(f"[{self.client_name}] Sent {sent_count} packets | {sent_count / elapsed:,.0f}/s")
+                    next_report += rate * 5
+            
+            if total is not None and sent_count >= total:
+                break
+        
+        if batcher is not None:
+            published = batcher.flush()
+            if published is not None:
+                info = published
+                message_count += 1
+        publish_elapsed = time.perf_counter() - start
+        total_bytes = message_bytes[0] if batcher is None else batcher.bytes
+        
+        # Let paho flush its outgoing queue before reporting
+        flush_deadline = time.time() + 30
+        while info is not None and not info.is_published() and time.time() < flush_deadline:
+            time.sleep(0.01)
+        
+        with self._latency_lock:
+            latencies_ms = np.array([
+                (self._acked_at[mid] - sent_at) * 1000
+                for mid, sent_at in self._published_at.items() if mid in self._acked_at
+            ])
+        
+        summary = {
+            'sent': sent_count,
+            'attacks': attack_count,
+            'target_rate': rate,
+            'achieved_rate': round(sent_count / publish_elapsed, 1) if publish_elapsed else 0.0,
+            'elapsed_s': round(publish_elapsed, 3),
+            'messages': message_count,
+            'bytes': total_bytes,
+            'messages_per_sec': round(message_count / publish_elapsed, 1) if publish_elapsed else 0.0,
+            'bytes_per_sec': round(total_bytes / publish_elapsed, 1) if publish_elapsed else 0.0,
+            'publish_latency_p50_ms': round(float(np.percentile(latencies_ms, 50)), 3) if len(latencies_ms) else None,
+            'publish_latency_p99_ms': round(float(np.percentile(latencies_ms, 99)), 3) if len(latencies_ms) else None,
+        }
+        
+        if verbose:
+            print(f"\n✅ Complete! Sent {sent_count} packets ({attack_count} attacks) in {publish_elapsed:.2f}s")
+            print(f"📈 Achieved rate: {summary['achieved_rate']:,}/s (target {rate}/s)")
+            print(f"📨 {message_count} MQTT messages ({summary['messages_per_sec']:,}/s) | "
+                  f"{total_bytes / 1e6:.2f} MB ({summary['bytes_per_sec'] / 1e6:.2f} MB/s)")
+            print(f"⏱️  Publish latency p50 {summary['publish_latency_p50_ms']}ms | "
+                  f"p99 {summary['publish_latency_p99_ms']}ms ({len(latencies_ms)} samples)")
+        return summary
+
+    def send_scenario(self, filepath, scenario, speed=1.0, qos=0):
+        """Replay a traffic scenario (see backend/traffic_scenarios.py) over MQTT"""
+        from traffic_scenarios import load_profile, compile_schedule, replay
+        
+        print(f"📂 Loading dataset: {filepath}")
+        df = read_kdd(filepath)
+        schedule = compile_schedule(load_profile(scenario), df['label'].to_numpy())
+        
+        print(f"📅 Scenario '{scenario}': {len(schedule)} packets over {schedule.duration:.0f}s "
+              f"(replayed at {speed}x)")
+        for stream, count in schedule.summary().items():
+            print(f"  • {stream:20} : {count:6} packets")
+        
+        payloads, _ = build_payloads(df.iloc[schedule.rows], self.my_real_ip,
+                                     self.target_ip, self.client_name)
+        
+        def publish(payload):
+            return self.client.publish(MQTT_TOPIC, payload, qos=qos).rc == mqtt.MQTT_ERR_SUCCESS
+        
+        result = replay(schedule, payloads, publish, speed=speed)
+        print(f"\n✅ Complete! Sent {result['sent']} packets ({result['failed']} failed) "
+              f"in {result['elapsed_s']}s, max lag {result['max_lag_ms']}ms")
+        return result
+
 def main():
     parser = argparse.ArgumentParser(
         description="Send KDD Dataset via MQTT to Central Backend"
@@ -165,6 +439,8 @@ def main():
                        help="KDD dataset file path")
     parser.add_argument("--limit", type=int, default=None, 
                        help="Limit number of packets to send")
+    parser.add_argument("--offset", type=int, default=0,
+                       help="Skip this many rows from the start of the file")
     parser.add_argument("--interval", type=float, default=0.1, 
                        help="Interval between packets (seconds)")
     parser.add_argument("--name", type=str, default="Client-1", 
@@ -174,6 +450,24 @@ def main():
     # Added target IP argument
     parser.add_argument("--target", type=str, default="127.0.0.1", 
                        help="IP address of the system running the website dashboard")
+    parser.add_argument("--rate", type=float, default=None,
+                       help="Load-test mode: target packets/s (absolute schedule that catches up after stalls, "
+                            "payloads pre-serialized)")
+    parser.add_argument("--duration", type=float, default=None,
+                       help="Load-test mode: cycle the dataset for this many seconds")
+    parser.add_argument("--qos", type=int, default=0, choices=[0, 1, 2],
+                       help="Load-test mode: MQTT QoS level")
+    parser.add_argument("--envelope-size", type=int, default=1,
+                       help="Load-test mode: pack up to N packets per MQTT message (1 = one packet per message)")
+    parser.add_argument("--envelope-delay", type=float, default=0.05,
+                       help="Load-test mode: flush a partial envelope after this many seconds")
+    parser.add_argument("--codec", type=str, default="zlib", choices=sorted(CODECS),
+                       help="Load-test mode: envelope compression")
+    parser.add_argument("--scenario", type=str, default=None,
+                       help="Replay a traffic scenario: built-in name (dos_burst, probe_trickle, "
+                            "diurnal, mixed) or JSON profile path")
+    parser.add_argument("--speed", type=float, default=1.0,
+                       help="Scenario time dilation (2 = twice as fast)")
     
     args = parser.parse_args()
     
@@ -185,11 +479,32 @@ def main():
         return
     
     try:
-        sender.send_kdd_dataset(
-            filepath=args.file,
-            limit=args.limit,
-            interval=args.interval
-        )
+        if args.scenario:
+            sender.send_scenario(
+                filepath=args.file,
+                scenario=args.scenario,
+                speed=args.speed,
+                qos=args.qos
+            )
+        elif args.rate:
+            sender.send_load_test(
+                filepath=args.file,
+                rate=args.rate,
+                limit=args.limit,
+                offset=args.offset,
+                duration=args.duration,
+                qos=args.qos,
+                envelope_size=args.envelope_size,
+                envelope_delay=args.envelope_delay,
+                codec=args.codec
+            )
+        else:
+            sender.send_kdd_dataset(
+                filepath=args.file,
+                limit=args.limit,
+                offset=args.offset,
+                interval=args.interval
+            )
     except KeyboardInterrupt:
         print("\n\nInterrupted by user")
     finally:
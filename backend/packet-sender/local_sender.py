@@ -2,31 +2,24 @@
 Local Packet Sender via HTTP (bypass MQTT)
 Reads KDD test data and sends via HTTP to the backend
 """
-import requests
-import pandas as pd
+import os
+import sys
 import json
 import time
 import argparse
 import random
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from http_sender import HttpSender
+from kdd_reader import KDD_COLUMNS, iter_kdd_chunks
+
 # Backend config (local)
 BACKEND_URL = "http://localhost:5000/api/inject-packet"
+BACKEND_BATCH_URL = "http://localhost:5000/api/inject-batch"
 
 # KDD Dataset columns
-COLUMNS = [
-    'duration','protocol_type','service','flag','src_bytes','dst_bytes','land',
-    'wrong_fragment','urgent','hot','num_failed_logins','logged_in',
-    'num_compromised','root_shell','su_attempted','num_root',
-    'num_file_creations','num_shells','num_access_files','num_outbound_cmds',
-    'is_host_login','is_guest_login','count','srv_count','serror_rate',
-    'srv_serror_rate','rerror_rate','srv_rerror_rate','same_srv_rate',
-    'diff_srv_rate','srv_diff_host_rate','dst_host_count','dst_host_srv_count',
-    'dst_host_same_srv_rate','dst_host_diff_srv_rate',
-    'dst_host_same_src_port_rate','dst_host_srv_diff_host_rate',
-    'dst_host_serror_rate','dst_host_srv_serror_rate',
-    'dst_host_rerror_rate','dst_host_srv_rerror_rate','label','difficulty'
-]
+COLUMNS = KDD_COLUMNS
 
 # Fake IPs for visualization
 FAKE_IPS = [
@@ -40,27 +33,27 @@ def get_random_ips():
     dst = random.choice(TARGET_IPS)
     return src, dst
 
-def send_packet_data(filepath, limit=None, interval=0.1, client_name="Local-Sender"):
-    """Send KDD dataset packets via HTTP"""
+def send_packet_data(filepath, limit=None, interval=0.1, client_name="Local-Sender",
+                     concurrency=8, batch_size=1, offset=0):
+    """Send KDD dataset packets via HTTP (pooled keep-alive connections, concurrent requests)"""
+    sender = None
     try:
-        print(f"📂 Loading dataset: {filepath}")
-        df = pd.read_csv(filepath, header=None, names=COLUMNS)
-        
-        if limit:
-            df = df.head(limit)
+        print(f"📂 Streaming dataset: {filepath}")
+        target = BACKEND_BATCH_URL if batch_size > 1 else BACKEND_URL
+        print(f"🚀 Sending via HTTP to {target} ({concurrency} connections, batch size {batch_size})...\n")
         
-        print(f"📊 Loaded {len(df)} samples")
-        print(f"🚀 Sending via HTTP to {BACKEND_URL}...\n")
-        
-        sent_count = 0
+        sender = HttpSender(BACKEND_URL, concurrency=concurrency, batch_size=batch_size,
+                            batch_url=BACKEND_BATCH_URL)
+        submitted = 0
         attack_count = 0
         
-        for idx, row in df.iterrows():
+        for idx, row in (r for chunk in iter_kdd_chunks(filepath, offset=offset, limit=limit)
+                         for r in chunk.iterrows()):
             src_ip, dst_ip = get_random_ips()
             
             # Determine if attack or normal
-            is_attack = row['label'] != 'normal.'
-            attack_type = row['label'].replace('.', '').strip()
+            is_attack = row['label'] != 'normal'
+            attack_type = row['label'].strip()
             
             # Prepare packet payload
             packet = {
@@ -96,38 +89,47 @@ def send_packet_data(filepath, limit=None, interval=0.1, client_name="Local-Send
                 'dst_host_rerror_rate': float(row.get('dst_host_rerror_rate', 0)),
             }
             
-            # Send packet
-            try:
-                response = requests.post(BACKEND_URL, json=packet, timeout=5)
-                if response.status_code == 200:
-                    sent_count += 1
-                    if is_attack:
-                        attack_count += 1
-                    
-                    if sent_count % 10 == 0:
-                        print(f"✅ Sent {sent_count}/{len(df)} packets | Attacks: {attack_count}")
-                else:
-                    print(f"⚠️  Error sending packet: {response.status_code}")
-            except Exception as e:
-                print(f"❌ Failed to send packet: {e}")
+            # Queue packet (sent by the pool; responses are tallied in sender.stats())
+            sender.submit(packet)
+            submitted += 1
+            if is_attack:
+                attack_count += 1
+            
+            if submitted % 100 == 0:
+                stats = sender.stats()
+                print(f"✅ Sent {stats['sent']}/{submitted} packets | Failed: {stats['failed']} | "
+                      f"{stats['packets_per_sec']:.0f}/s")
             
-            time.sleep(interval)
+            if interval:
+                time.sleep(interval)
         
-        print(f"\n✅ Completed! Sent {sent_count} packets ({attack_count} attacks)")
-        print(f"📊 Attack rate: {(attack_count/sent_count*100):.1f}%")
+        stats = sender.close()
+        print(f"\n✅ Completed! Sent {stats['sent']} packets ({attack_count} attacks submitted) "
+              f"in {stats['elapsed_s']}s | {stats['packets_per_sec']:.0f} packets/s")
+        if stats['failed']:
+            print(f"⚠️  {stats['failed']} packets failed: {stats['errors']}")
+        if submitted:
+            print(f"📊 Attack rate: {(attack_count/submitted*100):.1f}%")
         
     except FileNotFoundError:
         print(f"❌ File not found: {filepath}")
     except Exception as e:
         print(f"❌ Error: {e}")
+    finally:
+        if sender:
+            sender.close()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Send KDD packets via HTTP')
     parser.add_argument('--name', default='Local-Sender', help='Client name')
     parser.add_argument('--file', required=True, help='KDD dataset file path')
     parser.add_argument('--limit', type=int, help='Limit number of packets to send')
-    parser.add_argument('--interval', type=float, default=0.1, help='Interval between packets (seconds)')
+    parser.add_argument('--offset', type=int, default=0, help='Skip this many rows from the start of the file')
+    parser.add_argument('--interval', type=float, default=0.1, help='Interval between packets (seconds, 0 = as fast as possible)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent keep-alive HTTP connections')
+    parser.add_argument('--batch-size', type=int, default=1, help='Packets per request (>1 uses /api/inject-batch)')
     
     args = parser.parse_args()
     
-    send_packet_data(args.file, args.limit, args.interval, args.name)
+    send_packet_data(args.file, args.limit, args.interval, args.name, args.concurrency, args.batch_size,
+                     args.offset)
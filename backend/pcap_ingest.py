@@ -0,0 +1,502 @@
+"""
+Offline pcap ingest
+Streams a capture file, reassembles TCP/UDP/ICMP connections into KDD
+connection records (duration, protocol_type, service, flag, src/dst bytes,
+land, wrong_fragment, urgent), derives the KDD window features and scores
+them with the IDS classifier in batches
+
+    cd backend
+    python pcap_ingest.py capture.pcap --output scored.csv
+    python pcap_ingest.py capture.pcap --inject          # send to a running backend instead
+
+Packets are read with scapy's RawPcapReader and decoded with struct, so no
+per-packet scapy objects are built. Memory is bounded by --max-connections
+(oldest idle connections are closed early), not by the capture size.
+"""
+import argparse
+import csv
+import heapq
+import itertools
+import socket
+import struct
+import sys
+import time
+from collections import OrderedDict, Counter
+
+from feature_engine import WindowFeatureEngine
+
+# Link-layer types
+DLT_EN10MB = 1
+DLT_RAW = 101
+DLT_LINUX_SLL = 113
+DLT_IPV4 = 228
+
+ETH_P_IP = 0x0800
+VLAN_TYPES = (0x8100, 0x88A8)
+
+PROTO_ICMP = 1
+PROTO_TCP = 6
+PROTO_UDP = 17
+PROTOCOL_NAMES = {PROTO_ICMP: 'icmp', PROTO_TCP: 'tcp', PROTO_UDP: 'udp'}
+
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+TCP_ACK = 0x10
+TCP_URG = 0x20
+
+# Responder port -> KDD service name
+TCP_SERVICES = {
+    7: 'echo', 9: 'discard', 11: 'systat', 13: 'daytime', 15: 'netstat', 20: 'ftp_data',
+    21: 'ftp', 22: 'ssh', 23: 'telnet', 25: 'smtp', 37: 'time', 42: 'name', 43: 'whois',
+    53: 'domain', 57: 'mtp', 70: 'gopher', 77: 'rje', 79: 'finger', 80: 'http', 84: 'ctf',
+    87: 'link', 95: 'supdup', 101: 'hostnames', 102: 'iso_tsap', 105: 'csnet_ns',
+    109: 'pop_2', 110: 'pop_3', 111: 'sunrpc', 113: 'auth', 117: 'uucp_path', 119: 'nntp',
+    137: 'netbios_ns', 138: 'netbios_dgm', 139: 'netbios_ssn', 143: 'imap4', 150: 'sql_net',
+    175: 'vmnet', 179: 'bgp', 194: 'IRC', 210: 'Z39_50', 389: 'ldap', 433: 'nnsp',
+    443: 'http_443', 512: 'exec', 513: 'login', 514: 'shell', 515: 'printer', 520: 'efs',
+    530: 'courier', 540: 'uucp', 543: 'klogin', 544: 'kshell', 6667: 'IRC', 8001: 'http_8001',
+}
+UDP_SERVICES = {53: 'domain_u', 69: 'tftp_u', 123: 'ntp_u'}
+ICMP_SERVICES = {0: 'ecr_i', 8: 'eco_i', 13: 'tim_i', 14: 'tim_i', 5: 'red_i', 3: 'urp_i'}
+
+# IP fragment position
+FRAG_NONE, FRAG_FIRST, FRAG_MIDDLE, FRAG_LAST = 0, 1, 2, 3
+
+_IPV4 = struct.Struct('!BBHHHBBH4s4s')
+_PORTS = struct.Struct('!HH')
+
+
+def parse_ipv4(frame, linktype):
+    """
+    Decode the headers we need from one raw frame
+
+    Returns (src, dst, proto, sport, dport, tcp_flags, payload_len, wrong_fragment,
+    ip_id, fragment) with addresses as 4-byte strings, or None for non-IPv4 /
+    truncated frames. fragment is FRAG_NONE, FRAG_FIRST, FRAG_MIDDLE or FRAG_LAST;
+    non-first fragments carry no ports (the tracker finds them by ip_id).
+    """
+    if linktype == DLT_EN10MB:
+        if len(frame) < 14:
+            return None
+        offset = 12
+        ethertype = (frame[offset] << 8) | frame[offset + 1]
+        while ethertype in VLAN_TYPES and len(frame) >= offset + 6:
+            offset += 4
+            ethertype = (frame[offset] << 8) | frame[offset + 1]
+        if ethertype != ETH_P_IP:
+            return None
+        offset += 2
+    elif linktype == DLT_LINUX_SLL:
+        if len(frame) < 16 or ((frame[14] << 8) | frame[15]) != ETH_P_IP:
+            return None
+        offset = 16
+    elif linktype in (DLT_RAW, DLT_IPV4):
+        offset = 0
+    else:
+        return None
+
+    if len(frame) < offset + 20 or frame[offset] >> 4 != 4:
+        return None
+    ver_ihl, _, total_len, ip_id, frag, _, proto, _, src, dst = _IPV4.unpack_from(frame, offset)
+    if proto not in PROTOCOL_NAMES:
+        return None
+    ihl = (ver_ihl & 0x0F) * 4
+    frag_offset = (frag & 0x1FFF) * 8
+    more_fragments = frag & 0x2000
+    ip_payload = total_len - ihl
+    # Overlapping/oversized fragments (teardrop, ping of death style)
+    wrong_fragment = int(frag_offset + ip_payload > 65535
+                         or (more_fragments and ip_payload % 8 != 0))
+
+    if frag_offset:
+        fragment = FRAG_MIDDLE if more_fragments else FRAG_LAST
+    else:
+        fragment = FRAG_FIRST if more_fragments else FRAG_NONE
+
+    l4 = offset + ihl
+    sport = dport = flags = 0
+    payload = ip_payload
+    if frag_offset:
+        pass  # Non-first fragment: no transport header, the tracker attributes it by ip_id
+    elif proto == PROTO_TCP and len(frame) >= l4 + 14:
+        sport, dport = _PORTS.unpack_from(frame, l4)
+        payload = ip_payload - (frame[l4 + 12] >> 4) * 4
+        flags = frame[l4 + 13]
+    elif proto == PROTO_UDP and len(frame) >= l4 + 4:
+        sport, dport = _PORTS.unpack_from(frame, l4)
+        payload = ip_payload - 8
+    elif proto == PROTO_ICMP and len(frame) >= l4 + 8:
+        icmp_type = frame[l4]
+        if icmp_type in (0, 8, 13, 14):
+            # Echo/timestamp request and reply share the identifier
+            ident = (frame[l4 + 4] << 8) | frame[l4 + 5]
+            sport = dport = ident
+        else:
+            sport, dport = icmp_type, frame[l4 + 1]
+        flags = icmp_type
+        payload = ip_payload - 8
+    return src, dst, proto, sport, dport, flags, max(payload, 0), wrong_fragment, ip_id, fragment
+
+
+class _Connection:
+    __slots__ = ('key', 'proto', 'first', 'last', 'orig_bytes', 'resp_bytes', 'wrong_fragment',
+                 'urgent', 'state', 'first_flags', 'closed', 'queue')
+
+    # TCP state bits
+    ORIG_SYN, RESP_SYNACK, ORIG_FIN, RESP_FIN, ORIG_RST, RESP_RST = 1, 2, 4, 8, 16, 32
+
+    def __init__(self, key, proto, ts, first_flags):
+        self.key = key
+        self.proto = proto
+        self.first = ts
+        self.last = ts
+        self.orig_bytes = 0
+        self.resp_bytes = 0
+        self.wrong_fragment = 0
+        self.urgent = 0
+        self.state = 0
+        self.first_flags = first_flags
+        self.closed = False
+        self.queue = None  # timeout class the tracker queues it in
+
+    def kdd_flag(self):
+        """Bro/KDD connection status from the TCP handshake/teardown seen"""
+        if self.proto != PROTO_TCP:
+            return 'SF'
+        s = self.state
+        if not s & (self.ORIG_SYN | self.RESP_SYNACK):
+            return 'OTH'
+        if not s & self.RESP_SYNACK:
+            if s & self.RESP_RST:
+                return 'REJ'
+            if s & self.ORIG_RST:
+                return 'RSTOS0'
+            if s & self.ORIG_FIN:
+                return 'SH'
+            return 'S0'
+        if s & self.ORIG_RST:
+            return 'RSTO'
+        if s & self.RESP_RST:
+            return 'RSTR'
+        if s & self.ORIG_FIN and s & self.RESP_FIN:
+            return 'SF'
+        if s & self.ORIG_FIN:
+            return 'S2'
+        if s & self.RESP_FIN:
+            return 'S3'
+        return 'S1'
+
+    def service(self):
+        src, dst, proto, sport, dport = self.key
+        if proto == PROTO_TCP:
+            return TCP_SERVICES.get(dport, 'private' if dport < 1024 else 'other')
+        if proto == PROTO_UDP:
+            return UDP_SERVICES.get(dport, 'private' if dport < 1024 else 'other')
+        return ICMP_SERVICES.get(self.first_flags, 'oth_i')
+
+    def record(self):
+        src, dst, proto, sport, dport = self.key
+        src_ip, dst_ip = socket.inet_ntoa(src), socket.inet_ntoa(dst)
+        return {
+            'ts': self.first,
+            'src_ip': src_ip,
+            'src_port': sport,
+            'dst_ip': dst_ip,
+            'dst_port': dport,
+            'duration': int(self.last - self.first),
+            'protocol_type': PROTOCOL_NAMES[proto],
+            'service': self.service(),
+            'flag': self.kdd_flag(),
+            'src_bytes': self.orig_bytes,
+            'dst_bytes': self.resp_bytes,
+            'land': int(src == dst and sport == dport),
+            'wrong_fragment': self.wrong_fragment,
+            'urgent': self.urgent,
+        }
+
+
+class ConnectionTracker:
+    """
+    Groups packets into bidirectional connections and emits KDD records when a
+    connection closes, times out or is evicted to respect max_connections
+
+    Connections are queued per timeout class (open TCP, closed TCP, UDP, ICMP),
+    least recently seen first, so every queue expires from its head and a
+    short-lived UDP flow never waits behind an older open TCP connection.
+    """
+
+    def __init__(self, tcp_timeout=60.0, udp_timeout=10.0, close_linger=1.0, max_connections=100000):
+        self.timeouts = {'tcp': tcp_timeout, 'tcp_closed': close_linger,
+                         'udp': udp_timeout, 'icmp': udp_timeout}
+        self.max_connections = max_connections
+        self._active = {}  # key -> _Connection
+        self._queues = {name: OrderedDict() for name in self.timeouts}  # class -> key -> _Connection
+        self._starts = []  # lazy min-heap of (start ts, seq, _Connection) for oldest_start()
+        self._seq = itertools.count()
+        # (src, dst, proto, ip_id) -> ports of the first fragment, until the last one arrives
+        self._fragments = OrderedDict()
+        self.evicted = 0
+        self.orphan_fragments = 0  # non-first fragments whose first fragment was never seen
+
+    def add(self, ts, parsed):
+        """Account one parsed packet; returns a list of finished connection records"""
+        src, dst, proto, sport, dport, flags, payload, wrong_fragment, ip_id, fragment = parsed
+        if fragment != FRAG_NONE:
+            frag_key = (src, dst, proto, ip_id)
+            if fragment == FRAG_FIRST:
+                self._fragments[frag_key] = (sport, dport)
+                if len(self._fragments) > self.max_connections:
+                    self._fragments.popitem(last=False)
+            else:
+                ports = (self._fragments.pop(frag_key, None) if fragment == FRAG_LAST
+                         else self._fragments.get(frag_key))
+                if ports is None:
+                    self.orphan_fragments += 1
+                    return []
+                sport, dport = ports
+        key = (src, dst, proto, sport, dport)
+        conn = self._active.get(key)
+        from_orig = True
+        if conn is None:
+            reverse = (dst, src, proto, dport, sport)
+            conn = self._active.get(reverse)
+            if conn is not None:
+                key, from_orig = reverse, False
+        if conn is None:
+            conn = self._active[key] = _Connection(key, proto, ts, flags)
+            heapq.heappush(self._starts, (ts, next(self._seq), conn))
+
+        conn.last = ts
+        conn.wrong_fragment += wrong_fragment
+        if from_orig:
+            conn.orig_bytes += payload
+        else:
+            conn.resp_bytes += payload
+
+        if proto == PROTO_TCP:
+            if flags & TCP_URG:
+                conn.urgent += 1
+            if flags & TCP_SYN:
+                if flags & TCP_ACK and not from_orig:
+                    conn.state |= _Connection.RESP_SYNACK
+                elif from_orig:
+                    conn.state |= _Connection.ORIG_SYN
+            if flags & TCP_FIN:
+                conn.state |= _Connection.ORIG_FIN if from_orig else _Connection.RESP_FIN
+            if flags & TCP_RST:
+                conn.state |= _Connection.ORIG_RST if from_orig else _Connection.RESP_RST
+            done = _Connection.ORIG_FIN | _Connection.RESP_FIN
+            conn.closed = (conn.state & done) == done or bool(flags & TCP_RST)
+        self._requeue(conn)
+
+        finished = []
+        if len(self._active) > self.max_connections:
+            # Least recently seen overall is the oldest of the queue heads
+            heads = [next(iter(queue.values())) for queue in self._queues.values() if queue]
+            oldest = min((head for head in heads if head is not conn), key=lambda c: c.last)
+            del self._queues[oldest.queue][oldest.key]
+            del self._active[oldest.key]
+            self.evicted += 1
+            finished.append(oldest.record())
+        return finished
+
+    def _requeue(self, conn):
+        """Move conn to the tail of the queue for its (possibly new) timeout class"""
+        if conn.proto == PROTO_TCP:
+            queue = 'tcp_closed' if conn.closed else 'tcp'
+        else:
+            queue = PROTOCOL_NAMES[conn.proto]
+        if conn.queue is not None:
+            del self._queues[conn.queue][conn.key]
+        conn.queue = queue
+        self._queues[queue][conn.key] = conn
+
+    def expire(self, now):
+        """Records for connections idle past their timeout (or closed and lingered)"""
+        finished = []
+        for name, queue in self._queues.items():
+            timeout = self.timeouts[name]
+            while queue:
+                conn = next(iter(queue.values()))
+                if now - conn.last < timeout:
+                    break
+                queue.popitem(last=False)
+                del self._active[conn.key]
+                finished.append(conn.record())
+        return finished
+
+    def flush(self):
+        """Records for every connection still open (end of capture)"""
+        finished = [conn.record() for conn in self._active.values()]
+        self._active.clear()
+        for queue in self._queues.values():
+            queue.clear()
+        self._starts.clear()
+        return finished
+
+    def oldest_start(self):
+        """Start time of the oldest connection still open (None if there is none)"""
+        starts = self._starts
+        active = self._active
+        if len(starts) > 2 * len(active) + 1024:
+            # Entries of finished connections only leave the heap from the top; compact
+            starts[:] = [entry for entry in starts if active.get(entry[2].key) is entry[2]]
+            heapq.heapify(starts)
+        while starts and active.get(starts[0][2].key) is not starts[0][2]:
+            heapq.heappop(starts)
+        return starts[0][0] if starts else None
+
+    def __len__(self):
+        return len(self._active)
+
+
+def iter_connections(filepath, tracker=None, stats=None):
+    """
+    Stream KDD connection records (with window features) out of a pcap/pcapng file
+
+    Connections finish in close order but window features are defined over
+    start times, so finished records wait in a heap until no open connection
+    started before them and are fed to the engine in start order (at most
+    max_connections wait; beyond that the earliest go out regardless).
+    """
+    from scapy.utils import RawPcapReader
+
+    tracker = tracker or ConnectionTracker()
+    engine = WindowFeatureEngine()
+    stats = stats if stats is not None else Counter()
+    next_sweep = None
+    pending = []  # (start ts, seq, record) finished but not yet released
+    seq = itertools.count()
+
+    def finish(records, final=False):
+        for record in records:
+            heapq.heappush(pending, (record['ts'], next(seq), record))
+        watermark = None if final else tracker.oldest_start()
+        while pending and (watermark is None or pending[0][0] <= watermark
+                           or len(pending) > tracker.max_connections):
+            _, _, record = heapq.heappop(pending)
+            record.update(engine.update(record, record['ts']))
+            yield record
+
+    # scapy 2.5's RawPcapReader is not a context manager
+    reader = RawPcapReader(filepath)
+    try:
+        file_linktype = getattr(reader, 'linktype', DLT_EN10MB)
+        for frame, meta in reader:
+            stats['packets'] += 1
+            if hasattr(meta, 'sec'):
+                ts = meta.sec + meta.usec / 1e6
+                linktype = file_linktype
+            else:  # pcapng: timestamp and link type are per packet
+                ts = ((meta.tshigh << 32) | meta.tslow) / meta.tsresol
+                linktype = meta.linktype
+            parsed = parse_ipv4(frame, linktype)
+            if parsed is None:
+                stats['skipped'] += 1
+                continue
+            yield from finish(tracker.add(ts, parsed))
+            if next_sweep is None or ts >= next_sweep:
+                yield from finish(tracker.expire(ts))
+                next_sweep = ts + 1.0
+    finally:
+        reader.close()
+    yield from finish(tracker.flush(), final=True)
+    stats['evicted'] = tracker.evicted
+    stats['orphan_fragments'] = tracker.orphan_fragments
+
+
+def to_payload(record):
+    """Connection record in the shape the backend's ingest path expects"""
+    payload = dict(record)
+    payload['protocol'] = payload.pop('protocol_type')
+    payload['length'] = record['src_bytes'] + record['dst_bytes']
+    payload['client'] = 'pcap-ingest'
+    return payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a pcap capture with the IDS classifier")
+    parser.add_argument("pcap", help="pcap or pcapng capture file")
+    parser.add_argument("--batch-size", type=int, default=1024, help="Connections per classifier call")
+    parser.add_argument("--output", help="Write scored connection records to this CSV file")
+    parser.add_argument("--inject", action="store_true",
+                        help="Send records to a running backend (/api/inject-batch) instead of scoring locally")
+    parser.add_argument("--max-connections", type=int, default=100000,
+                        help="Open connections kept in memory; the least recently seen are closed early")
+    parser.add_argument("--tcp-timeout", type=float, default=60.0, help="Idle seconds before a TCP connection ends")
+    parser.add_argument("--udp-timeout", type=float, default=10.0,
+                        help="Idle seconds before a UDP/ICMP flow ends")
+    args = parser.parse_args()
+
+    tracker = ConnectionTracker(args.tcp_timeout, args.udp_timeout, max_connections=args.max_connections)
+    stats = Counter()
+    results = Counter()
+
+    if args.inject:
+        from http_sender import HttpSender
+        sender = HttpSender(batch_size=args.batch_size)
+    else:
+        from models.classifier import get_classifier
+        classifier = get_classifier()
+
+    writer = None
+    out = open(args.output, 'w', newline='') if args.output else None
+
+    def score(batch):
+        nonlocal writer
+        if args.inject:
+            for record in batch:
+                sender.submit(to_payload(record))
+            return
+        for record, result in zip(batch, classifier.classify_batch(batch)):
+            results[result['attack_type']] += 1
+            if out:
+                row = dict(record, attack_type=result['attack_type'],
+                           attack_category=result['category'], confidence=result['confidence'])
+                if writer is None:
+                    writer = csv.DictWriter(out, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow(row)
+
+    print(f"📂 Streaming capture: {args.pcap}")
+    start = time.perf_counter()
+    batch = []
+    connections = 0
+    try:
+        for record in iter_connections(args.pcap, tracker, stats):
+            batch.append(record)
+            connections += 1
+            if len(batch) >= args.batch_size:
+                score(batch)
+                batch = []
+            if connections % 100000 == 0:
+                elapsed = time.perf_counter() - start
+                print(f"  {stats['packets']:,} packets | {connections:,} connections | "
+                      f"{stats['packets'] / elapsed:,.0f} packets/s | {len(tracker):,} open")
+        if batch:
+            score(batch)
+    finally:
+        if out:
+            out.close()
+        if args.inject:
+            sender.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"\n✅ {stats['packets']:,} packets → {connections:,} connections in {elapsed:.2f}s "
+          f"({stats['packets'] / elapsed:,.0f} packets/s, {connections / elapsed:,.0f} connections/s)")
+    print(f"   skipped {stats['skipped']:,} non-IPv4 frames | {stats['evicted']:,} connections closed "
+          f"early by --max-connections | {stats['orphan_fragments']:,} fragments without a first fragment")
+    if args.inject:
+        print(f"📤 Injected: {sender.stats()}")
+    else:
+        print("\n📊 Predictions:")
+        for attack_type, count in results.most_common():
+            print(f"  {attack_type:20} : {count:8}")
+        if args.output:
+            print(f"💾 Scored records written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
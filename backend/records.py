@@ -0,0 +1,190 @@
+"""
+Compact detection records
+A classified packet used to be kept as `{**payload, ..., 'ml_features': {...}}`:
+two dicts of boxed floats and repeated strings, with the 20 model features
+stored twice (~3.8 KB per record). DetectionRecord keeps the same information
+in six slots (~0.3 KB):
+
+    - confidence, the 17 numeric model features, the timestamp and any other
+      float payload fields packed into one bytes object (float64)
+    - protocol/service/flag/attack type/category as one shared tuple of
+      interned strings, IPs interned
+    - payload fields that equal a model feature or slot are not stored again;
+      the record's layout (which keys go where) is a tuple shared by every
+      record with the same payload shape
+
+to_dict() rebuilds the enriched event (the network_logs / recent_attacks
+shape) only when it is serialized.
+"""
+import struct
+import sys
+from datetime import datetime, timedelta
+
+# Model features in the order the enriched event's ml_features lists them
+NUMERIC_FEATURES = (
+    'src_bytes', 'dst_bytes', 'count', 'srv_count', 'serror_rate', 'srv_serror_rate',
+    'rerror_rate', 'same_srv_rate', 'diff_srv_rate', 'dst_host_count', 'dst_host_serror_rate',
+    'dst_host_same_srv_rate', 'dst_host_diff_srv_rate', 'dst_host_same_src_port_rate',
+    'dst_host_srv_diff_host_rate', 'dst_host_srv_count', 'dst_host_rerror_rate',
+)
+_FEATURE_INDEX = {name: i for i, name in enumerate(NUMERIC_FEATURES)}
+_HEAD = 1 + len(NUMERIC_FEATURES)  # confidence + features lead every packed record
+_CONFIDENCE = struct.Struct('<d')
+
+# Payload keys rebuilt from the symbol tuple when the payload value matches
+_SYMBOL_INDEX = {'protocol': 0, 'service': 1, 'flag': 2}
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Shared tuples (symbols, layouts) and packers; bounded so odd traffic can't grow them forever
+_SHARED = {}
+_MAX_SHARED = 4096
+_STRUCTS = {}
+
+
+def _shared(value):
+    shared = _SHARED.get(value)
+    if shared is None:
+        if len(_SHARED) >= _MAX_SHARED:
+            return value
+        shared = _SHARED[value] = value
+    return shared
+
+
+def _packer(count):
+    packer = _STRUCTS.get(count)
+    if packer is None:
+        packer = _STRUCTS[count] = struct.Struct(f'<{count}d')
+    return packer
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _pack_timestamp(timestamp):
+    """Seconds since 1970 for naive isoformat() strings that round-trip exactly, else None"""
+    if type(timestamp) is not str:
+        return None
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    if moment.tzinfo is not None:
+        return None
+    seconds = (moment - _EPOCH) / timedelta(seconds=1)
+    return seconds if _unpack_timestamp(seconds) == timestamp else None
+
+
+def _unpack_timestamp(seconds):
+    return (_EPOCH + timedelta(seconds=seconds)).isoformat()
+
+
+class DetectionRecord:
+    """One classified packet; attribute access for the hot path, to_dict() for the wire"""
+    __slots__ = ('src_ip', 'dst_ip', '_symbols', '_numbers', '_layout', '_extras')
+
+    def __init__(self, data, features, classification, timestamp):
+        self.src_ip = _intern(data.get('src_ip', ''))
+        self.dst_ip = _intern(data.get('dst_ip', ''))
+        symbols = self._symbols = _shared((
+            _intern(features['protocol_type']), _intern(features['service']),
+            _intern(features['flag']), _intern(classification['attack_type']),
+            _intern(classification['category'])))
+        numbers = [float(classification['confidence'])]
+        numbers.extend(features.get(name, 0) for name in NUMERIC_FEATURES)
+
+        packed_ts = _pack_timestamp(timestamp)
+        if packed_ts is not None:
+            numbers.append(packed_ts)
+            extras = []
+        else:
+            extras = [timestamp]
+
+        derived, float_keys, other_keys = [], [], []
+        for key, value in data.items():
+            index = _FEATURE_INDEX.get(key)
+            if index is not None and type(value) is float and value == numbers[1 + index]:
+                derived.append(key)
+            elif key in _SYMBOL_INDEX and value == symbols[_SYMBOL_INDEX[key]]:
+                derived.append(key)
+            elif key in ('src_ip', 'dst_ip', 'timestamp') and value == (
+                    timestamp if key == 'timestamp' else getattr(self, key)):
+                derived.append(key)
+            elif type(value) is float:
+                float_keys.append(key)
+                numbers.append(value)
+            else:
+                other_keys.append(key)
+                extras.append(_intern(value))
+
+        self._numbers = _packer(len(numbers)).pack(*numbers)
+        self._layout = _shared((tuple(derived), tuple(float_keys), tuple(other_keys),
+                                packed_ts is not None))
+        self._extras = tuple(extras) if extras else ()
+
+    @property
+    def protocol(self):
+        return self._symbols[0]
+
+    @property
+    def service(self):
+        return self._symbols[1]
+
+    @property
+    def flag(self):
+        return self._symbols[2]
+
+    @property
+    def attack_type(self):
+        return self._symbols[3]
+
+    @property
+    def category(self):
+        return self._symbols[4]
+
+    @property
+    def is_attack(self):
+        return self._symbols[3] != 'normal'
+
+    @property
+    def confidence(self):
+        return _CONFIDENCE.unpack_from(self._numbers)[0]
+
+    def to_dict(self):
+        """The enriched event: original payload fields plus classification and ml_features"""
+        derived, float_keys, other_keys, packed_ts = self._layout
+        numbers = _packer(len(self._numbers) // 8).unpack(self._numbers)
+        symbols = self._symbols
+        extras = self._extras
+        if packed_ts:
+            timestamp = _unpack_timestamp(numbers[_HEAD])
+            rest = numbers[_HEAD + 1:]
+        else:
+            timestamp, extras = extras[0], extras[1:]
+            rest = numbers[_HEAD:]
+
+        ml_features = dict(zip(NUMERIC_FEATURES, numbers[1:_HEAD]))
+        ml_features['protocol_type'] = symbols[0]
+        ml_features['service'] = symbols[1]
+        ml_features['flag'] = symbols[2]
+
+        event = {}
+        for key in derived:
+            if key in _FEATURE_INDEX:
+                event[key] = ml_features[key]
+            elif key in _SYMBOL_INDEX:
+                event[key] = symbols[_SYMBOL_INDEX[key]]
+            elif key == 'timestamp':
+                event[key] = timestamp
+            else:
+                event[key] = getattr(self, key)
+        event.update(zip(float_keys, rest))
+        event.update(zip(other_keys, extras))
+        event['attack_type'] = symbols[3]
+        event['attack_category'] = symbols[4]
+        event['confidence'] = numbers[0]
+        event['is_attack'] = self.is_attack
+        event['timestamp'] = timestamp
+        event['ml_features'] = ml_features
+        return event
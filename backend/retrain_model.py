@@ -13,6 +13,8 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
 import joblib
 import os
+from config import DRIFT_REFERENCE_PATH
+from drift import build_reference
 
 print("\n" + "="*70)
 print("🔄 RETRAINING ML MODEL")
@@ -104,6 +106,8 @@ models_dir = os.path.join(os.path.dirname(__file__), 'models')
 joblib.dump(pipeline, os.path.join(models_dir, 'random_forest_intrusion_model.pkl'))
 joblib.dump(label_encoder, os.path.join(models_dir, 'label_encoder.pkl'))
 joblib.dump(selected_features, os.path.join(models_dir, 'selected_features.pkl'))
+# Training-data profile the live drift monitor compares against (drift.py)
+joblib.dump(build_reference(X_train, categorical_features), DRIFT_REFERENCE_PATH)
 
 print(f"✅ Model saved to: {models_dir}")
 print("="*70)
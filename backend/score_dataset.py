@@ -0,0 +1,218 @@
+"""
+Offline bulk scoring
+Scores whole dataset files (KDDTest-21, KDDTrain+, connection logs written by
+pcap_ingest.py --output) with the IDS classifier, without MQTT or HTTP
+
+    cd backend
+    python score_dataset.py packet-sender/KDDTest-21.txt --output scored.parquet
+    python score_dataset.py KDDTrain+.txt capture.csv --output scored.csv --workers 8
+
+Files are streamed in chunks (kdd_reader for headerless KDD files, pandas for
+CSVs with a header row) and only the model feature columns are parsed. Each
+chunk is classified in one vectorized call (IDSClassifier.classify_frame) on
+a process pool; at most 2 chunks per worker are in flight, so memory is
+bounded by --chunk-size, not the file. Predictions are written in input order.
+
+When the input has a `label` column the run ends with a confusion matrix and
+per-class precision/recall/F1, accumulated chunk by chunk.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from kdd_reader import DEFAULT_CHUNK_SIZE, KDD_DTYPES, iter_kdd_chunks
+
+FEATURE_COLUMNS = [
+    'src_bytes', 'same_srv_rate', 'flag', 'dst_host_serror_rate',
+    'srv_serror_rate', 'dst_host_same_srv_rate', 'diff_srv_rate',
+    'count', 'dst_host_srv_serror_rate', 'serror_rate',
+    'dst_host_same_src_port_rate', 'dst_host_srv_diff_host_rate',
+    'dst_bytes', 'dst_host_diff_srv_rate', 'protocol_type',
+    'dst_host_srv_count', 'service', 'srv_count', 'dst_host_count',
+    'dst_host_rerror_rate'
+]
+
+_classifier = None  # per worker process
+
+
+def _init_worker():
+    global _classifier
+    from models.classifier import get_classifier
+    _classifier = get_classifier()
+
+
+def score_chunk(source, chunk):
+    """Predictions for one chunk plus its (label, prediction) counts"""
+    attack_types, confidences = _classifier.classify_frame(chunk)
+    has_label = 'label' in chunk.columns
+    # Same columns for every file (label is empty where the input has none)
+    scored = pd.DataFrame({'source': source, 'row': chunk.index,
+                           'label': chunk['label'].to_numpy() if has_label else ''})
+    scored['attack_type'] = attack_types
+    scored['attack_category'] = scored['attack_type'].map(_classifier.attack_categories).fillna('Unknown')
+    scored['confidence'] = confidences
+    pairs = Counter()
+    if has_label:
+        pairs.update(scored.groupby(['label', 'attack_type']).size().to_dict())
+    return scored, pairs
+
+
+def iter_chunks(filepath, chunksize=DEFAULT_CHUNK_SIZE, limit=None):
+    """
+    Feature (and label) columns of a dataset file as DataFrame chunks
+
+    Headerless files are read as KDD/NSL-KDD; a first line naming the columns
+    (e.g. pcap_ingest.py output) is read as a regular CSV.
+    """
+    with open(filepath, newline='') as f:
+        header = f.readline().strip().split(',')
+    wanted = FEATURE_COLUMNS + ['label']
+    if 'protocol_type' not in header:
+        yield from iter_kdd_chunks(filepath, chunksize=chunksize, limit=limit, usecols=wanted)
+        return
+    usecols = [col for col in wanted if col in header]
+    reader = pd.read_csv(filepath, usecols=usecols, nrows=limit, chunksize=chunksize,
+                         dtype={col: KDD_DTYPES[col] for col in usecols})
+    with reader:
+        yield from reader
+
+
+class ResultWriter:
+    """Appends scored chunks to a .parquet (needs pyarrow) or .csv file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith('.parquet')
+        self._writer = None
+        self._header = True
+
+    def write(self, scored):
+        if not self.parquet:
+            scored.to_csv(self.path, mode='w' if self._header else 'a', header=self._header, index=False)
+            self._header = False
+            return
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow (pip install pyarrow), or use a .csv --output")
+        table = pa.Table.from_pandas(scored, preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def class_report(pairs):
+    """Rows of (class, precision, recall, f1, support) from (label, prediction) counts"""
+    classes = sorted({label for label, _ in pairs} | {predicted for _, predicted in pairs})
+    rows = []
+    for cls in classes:
+        true_positive = pairs.get((cls, cls), 0)
+        predicted = sum(count for (_, p), count in pairs.items() if p == cls)
+        support = sum(count for (label, _), count in pairs.items() if label == cls)
+        precision = true_positive / predicted if predicted else 0.0
+        recall = true_positive / support if support else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        rows.append((cls, precision, recall, f1, support))
+    return rows
+
+
+def print_metrics(pairs):
+    total = sum(pairs.values())
+    correct = sum(count for (label, predicted), count in pairs.items() if label == predicted)
+    print(f"\n🎯 Accuracy: {correct / total:.4f} ({correct:,}/{total:,})")
+
+    rows = class_report(pairs)
+    print("\n📊 Per-class metrics:")
+    print(f"  {'class':20} {'precision':>9} {'recall':>9} {'f1':>9} {'support':>9}")
+    for cls, precision, recall, f1, support in rows:
+        print(f"  {cls:20} {precision:9.4f} {recall:9.4f} {f1:9.4f} {support:9,}")
+
+    # Columns are numbered like the rows so the matrix stays narrow with many classes
+    classes = [row[0] for row in rows]
+    width = max(6, len(f"{max(pairs.values()):,}") + 1)
+    print("\n🔢 Confusion matrix (rows: label, columns: prediction):")
+    print("  " + " " * 24 + "".join(f"{i:>{width}}" for i in range(len(classes))))
+    for i, label in enumerate(classes):
+        cells = "".join(f"{pairs.get((label, predicted), 0):>{width},}" for predicted in classes)
+        print(f"  {i:>3} {label:20}{cells}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score dataset files offline with the IDS classifier")
+    parser.add_argument("files", nargs='+', help="KDD/NSL-KDD files or connection-log CSVs")
+    parser.add_argument("--output", help="Write predictions to this .parquet or .csv file")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Rows per classifier call")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Scoring processes (0 = score in this process)")
+    parser.add_argument("--limit", type=int, help="Score at most this many rows per file")
+    args = parser.parse_args()
+
+    writer = ResultWriter(args.output) if args.output else None
+    predictions = Counter()
+    pairs = Counter()
+    rows = 0
+
+    def collect(result):
+        nonlocal rows
+        scored, chunk_pairs = result
+        rows += len(scored)
+        predictions.update(scored['attack_type'].value_counts().to_dict())
+        pairs.update(chunk_pairs)
+        if writer:
+            writer.write(scored)
+
+    if args.workers:
+        pool = ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker)
+    else:
+        _init_worker()
+        pool = None
+
+    print(f"📂 Scoring {len(args.files)} file(s) with {args.workers or 'no'} worker process(es), "
+          f"{args.chunk_size:,} rows per chunk")
+    start = time.perf_counter()
+    in_flight = deque()
+    try:
+        for path in args.files:
+            read = 0
+            for chunk in iter_chunks(path, args.chunk_size, args.limit):
+                read += len(chunk)
+                if pool is None:
+                    collect(score_chunk(path, chunk))
+                    continue
+                in_flight.append(pool.submit(score_chunk, path, chunk))
+                if len(in_flight) >= 2 * args.workers:
+                    collect(in_flight.popleft().result())
+            print(f"  {path}: {read:,} rows read | {time.perf_counter() - start:.1f}s")
+        while in_flight:
+            collect(in_flight.popleft().result())
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if writer:
+            writer.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"\n✅ {rows:,} rows in {elapsed:.2f}s "
+          f"({rows / elapsed:,.0f} rows/s, {rows * 60 / elapsed:,.0f} rows/min)")
+    print("\n📊 Predictions:")
+    for attack_type, count in predictions.most_common():
+        print(f"  {attack_type:20} : {count:8}")
+    if pairs:
+        print_metrics(pairs)
+    if args.output:
+        print(f"\n💾 Predictions written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Delta-encoded dashboard stats
+Instead of the full counters after every packet, dashboards get one
+'stats_snapshot' (all counters plus a sequence number) when they connect and
+then 'stats_delta' events holding only what changed since the previous seq:
+
+    stats_snapshot  {"seq": 41, "total_packets": 1000, ..., "attack_distribution": {...}}
+    stats_delta     {"seq": 42, "total_packets": 1001, "classified_packets": 1001}
+    stats_delta     {"seq": 43, "attack_count": 6, "attack_distribution": {"neptune": 4}}
+
+Deltas are computed on one background tick every STATS_DELTA_INTERVAL
+seconds (start()), so ingest lanes never wait on the stream or merge every
+shard per packet. They carry absolute values (never increments), so applying
+one twice is harmless. A client that sees a seq other than last + 1 has
+missed an event and asks for a fresh snapshot with the 'stats_resync' event.
+"""
+import threading
+
+import metrics
+from config import STATS_DELTA_INTERVAL
+from log import get_logger, ErrorRateLimiter
+
+error_limiter = ErrorRateLimiter(get_logger('stats_stream'))
+
+
+class StatsStream:
+    """Tracks the last counters sent to dashboards and turns new counters into deltas"""
+
+    def __init__(self, source, interval=STATS_DELTA_INTERVAL):
+        self.source = source  # callable returning the current counters
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._last = None
+        self._stop = threading.Event()
+
+    def _diff(self, counters):
+        last = self._last
+        delta = {}
+        for field, value in counters.items():
+            if field == 'attack_distribution':
+                previous = last.get(field, {})
+                changed = {k: v for k, v in value.items() if previous.get(k) != v}
+                # A type can vanish when a cluster peer expires; report it as 0
+                changed.update((k, 0) for k in previous if k not in value)
+                if changed:
+                    delta[field] = changed
+            elif last.get(field) != value:
+                delta[field] = value
+        return delta
+
+    def publish(self, socketio):
+        """Emit the change since the last update as one stats_delta (nothing if unchanged)"""
+        with self._lock:
+            counters = self.source()
+            if self._last is None:
+                self._last = counters
+                return
+            delta = self._diff(counters)
+            if not delta:
+                return
+            self._seq += 1
+            self._last = counters
+            delta['seq'] = self._seq
+            # Emitting under the lock keeps seq order equal to send order (vs. resync snapshots)
+            socketio.emit('stats_delta', delta)
+        metrics.STATS_DELTAS.inc()
+
+    def start(self, socketio):
+        """publish() every `interval` seconds on a daemon thread"""
+        def run():
+            while not self._stop.wait(self.interval):
+                try:
+                    self.publish(socketio)
+                except Exception as e:
+                    # Keep ticking: one failed read or emit must not end the stream
+                    error_limiter.error('publish', "Error publishing stats delta", error=repr(e))
+        threading.Thread(target=run, name='stats-stream', daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self, resync=False):
+        """
+        Full counters as of the current seq (what a client applies deltas to)
+
+        resync=True re-reads the counters and starts a new seq, for changes that
+        deltas cannot express (e.g. a reset removing attack types).
+        """
+        with self._lock:
+            if self._last is None or resync:
+                self._last = self.source()
+                self._seq += 1
+            snapshot = dict(self._last, seq=self._seq)
+        metrics.STATS_SNAPSHOTS.inc()
+        return snapshot
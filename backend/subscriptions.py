@@ -0,0 +1,149 @@
+"""
+Socket.IO subscription filters
+Dashboard clients say which network_logs events they want (attacks only, a
+category, a source/destination IP, a minimum confidence, or none at all).
+Clients with identical filters share one Socket.IO room, and each event is
+emitted once per matching room, so filtered-out events are never serialized
+or sent.
+
+Filters are given as connection query parameters, e.g.
+    io("http://localhost:5000", { query: { attacks_only: "true", min_confidence: 80 } })
+or changed later with the 'subscribe' event (an empty filter means everything).
+"""
+import json
+import threading
+
+FILTER_KEYS = ('attacks_only', 'category', 'src_ip', 'dst_ip', 'min_confidence', 'logs')
+ROOM_PREFIX = 'logs:'
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def normalize_filter(raw):
+    """
+    Validated, canonical filter dict (only keys that actually filter)
+
+    Raises ValueError for unknown keys or bad values.
+    """
+    raw = raw or {}
+    if not isinstance(raw, dict):
+        raise ValueError(f"Filter must be an object, got {type(raw).__name__}")
+    unknown = set(raw) - set(FILTER_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown filter keys: {', '.join(sorted(unknown))}")
+
+    normalized = {}
+    if 'logs' in raw and str(raw['logs']).lower() == 'none':
+        return {'logs': 'none'}
+    if _as_bool(raw.get('attacks_only', False)):
+        normalized['attacks_only'] = True
+    if raw.get('category'):
+        categories = raw['category']
+        if isinstance(categories, str):
+            categories = categories.split(',')
+        normalized['category'] = sorted({c.strip() for c in categories if c.strip()})
+    for key in ('src_ip', 'dst_ip'):
+        if raw.get(key):
+            normalized[key] = str(raw[key]).strip()
+    if raw.get('min_confidence') not in (None, ''):
+        try:
+            normalized['min_confidence'] = float(raw['min_confidence'])
+        except (TypeError, ValueError):
+            raise ValueError(f"min_confidence must be a number, got {raw['min_confidence']!r}")
+    return normalized
+
+
+class LogFilter:
+    """Compiled filter; matches() runs once per room per event"""
+    __slots__ = ('attacks_only', 'categories', 'src_ip', 'dst_ip', 'min_confidence')
+
+    def __init__(self, normalized):
+        self.attacks_only = normalized.get('attacks_only', False)
+        self.categories = frozenset(normalized.get('category', ())) or None
+        self.src_ip = normalized.get('src_ip')
+        self.dst_ip = normalized.get('dst_ip')
+        self.min_confidence = normalized.get('min_confidence')
+
+    def matches(self, record):
+        """record: a DetectionRecord (see records.py)"""
+        if self.attacks_only and not record.is_attack:
+            return False
+        if self.categories is not None and record.category not in self.categories:
+            return False
+        if self.src_ip is not None and record.src_ip != self.src_ip:
+            return False
+        if self.dst_ip is not None and record.dst_ip != self.dst_ip:
+            return False
+        if self.min_confidence is not None and record.confidence < self.min_confidence:
+            return False
+        return True
+
+
+class SubscriptionRegistry:
+    """Maps Socket.IO sessions to filter rooms and events to the rooms that want them"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._session_room = {}  # sid -> room (None = no network_logs)
+        self._room_members = {}  # room -> member count
+        # (room, LogFilter) pairs; replaced wholesale so the hot path reads it without locking
+        self._routes = ()
+
+    @staticmethod
+    def room_for(normalized):
+        if normalized.get('logs') == 'none':
+            return None
+        return ROOM_PREFIX + json.dumps(normalized, sort_keys=True, separators=(',', ':'))
+
+    def subscribe(self, sid, raw):
+        """
+        Point a session at a new filter
+
+        Returns (old_room, new_room, normalized); the caller leaves/joins the
+        Socket.IO rooms. Raises ValueError for invalid filters.
+        """
+        normalized = normalize_filter(raw)
+        new_room = self.room_for(normalized)
+        with self._lock:
+            old_room = self._session_room.get(sid)
+            self._session_room[sid] = new_room
+            if old_room != new_room:
+                self._release(old_room)
+                if new_room is not None:
+                    self._room_members[new_room] = self._room_members.get(new_room, 0) + 1
+                self._rebuild()
+        return old_room, new_room, normalized
+
+    def disconnect(self, sid):
+        with self._lock:
+            self._release(self._session_room.pop(sid, None))
+            self._rebuild()
+
+    def _release(self, room):
+        if room is None or room not in self._room_members:
+            return
+        self._room_members[room] -= 1
+        if not self._room_members[room]:
+            del self._room_members[room]
+
+    def _rebuild(self):
+        self._routes = tuple(
+            (room, LogFilter(json.loads(room[len(ROOM_PREFIX):])))
+            for room in self._room_members
+        )
+
+    def rooms_for(self, record):
+        """Rooms whose filter accepts this detection record's network_logs event"""
+        return [room for room, log_filter in self._routes if log_filter.matches(record)]
+
+    def summary(self):
+        """Active filter rooms and their member counts"""
+        with self._lock:
+            return dict(self._room_members)
+
+
+subscriptions = SubscriptionRegistry()
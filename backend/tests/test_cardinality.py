@@ -0,0 +1,75 @@
+import pytest
+
+from cardinality import (HyperLogLog, WindowedCardinality, merge_into, merged_series,
+                         relative_error)
+
+MINUTE = 60 * 1_000_000  # a whole-minute timestamp
+
+
+def _sketch(values, p=12):
+    sketch = HyperLogLog(p)
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+def _values(n, start=0):
+    return [f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}' for i in range(start, start + n)]
+
+
+@pytest.mark.parametrize('n', [0, 10, 1000, 20000, 100000])
+def test_estimate_is_within_the_error_bound(n):
+    estimate = _sketch(_values(n)).count()
+    # 4 standard errors; values and hashes are fixed, so this is deterministic
+    assert abs(estimate - n) <= max(1, 4 * relative_error(12) * n)
+
+
+def test_duplicates_do_not_count():
+    assert _sketch(_values(500) * 5).count() == _sketch(_values(500)).count()
+
+
+def test_merge_is_the_union_without_double_counting():
+    left = _sketch(_values(30000))
+    right = _sketch(_values(30000, start=20000))
+    assert left.merge(right).registers == _sketch(_values(50000)).registers
+    with pytest.raises(ValueError, match="p=10"):
+        left.merge(HyperLogLog(10))
+
+
+def test_text_round_trip():
+    sketch = _sketch(_values(5000), p=10)
+    restored = HyperLogLog.from_text(sketch.to_text())
+    assert (restored.p, restored.registers) == (10, sketch.registers)
+    assert len(HyperLogLog().to_text()) < 100  # sparse sketches stay small
+
+
+def test_windowed_buckets_and_union():
+    windowed = WindowedCardinality(['src_ip'], minutes=3, hours=2, p=10)
+    for minute in range(5):
+        for value in _values(100, start=minute * 50):
+            windowed.add({'src_ip': value}, now=MINUTE + minute * 60)
+    now = MINUTE + 4 * 60 + 30
+    assert [b for b, _ in windowed.buckets('src_ip', 'minute')] == [
+        MINUTE // 60 + minute for minute in (2, 3, 4)]
+    assert len(windowed.buckets('src_ip', 'hour')) == 1
+    # Minute m holds values 50m..50m+99: minutes 3 and 4 hold 150..299, the hour 0..299
+    assert abs(windowed.union('src_ip', 90, now=now).count() - 150) <= 10
+    assert abs(windowed.series('src_ip', 'hour')[0]['distinct'] - 300) <= 15
+
+
+def test_merged_series_unions_lanes_bucket_by_bucket():
+    lanes = [WindowedCardinality(['src_ip'], p=10) for _ in range(2)]
+    single = WindowedCardinality(['src_ip'], p=10)
+    for i, value in enumerate(_values(2000)):
+        now = MINUTE + (i % 2) * 60
+        lanes[i // 2 % 2].add({'src_ip': value}, now=now)
+        lanes[1].add({'src_ip': value}, now=now)  # lane 1 sees every value again
+        single.add({'src_ip': value}, now=now)
+    assert merged_series(lanes, 'src_ip', 'minute') == single.series('src_ip', 'minute')
+
+
+def test_merge_into_keeps_unmatched_keys():
+    target = {1: _sketch(['a'], p=4)}
+    merge_into(target, {1: _sketch(['b'], p=4), 2: _sketch(['c'], p=4)})
+    assert sorted(target) == [1, 2]
+    assert target[1].registers == _sketch(['a', 'b'], p=4).registers
@@ -0,0 +1,121 @@
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from drift import DriftMonitor, build_reference, psi
+
+rng = np.random.default_rng(7)
+TRAINING = pd.DataFrame({
+    'src_bytes': rng.exponential(500, 5000),
+    'count': rng.integers(0, 100, 5000).astype(float),
+    'protocol_type': rng.choice(['tcp', 'udp', 'icmp'], 5000, p=[0.7, 0.2, 0.1]),
+})
+
+
+def _rows(src_bytes_scale=500, protocols=('tcp', 'udp', 'icmp'), shares=(0.7, 0.2, 0.1),
+          n=2000, seed=1):
+    rng = np.random.default_rng(seed)
+    return [{'src_bytes': float(b), 'count': float(c), 'protocol_type': str(p)}
+            for b, c, p in zip(rng.exponential(src_bytes_scale, n), rng.integers(0, 100, n),
+                               rng.choice(protocols, n, p=shares))]
+
+
+def _monitor(**kwargs):
+    kwargs = dict(dict(sample_rate=1.0, half_life=1e9, min_samples=100), **kwargs)
+    return DriftMonitor(build_reference(TRAINING, {'protocol_type'}), **kwargs)
+
+
+class FakeSocketIO:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, data):
+        self.events.append((event, data))
+
+
+def test_psi():
+    assert psi(np.array([0.5, 0.5]), np.array([0.5, 0.5])) == 0
+    expected = 0.2 * math.log(0.7 / 0.5) + -0.2 * math.log(0.3 / 0.5)
+    assert psi(np.array([0.5, 0.5]), np.array([0.7, 0.3])) == pytest.approx(expected)
+    assert math.isfinite(psi(np.array([0.5, 0.5, 0.0]), np.array([0.0, 0.5, 0.5])))
+
+
+def test_build_reference():
+    reference = build_reference(TRAINING, {'protocol_type'}, bins=10)
+    assert reference['rows'] == 5000
+    src_bytes = reference['numeric']['src_bytes']
+    assert len(src_bytes['edges']) == 9
+    assert src_bytes['expected'] == pytest.approx([0.1] * 10, abs=0.001)
+    protocols = reference['categorical']['protocol_type']
+    assert protocols['values'] == ['tcp', 'udp', 'icmp']
+    assert sum(protocols['expected']) == pytest.approx(1) and protocols['expected'][-1] == 0
+
+
+def test_matching_traffic_scores_low():
+    monitor = _monitor()
+    monitor.observe(_rows())
+    scores = monitor.scores()
+    assert set(scores) == {'src_bytes', 'count', 'protocol_type'}
+    assert all(score['psi'] < 0.1 and not score['drifting'] for score in scores.values())
+    assert scores['protocol_type']['ks'] is None
+    assert monitor.check() == []
+
+
+def test_shift_alerts_once_and_clears():
+    monitor = _monitor(half_life=500)
+    socketio = FakeSocketIO()
+    monitor.observe(_rows(src_bytes_scale=5000))
+    alerts = monitor.check(socketio)
+    assert [alert['feature'] for alert in alerts] == ['src_bytes']
+    assert alerts[0]['ks'] > 0.3
+    assert monitor.check(socketio) == []
+    assert socketio.events == [('drift_alert', alerts[0])]
+    assert monitor.snapshot()['drifting'] == ['src_bytes']
+
+    monitor.observe(_rows(n=10000, seed=2))  # older traffic decays away
+    assert monitor.check(socketio) == []
+    assert monitor.snapshot()['drifting'] == []
+
+
+def test_unseen_categories_fall_into_the_other_bin():
+    monitor = _monitor()
+    monitor.observe(_rows(protocols=('tcp', 'sctp'), shares=(0.5, 0.5)))
+    assert monitor.scores()['protocol_type']['drifting']
+
+
+def test_sampling_stride_spans_batches():
+    monitor = _monitor(sample_rate=0.1)
+    for _ in range(7):
+        monitor.observe(_rows(n=3))
+    assert monitor.snapshot()['sampled_packets'] == 3  # packets 0, 10 and 20 of 21
+
+
+def test_no_alerts_before_min_samples_or_without_reference():
+    monitor = _monitor(min_samples=5000)
+    monitor.observe(_rows(src_bytes_scale=5000))
+    assert monitor.check() == []
+    disabled = DriftMonitor(None)
+    disabled.observe(_rows(n=10))
+    assert disabled.check() == [] and disabled.snapshot()['enabled'] is False
+
+
+def test_concurrent_checks_alert_once():
+    monitor = _monitor()
+    monitor.observe(_rows(src_bytes_scale=5000))
+    socketio = FakeSocketIO()
+    barrier = threading.Barrier(8)
+
+    def check():
+        barrier.wait()
+        monitor.check(socketio)
+
+    threads = [threading.Thread(target=check) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [data['feature'] for _, data in socketio.events] == ['src_bytes']
+    assert len(monitor.snapshot()['alerts']) == 1
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from mqtt.envelope import (CODEC_NONE, CODEC_ZLIB, CODEC_ZSTD, HEADER, EnvelopeBatcher,
+                           EnvelopeError, decode_message, encode_envelope, zstandard)
+
+PACKETS = [{'src_ip': f'10.0.0.{i}', 'protocol': 'tcp', 'src_bytes': i} for i in range(50)]
+PAYLOADS = [json.dumps(packet) for packet in PACKETS]
+
+
+@pytest.mark.parametrize('codec', [CODEC_NONE, CODEC_ZLIB])
+def test_round_trip(codec):
+    assert decode_message(encode_envelope(PAYLOADS, codec)) == PACKETS
+
+
+@pytest.mark.skipif(zstandard is None, reason="zstandard not installed")
+def test_round_trip_zstd():
+    assert decode_message(encode_envelope(PAYLOADS, CODEC_ZSTD)) == PACKETS
+
+
+def test_plain_json_packet_is_still_accepted():
+    assert decode_message(PAYLOADS[0].encode()) == [PACKETS[0]]
+
+
+def test_count_mismatch_is_rejected():
+    envelope = bytearray(encode_envelope(PAYLOADS, CODEC_NONE))
+    envelope[6:10] = (len(PAYLOADS) + 1).to_bytes(4, 'big')
+    with pytest.raises(EnvelopeError, match="says 51 packets"):
+        decode_message(bytes(envelope))
+
+
+def test_unknown_version_and_truncated_header_are_rejected():
+    envelope = bytearray(encode_envelope(PAYLOADS, CODEC_NONE))
+    envelope[4] = 99
+    with pytest.raises(EnvelopeError, match="version 99"):
+        decode_message(bytes(envelope))
+    with pytest.raises(EnvelopeError, match="Truncated"):
+        decode_message(bytes(envelope[:HEADER.size - 1]))
+
+
+def test_batcher_flushes_on_count_and_on_delay():
+    published = []
+    batcher = EnvelopeBatcher(published.append, max_count=20, max_delay=0.0)
+    for payload in PAYLOADS[:45]:
+        batcher.add(payload)
+    assert len(published) == 2
+    batcher.poll()
+    assert [len(decode_message(envelope)) for envelope in published] == [20, 20, 5]
+    assert (batcher.envelopes, batcher.packets) == (3, 45)
+    assert batcher.bytes == sum(len(envelope) for envelope in published)
+    assert batcher.flush() is None
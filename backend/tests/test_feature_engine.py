@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+
+from feature_engine import WindowFeatureEngine
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _conn(dst_ip='10.0.0.2', service='http', flag='SF', src_port=None):
+    record = {'dst_ip': dst_ip, 'service': service, 'flag': flag}
+    if src_port is not None:
+        record['src_port'] = src_port
+    return record
+
+
+def test_time_window_counts_and_rates():
+    engine = WindowFeatureEngine(time_window=2.0)
+    engine.update(_conn(flag='S0'), ts=0.0)
+    engine.update(_conn(service='ftp', flag='REJ'), ts=0.5)
+    features = engine.update(_conn(), ts=1.0)
+    assert features['count'] == 3.0
+    assert features['serror_rate'] == 0.33
+    assert features['rerror_rate'] == 0.33
+    assert features['same_srv_rate'] == 0.67
+    assert features['diff_srv_rate'] == 0.33
+    assert features['srv_count'] == 2.0
+
+
+def test_time_window_expires_old_connections():
+    engine = WindowFeatureEngine(time_window=2.0)
+    engine.update(_conn(), ts=0.0)
+    engine.update(_conn(), ts=1.0)
+    features = engine.update(_conn(), ts=2.5)
+    assert features['count'] == 2.0
+    assert features['dst_host_count'] == 3.0  # connection window is not time-based
+
+
+def test_host_window_keeps_the_last_n_connections():
+    engine = WindowFeatureEngine(host_window=5)
+    for i in range(8):
+        features = engine.update(_conn(service='http' if i < 4 else 'ftp'), ts=i * 10.0)
+    assert features['dst_host_count'] == 5.0
+    assert features['dst_host_same_srv_rate'] == 0.8
+    assert features['dst_host_srv_count'] == 4.0
+
+
+def test_srv_diff_host_rate():
+    engine = WindowFeatureEngine()
+    engine.update(_conn(dst_ip='10.0.0.2'), ts=0.0)
+    features = engine.update(_conn(dst_ip='10.0.0.3'), ts=0.1)
+    assert features['srv_diff_host_rate'] == 0.5
+    assert features['dst_host_srv_diff_host_rate'] == 0.5
+
+
+def test_same_src_port_rate():
+    engine = WindowFeatureEngine()
+    engine.update(_conn(src_port=1234), ts=0.0)
+    engine.update(_conn(src_port=1234), ts=0.1)
+    features = engine.update(_conn(src_port=4321), ts=0.2)
+    assert features['dst_host_same_src_port_rate'] == 0.33
+    features = engine.update(_conn(src_port=1234), ts=0.3)
+    assert features['dst_host_same_src_port_rate'] == 0.75
+
+
+def test_missing_src_port_is_never_a_shared_port():
+    engine = WindowFeatureEngine(host_window=3)
+    for i in range(3):
+        assert engine.update(_conn(), ts=i)['dst_host_same_src_port_rate'] == 0.0
+    features = engine.update(_conn(src_port=1234), ts=3)
+    assert features['dst_host_same_src_port_rate'] == 0.33
+    for i in range(4, 10):
+        engine.update(_conn(), ts=i)
+    assert engine._host_conn.get('10.0.0.2').ports == {}
+
+
+def test_tracked_keys_are_bounded():
+    engine = WindowFeatureEngine(max_keys=10)
+    for i in range(50):
+        engine.update(_conn(dst_ip=f'10.0.1.{i}', service=f'svc{i}'), ts=i)
+    assert engine.tracked_keys() == {'hosts': 10, 'services': 10}
+
+
+def test_unknown_feature_engine_mode_fails_at_import():
+    env = dict(os.environ, FEATURE_ENGINE_MODE='sometimes')
+    result = subprocess.run([sys.executable, '-c', 'import config'], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True)
+    assert result.returncode != 0
+    assert "FEATURE_ENGINE_MODE must be auto, always or off" in result.stderr
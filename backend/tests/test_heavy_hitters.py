@@ -0,0 +1,70 @@
+import random
+from collections import Counter
+
+from heavy_hitters import SpaceSaving, merge_top
+
+
+def _stream(seed, n=20000):
+    """Zipf-like keys: a few heavy hitters over a long tail of spoofed sources"""
+    rng = random.Random(seed)
+    keys = [f'10.0.{i // 256}.{i % 256}' for i in range(2000)]
+    weights = [1 / (rank + 1) ** 1.2 for rank in range(len(keys))]
+    return rng.choices(keys, weights, k=n)
+
+
+def _summary(stream, capacity):
+    summary = SpaceSaving(capacity)
+    for key in stream:
+        summary.add(key)
+    return summary
+
+
+def test_exact_while_under_capacity():
+    stream = ['a'] * 5 + ['b'] * 3 + ['c']
+    summary = _summary(stream, capacity=10)
+    assert summary.counts() == {'a': (5, 0), 'b': (3, 0), 'c': (1, 0)}
+    assert summary.min_count() == 0
+    assert merge_top([summary], 2) == [('a', 5, 0), ('b', 3, 0)]
+
+
+def test_estimates_are_bounded_upper_bounds():
+    stream = _stream(seed=1)
+    true_counts = Counter(stream)
+    capacity = 100
+    summary = _summary(stream, capacity)
+    assert len(summary) == capacity
+    assert summary.total == len(stream)
+    for key, (count, error) in summary.counts().items():
+        assert count - error <= true_counts[key] <= count
+        assert error <= len(stream) / capacity
+    # Every key above total / capacity is guaranteed to be tracked
+    tracked = summary.counts()
+    for key, count in true_counts.items():
+        if count > len(stream) / capacity:
+            assert key in tracked
+
+
+def test_counts_stay_consistent_with_the_bucket_list():
+    summary = _summary(_stream(seed=2, n=5000), capacity=50)
+    counts = [count for count, _ in summary.counts().values()]
+    assert summary.min_count() == min(counts)
+    assert sum(counts) == summary.total
+
+
+def test_merge_top_bounds_the_union_of_lanes():
+    lanes = [_stream(seed) for seed in (3, 4, 5)]
+    true_counts = Counter(key for lane in lanes for key in lane)
+    summaries = [_summary(lane, capacity=100) for lane in lanes]
+    top = merge_top(summaries, 10)
+    assert len(top) == 10
+    assert [count for _, count, _ in top] == sorted((count for _, count, _ in top), reverse=True)
+    for key, count, error in top:
+        assert count - error <= true_counts[key] <= count
+    assert {key for key, _, _ in top[:3]} == {key for key, _ in true_counts.most_common(3)}
+
+
+def test_merge_top_adds_the_floor_of_summaries_missing_a_key():
+    full = _summary(['a', 'a', 'b', 'b', 'c', 'c'], capacity=3)
+    other = _summary(['d'] * 4, capacity=3)
+    assert full.min_count() == 2
+    assert merge_top([full, other], 4)[0] == ('d', 6, 2)
@@ -0,0 +1,123 @@
+import time
+
+from incidents import IncidentTracker
+from records import DetectionRecord
+
+T0 = 1_700_000_000.0
+
+
+def _record(src_ip='10.0.0.1', dst_ip='10.0.0.2', attack_type='neptune', confidence=90.0):
+    features = {'protocol_type': 'tcp', 'service': 'http', 'flag': 'S0'}
+    classification = {'attack_type': attack_type, 'category': 'DoS', 'confidence': confidence}
+    return DetectionRecord({'src_ip': src_ip, 'dst_ip': dst_ip}, features, classification,
+                           '2024-01-01T00:00:00')
+
+
+class FakeSocketIO:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, data, to=None):
+        self.events.append((event, data))
+
+    def take(self):
+        events, self.events = self.events, []
+        return {event: [(i['id'], i['count']) for i in data] for event, data in events}
+
+
+def test_only_the_first_detection_opens_an_incident():
+    tracker = IncidentTracker(window=30)
+    assert tracker.observe(_record(), now=T0)
+    assert not tracker.observe(_record(confidence=95.0), now=T0 + 0.5)
+    assert tracker.observe(_record(attack_type='smurf'), now=T0 + 0.6)
+    assert tracker.observe(_record(src_ip='10.0.0.9'), now=T0 + 0.7)
+
+    incident = tracker.snapshot('open')['incidents'][-1]
+    assert (incident['count'], incident['max_confidence'], incident['duration_s']) == (2, 95.0, 0.5)
+
+
+def test_peak_rate_is_the_busiest_second():
+    tracker = IncidentTracker()
+    for offset in (0.1, 0.2, 1.1, 1.2, 1.3, 1.4, 2.5):
+        tracker.observe(_record(), now=T0 + offset)
+    assert tracker.snapshot()['incidents'][0]['peak_rate'] == 4
+
+
+def test_sweep_batches_open_update_and_close():
+    tracker = IncidentTracker(window=30)
+    socketio = FakeSocketIO()
+    for _ in range(100):
+        tracker.observe(_record(), now=T0)
+    tracker.sweep(socketio, now=T0 + 1)
+    assert socketio.take() == {'incident_open': [(1, 100)]}
+
+    tracker.observe(_record(), now=T0 + 2)
+    tracker.sweep(socketio, now=T0 + 3)
+    assert socketio.take() == {'incident_update': [(1, 101)]}
+
+    tracker.sweep(socketio, now=T0 + 4)
+    assert socketio.take() == {}
+
+    tracker.sweep(socketio, now=T0 + 33)
+    assert socketio.take() == {'incident_close': [(1, 101)]}
+    assert tracker.snapshot('open')['open_count'] == 0
+    assert tracker.snapshot('closed')['incidents'][0]['status'] == 'closed'
+    # The same key opens a new incident once the old one closed
+    assert tracker.observe(_record(), now=T0 + 34)
+
+
+def test_incident_opened_and_closed_within_one_interval_only_closes():
+    tracker = IncidentTracker(window=1)
+    socketio = FakeSocketIO()
+    tracker.observe(_record(), now=T0)
+    tracker.sweep(socketio, now=T0 + 5)
+    assert socketio.take() == {'incident_close': [(1, 1)]}
+
+
+def test_eviction_past_max_open_closes_the_least_recently_seen():
+    tracker = IncidentTracker(max_open=2)
+    socketio = FakeSocketIO()
+    tracker.observe(_record(src_ip='10.0.0.1'), now=T0)
+    tracker.observe(_record(src_ip='10.0.0.2'), now=T0 + 1)
+    tracker.observe(_record(src_ip='10.0.0.1'), now=T0 + 2)
+    tracker.observe(_record(src_ip='10.0.0.3'), now=T0 + 3)
+    tracker.sweep(socketio, now=T0 + 4)
+    events = socketio.take()
+    assert events['incident_close'] == [(2, 1)]
+    assert sorted(events['incident_open']) == [(1, 2), (3, 1)]
+    assert [i['src_ip'] for i in tracker.snapshot('open')['incidents']] == ['10.0.0.3', '10.0.0.1']
+
+
+def test_snapshot_limit_and_reset():
+    tracker = IncidentTracker()
+    for i in range(5):
+        tracker.observe(_record(src_ip=f'10.0.0.{i}'), now=T0 + i)
+    snapshot = tracker.snapshot(limit=2)
+    assert snapshot['open_count'] == 5
+    assert [i['src_ip'] for i in snapshot['incidents']] == ['10.0.0.4', '10.0.0.3']
+    tracker.reset()
+    assert tracker.snapshot() == {'open_count': 0, 'incidents': []}
+
+
+def test_folded_detections_skip_recent_attacks_and_network_logs():
+    from mqtt import mqtt_subscriber as subscriber
+    from subscriptions import subscriptions
+
+    subscriptions.subscribe('test-folding', {})
+    subscriber.incidents.reset()
+    try:
+        shard = subscriber._new_shard()
+        socketio = FakeSocketIO()
+        features = {'protocol_type': 'tcp', 'service': 'http', 'flag': 'S0'}
+        attack = {'attack_type': 'neptune', 'category': 'DoS', 'confidence': 90.0}
+        normal = {'attack_type': 'normal', 'category': 'normal', 'confidence': 99.0}
+        for classification in [attack] * 50 + [normal] * 2:
+            now = time.perf_counter()
+            subscriber._record_result(shard, {'src_ip': '10.0.0.1', 'dst_ip': '10.0.0.2'},
+                                      features, classification, socketio, now, now)
+    finally:
+        subscriptions.disconnect('test-folding')
+        subscriber.incidents.reset()
+    assert (shard['total_packets'], shard['attack_count']) == (52, 50)
+    assert len(shard['recent_attacks']) == 1
+    assert [data['attack_type'] for _, data in socketio.events] == ['neptune', 'normal', 'normal']
@@ -0,0 +1,58 @@
+import itertools
+
+import pandas as pd
+
+from kdd_reader import KDD_COLUMNS, cycle_kdd_chunks, iter_kdd_chunks, read_kdd
+
+
+def _write_kdd(path, rows):
+    lines = []
+    for i in range(rows):
+        values = ['0'] * len(KDD_COLUMNS)
+        values[KDD_COLUMNS.index('protocol_type')] = 'tcp'
+        values[KDD_COLUMNS.index('service')] = 'http'
+        values[KDD_COLUMNS.index('flag')] = 'SF'
+        values[KDD_COLUMNS.index('src_bytes')] = str(i)
+        values[KDD_COLUMNS.index('label')] = 'neptune.' if i % 2 else 'normal'
+        lines.append(','.join(values))
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+
+def test_chunks_keep_global_row_numbers(tmp_path):
+    path = _write_kdd(tmp_path / 'kdd.txt', 25)
+    chunks = list(iter_kdd_chunks(path, chunksize=10))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert chunks[2].index.tolist() == list(range(20, 25))
+    assert chunks[2]['src_bytes'].tolist() == [float(i) for i in range(20, 25)]
+
+
+def test_offset_limit_and_usecols(tmp_path):
+    path = _write_kdd(tmp_path / 'kdd.txt', 25)
+    df = read_kdd(path, offset=5, limit=7, usecols=['src_bytes', 'label'])
+    assert list(df.columns) == ['src_bytes', 'label']
+    assert df.index.tolist() == list(range(5, 12))
+    assert df['src_bytes'].tolist() == [float(i) for i in range(5, 12)]
+
+
+def test_trailing_dot_is_stripped_from_labels(tmp_path):
+    path = _write_kdd(tmp_path / 'kdd.txt', 4)
+    assert read_kdd(path)['label'].tolist() == ['normal', 'neptune', 'normal', 'neptune']
+
+
+def test_shards_partition_the_rows(tmp_path):
+    path = _write_kdd(tmp_path / 'kdd.txt', 25)
+    shards = [pd.concat(iter_kdd_chunks(path, chunksize=4, shard=(i, 3))) for i in range(3)]
+    assert sorted(itertools.chain.from_iterable(s.index.tolist() for s in shards)) == list(range(25))
+    assert all(index % 3 == i for i, s in enumerate(shards) for index in s.index)
+
+
+def test_cycle_repeats_the_file(tmp_path):
+    path = _write_kdd(tmp_path / 'kdd.txt', 3)
+    chunks = list(itertools.islice(cycle_kdd_chunks(path, chunksize=10), 3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 3]
+
+
+def test_empty_selection(tmp_path):
+    path = _write_kdd(tmp_path / 'kdd.txt', 3)
+    assert read_kdd(path, offset=10).empty
@@ -0,0 +1,34 @@
+import threading
+
+from mqtt.lanes import IngestLanes, lane_of
+
+
+def test_lane_of_is_stable_and_in_range():
+    assert lane_of('10.0.0.1', 4) == lane_of('10.0.0.1', 4)
+    assert {lane_of(f'10.0.0.{i}', 4) for i in range(256)} == {0, 1, 2, 3}
+    assert lane_of(None, 4) == lane_of('None', 4)
+
+
+def test_packets_of_one_source_stay_on_one_lane_in_order():
+    seen = {}
+    done = threading.Event()
+    lock = threading.Lock()
+    total = 400
+
+    def handler(lane, packets, waited):
+        with lock:
+            for packet in packets:
+                seen.setdefault(packet['src_ip'], []).append((lane, packet['n']))
+            if sum(len(v) for v in seen.values()) == total:
+                done.set()
+
+    lanes = IngestLanes(4, handler).start()
+    packets = [{'src_ip': f'10.0.0.{n % 16}', 'n': n} for n in range(total)]
+    for start in range(0, total, 50):
+        lanes.submit(packets[start:start + 50])
+    assert done.wait(5)
+
+    for src_ip, entries in seen.items():
+        assert {lane for lane, _ in entries} == {lane_of(src_ip, 4)}
+        numbers = [n for _, n in entries]
+        assert numbers == sorted(numbers)
@@ -0,0 +1,86 @@
+import socket
+from collections import Counter
+
+import pytest
+
+from pcap_ingest import (FRAG_NONE, PROTO_TCP, PROTO_UDP, TCP_ACK, TCP_FIN, TCP_SYN,
+                         ConnectionTracker, iter_connections)
+
+def _at(packet, ts):
+    packet.time = ts
+    return packet
+
+
+def _write_capture(path):
+    scapy_all = pytest.importorskip('scapy.all')
+    Ether, IP, TCP, UDP, ARP = (scapy_all.Ether, scapy_all.IP, scapy_all.TCP, scapy_all.UDP,
+                                scapy_all.ARP)
+    client, server = '10.0.0.1', '10.0.0.2'
+    eth = Ether(src='00:00:00:00:00:01', dst='00:00:00:00:00:02')
+    packets = [
+        # TCP: handshake, 100 bytes each way, orderly close
+        _at(eth / IP(src=client, dst=server) / TCP(sport=40000, dport=80, flags='S'), 100.0),
+        _at(eth / IP(src=server, dst=client) / TCP(sport=80, dport=40000, flags='SA'), 100.1),
+        _at(eth / IP(src=client, dst=server) / TCP(sport=40000, dport=80, flags='PA') / (b'x' * 100), 100.2),
+        _at(eth / IP(src=server, dst=client) / TCP(sport=80, dport=40000, flags='PA') / (b'y' * 100), 100.3),
+        _at(eth / IP(src=client, dst=server) / TCP(sport=40000, dport=80, flags='FA'), 100.4),
+        _at(eth / IP(src=server, dst=client) / TCP(sport=80, dport=40000, flags='FA'), 100.5),
+        # UDP DNS query and answer
+        _at(eth / IP(src=client, dst=server) / UDP(sport=5353, dport=53) / (b'q' * 30), 101.0),
+        _at(eth / IP(src=server, dst=client) / UDP(sport=53, dport=5353) / (b'a' * 60), 101.1),
+        # Not IPv4
+        _at(eth / ARP(psrc=client, pdst=server), 101.2),
+    ]
+    scapy_all.wrpcap(str(path), packets)
+
+
+def test_synthetic_capture_yields_connection_records(tmp_path):
+    path = tmp_path / 'smoke.pcap'
+    _write_capture(path)
+    stats = Counter()
+
+    records = list(iter_connections(str(path), stats=stats))
+
+    assert stats['packets'] == 9
+    assert stats['skipped'] == 1
+    assert [r['protocol_type'] for r in records] == ['tcp', 'udp']
+    tcp, udp = records
+    assert (tcp['src_ip'], tcp['dst_ip'], tcp['service'], tcp['flag']) == ('10.0.0.1', '10.0.0.2', 'http', 'SF')
+    assert (tcp['src_bytes'], tcp['dst_bytes']) == (100, 100)
+    assert (udp['service'], udp['src_bytes'], udp['dst_bytes']) == ('domain_u', 30, 60)
+    assert tcp['count'] == 1.0 and udp['count'] == 2.0
+
+
+def _packet(src, dst, proto, sport, dport, flags=0, payload=0):
+    return (socket.inet_aton(src), socket.inet_aton(dst), proto, sport, dport, flags, payload,
+            0, 0, FRAG_NONE)
+
+
+def test_each_timeout_class_expires_independently():
+    tracker = ConnectionTracker(tcp_timeout=60.0, udp_timeout=10.0, close_linger=1.0)
+    tracker.add(0.0, _packet('10.0.0.1', '10.0.0.2', PROTO_TCP, 40000, 22, TCP_SYN))
+    tracker.add(1.0, _packet('10.0.0.1', '10.0.0.3', PROTO_UDP, 5353, 53, payload=30))
+    tracker.add(2.0, _packet('10.0.0.1', '10.0.0.4', PROTO_TCP, 40001, 80, TCP_SYN))
+    tracker.add(2.1, _packet('10.0.0.4', '10.0.0.1', PROTO_TCP, 80, 40001, TCP_SYN | TCP_ACK))
+    tracker.add(2.2, _packet('10.0.0.1', '10.0.0.4', PROTO_TCP, 40001, 80, TCP_FIN | TCP_ACK))
+    tracker.add(2.3, _packet('10.0.0.4', '10.0.0.1', PROTO_TCP, 80, 40001, TCP_FIN | TCP_ACK))
+
+    # The closed connection lingers 1 s even behind the older open TCP flow
+    assert [r['dst_ip'] for r in tracker.expire(3.5)] == ['10.0.0.4']
+    # UDP times out after 10 s, the open TCP connection after 60 s
+    assert [r['dst_ip'] for r in tracker.expire(11.5)] == ['10.0.0.3']
+    assert tracker.expire(59.0) == []
+    assert [r['dst_ip'] for r in tracker.expire(60.0)] == ['10.0.0.2']
+    assert len(tracker) == 0
+
+
+def test_max_connections_evicts_least_recently_seen():
+    tracker = ConnectionTracker(max_connections=2)
+    tracker.add(0.0, _packet('10.0.0.1', '10.0.0.2', PROTO_TCP, 40000, 22, TCP_SYN))
+    tracker.add(1.0, _packet('10.0.0.1', '10.0.0.3', PROTO_UDP, 5353, 53))
+    tracker.add(2.0, _packet('10.0.0.2', '10.0.0.1', PROTO_TCP, 22, 40000, TCP_SYN | TCP_ACK))
+
+    evicted = tracker.add(3.0, _packet('10.0.0.1', '10.0.0.5', PROTO_UDP, 5353, 53))
+
+    assert [r['dst_ip'] for r in evicted] == ['10.0.0.3']
+    assert tracker.evicted == 1 and len(tracker) == 2
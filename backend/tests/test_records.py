@@ -0,0 +1,73 @@
+from records import NUMERIC_FEATURES, DetectionRecord
+
+CLASSIFICATION = {'attack_type': 'neptune', 'category': 'DoS', 'confidence': 97.53}
+
+
+def _features(data):
+    features = {name: float(data.get(name, 0)) for name in NUMERIC_FEATURES}
+    features.update(protocol_type=data['protocol'], service=data['service'], flag=data['flag'])
+    return features
+
+
+def _expected(data, features, classification, timestamp):
+    """The enriched dict the subscriber used to build for every detection"""
+    ml_features = {name: features[name] for name in NUMERIC_FEATURES}
+    ml_features.update(protocol_type=features['protocol_type'], service=features['service'],
+                       flag=features['flag'])
+    return {**data, 'attack_type': classification['attack_type'],
+            'attack_category': classification['category'],
+            'confidence': classification['confidence'],
+            'is_attack': classification['attack_type'] != 'normal',
+            'timestamp': timestamp, 'ml_features': ml_features}
+
+
+def _payload(**extra):
+    return {'src_ip': '10.0.0.1', 'dst_ip': '10.0.0.2', 'protocol': 'tcp', 'service': 'http',
+            'flag': 'S0', 'src_bytes': 0.0, 'count': 123.0, 'serror_rate': 1.0,
+            'timestamp': '2024-05-01T12:30:45.123456', **extra}
+
+
+def test_to_dict_matches_the_enriched_event():
+    data = _payload(duration=2.5, label='neptune', src_port=40000)
+    features = _features(data)
+    record = DetectionRecord(data, features, CLASSIFICATION, data['timestamp'])
+    assert record.to_dict() == _expected(data, features, CLASSIFICATION, data['timestamp'])
+
+
+def test_values_that_differ_from_the_features_are_kept():
+    # protocol and count disagree with the extracted features, so they cannot be derived
+    data = _payload(protocol='TCP', count=5)
+    features = _features(dict(data, protocol='tcp', count=7))
+    record = DetectionRecord(data, features, CLASSIFICATION, data['timestamp'])
+    event = record.to_dict()
+    assert (event['protocol'], event['count']) == ('TCP', 5)
+    assert (event['ml_features']['protocol_type'], event['ml_features']['count']) == ('tcp', 7.0)
+
+
+def test_timestamps_that_do_not_pack_exactly_round_trip():
+    for timestamp in ('2024-05-01T12:30:45+02:00', 'not a time', 1714566645.5):
+        data = _payload(timestamp=timestamp)
+        features = _features(data)
+        record = DetectionRecord(data, features, CLASSIFICATION, timestamp)
+        assert record.to_dict()['timestamp'] == timestamp
+
+
+def test_attribute_access():
+    data = _payload()
+    record = DetectionRecord(data, _features(data), CLASSIFICATION, data['timestamp'])
+    assert (record.src_ip, record.dst_ip, record.protocol, record.service, record.flag) == (
+        '10.0.0.1', '10.0.0.2', 'tcp', 'http', 'S0')
+    assert (record.attack_type, record.category, record.confidence) == ('neptune', 'DoS', 97.53)
+    assert record.is_attack
+
+    normal = {'attack_type': 'normal', 'category': 'normal', 'confidence': 99.0}
+    assert not DetectionRecord(data, _features(data), normal, data['timestamp']).is_attack
+
+
+def test_records_of_one_shape_share_their_layout():
+    first = _payload()
+    second = _payload(src_ip='10.0.0.7', count=9.0)
+    records = [DetectionRecord(data, _features(data), CLASSIFICATION, data['timestamp'])
+               for data in (first, second)]
+    assert records[0]._layout is records[1]._layout
+    assert records[0]._symbols is records[1]._symbols
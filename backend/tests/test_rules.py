@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from config import DETECTION_RULES, RULE_DEFAULT
+from models.rules import RuleEngine
+
+RULES = [
+    {'name': 'syn_flood', 'attack_type': 'neptune', 'confidence': 85, 'priority': 10,
+     'when': [('count', '>', 10), ('serror_rate', '>', 0.5)]},
+    {'name': 'big_download', 'attack_type': 'httptunnel', 'confidence': 75, 'priority': 30,
+     'when': [('dst_bytes', '>', ('src_bytes', 5))]},
+    {'name': 'odd_flag', 'attack_type': 'portsweep', 'confidence': 60, 'priority': 20,
+     'when': [('flag', 'in', ['REJ', 'RSTO']), ('service', 'not_in', ['http'])]},
+]
+DEFAULT = {'attack_type': 'normal', 'confidence': 95}
+
+ROWS = [
+    {'count': 20, 'serror_rate': 0.9, 'src_bytes': 10, 'dst_bytes': 1000, 'flag': 'S0', 'service': 'http'},
+    {'count': 1, 'serror_rate': 0.0, 'src_bytes': 10, 'dst_bytes': 1000, 'flag': 'REJ', 'service': 'ftp'},
+    {'count': 1, 'serror_rate': 0.0, 'src_bytes': 10, 'dst_bytes': 40, 'flag': 'REJ', 'service': 'ftp'},
+    {'count': 1, 'serror_rate': 0.0, 'src_bytes': 10, 'dst_bytes': 40, 'flag': 'REJ', 'service': 'http'},
+    {'count': 20, 'serror_rate': 0.1, 'src_bytes': 100, 'dst_bytes': 40, 'flag': 'SF', 'service': 'http'},
+]
+EXPECTED = ['neptune', 'portsweep', 'portsweep', 'normal', 'normal']
+
+
+def test_rules_are_tried_in_priority_order():
+    engine = RuleEngine(RULES, DEFAULT)
+    assert [rule.name for rule in engine.rules] == ['syn_flood', 'odd_flag', 'big_download']
+    assert [engine.classify(row)[0] for row in ROWS] == EXPECTED
+
+
+def test_column_masks_match_row_evaluation():
+    engine = RuleEngine(RULES, DEFAULT)
+    types, confidences = engine.classify_columns(engine.columns(ROWS))
+    assert types.tolist() == EXPECTED
+    assert confidences.tolist() == [engine.classify(row)[1] for row in ROWS]
+    assert engine.suspicious_mask(engine.columns(ROWS)).tolist() == [True, True, True, False, False]
+
+
+def test_configured_rules_agree_on_random_rows():
+    engine = RuleEngine(DETECTION_RULES, RULE_DEFAULT)
+    rng = np.random.default_rng(7)
+    rows = [{'count': float(rng.integers(0, 40)), 'serror_rate': float(rng.random()),
+             'srv_count': float(rng.integers(0, 60)), 'src_bytes': float(rng.integers(0, 500)),
+             'dst_bytes': float(rng.integers(0, 3000))} for _ in range(2000)]
+    types, _ = engine.classify_columns(engine.columns(rows))
+    assert types.tolist() == [engine.classify(row)[0] for row in rows]
+
+
+def test_empty_input():
+    engine = RuleEngine(RULES, DEFAULT)
+    types, _ = engine.classify_columns(engine.columns([]))
+    assert types.tolist() == []
+
+
+def test_invalid_rules_are_rejected():
+    with pytest.raises(ValueError, match="Unknown rule operator"):
+        RuleEngine([{'name': 'x', 'attack_type': 'y', 'confidence': 1, 'when': [('count', '=>', 1)]}],
+                   DEFAULT)
+    with pytest.raises(ValueError, match="no conditions"):
+        RuleEngine([{'name': 'x', 'attack_type': 'y', 'confidence': 1, 'when': []}], DEFAULT)
@@ -0,0 +1,89 @@
+import threading
+
+from stats_stream import StatsStream
+
+
+class FakeSocketIO:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, data):
+        self.events.append((event, data))
+
+
+def _stream(counters):
+    return StatsStream(lambda: {k: (dict(v) if isinstance(v, dict) else v)
+                                for k, v in counters.items()})
+
+
+def test_first_publish_sets_the_baseline_and_unchanged_counters_emit_nothing():
+    counters = {'total_packets': 1, 'attack_distribution': {}}
+    socketio = FakeSocketIO()
+    stream = _stream(counters)
+    stream.publish(socketio)
+    stream.publish(socketio)
+    assert socketio.events == []
+
+
+def test_deltas_hold_only_changed_fields_with_consecutive_seqs():
+    counters = {'total_packets': 1, 'attack_count': 0, 'attack_distribution': {'neptune': 1}}
+    socketio = FakeSocketIO()
+    stream = _stream(counters)
+    assert stream.snapshot()['seq'] == 1
+
+    counters['total_packets'] = 2
+    stream.publish(socketio)
+    counters.update(attack_count=1, attack_distribution={'neptune': 1, 'smurf': 1})
+    stream.publish(socketio)
+    assert socketio.events == [
+        ('stats_delta', {'total_packets': 2, 'seq': 2}),
+        ('stats_delta', {'attack_count': 1, 'attack_distribution': {'smurf': 1}, 'seq': 3}),
+    ]
+
+
+def test_vanished_attack_types_are_reported_as_zero():
+    counters = {'attack_distribution': {'neptune': 3, 'smurf': 1}}
+    socketio = FakeSocketIO()
+    stream = _stream(counters)
+    stream.snapshot()
+    counters['attack_distribution'] = {'neptune': 3}
+    stream.publish(socketio)
+    assert socketio.events == [('stats_delta', {'attack_distribution': {'smurf': 0}, 'seq': 2})]
+
+
+def test_snapshot_matches_the_last_delta_until_resync():
+    counters = {'total_packets': 1}
+    socketio = FakeSocketIO()
+    stream = _stream(counters)
+    stream.snapshot()
+    counters['total_packets'] = 5
+    stream.publish(socketio)
+    assert stream.snapshot() == {'total_packets': 5, 'seq': 2}
+
+    counters['total_packets'] = 0
+    assert stream.snapshot() == {'total_packets': 5, 'seq': 2}
+    assert stream.snapshot(resync=True) == {'total_packets': 0, 'seq': 3}
+
+
+def test_ticker_keeps_running_after_a_failed_publish():
+    calls = []
+    published = threading.Event()
+
+    def source():
+        calls.append(None)
+        if len(calls) == 2:
+            raise RuntimeError("peer stats unavailable")
+        return {'total_packets': len(calls)}
+
+    class SignallingSocketIO(FakeSocketIO):
+        def emit(self, event, data):
+            super().emit(event, data)
+            published.set()
+
+    socketio = SignallingSocketIO()
+    stream = StatsStream(source, interval=0.01).start(socketio)
+    try:
+        assert published.wait(5)
+    finally:
+        stream.stop()
+    assert socketio.events[0] == ('stats_delta', {'total_packets': 3, 'seq': 1})
@@ -0,0 +1,68 @@
+import pytest
+
+from records import DetectionRecord
+from subscriptions import LogFilter, SubscriptionRegistry, normalize_filter
+
+
+def _record(src_ip='10.0.0.1', dst_ip='10.0.0.2', attack_type='neptune', category='DoS',
+            confidence=90.0):
+    features = {'protocol_type': 'tcp', 'service': 'http', 'flag': 'S0'}
+    classification = {'attack_type': attack_type, 'category': category, 'confidence': confidence}
+    return DetectionRecord({'src_ip': src_ip, 'dst_ip': dst_ip}, features, classification,
+                           '2024-01-01T00:00:00')
+
+
+def test_normalize_filter_is_canonical():
+    assert normalize_filter(None) == {}
+    assert normalize_filter({'attacks_only': 'false'}) == {}
+    assert normalize_filter({'attacks_only': 'true', 'category': 'Probe, DoS,',
+                             'src_ip': ' 10.0.0.1 ', 'min_confidence': '80'}) == {
+        'attacks_only': True, 'category': ['DoS', 'Probe'],
+        'src_ip': '10.0.0.1', 'min_confidence': 80.0}
+    assert normalize_filter({'logs': 'none', 'attacks_only': True}) == {'logs': 'none'}
+
+
+@pytest.mark.parametrize('raw, message', [
+    ({'port': 80}, "Unknown filter keys: port"),
+    ({'min_confidence': 'high'}, "min_confidence must be a number"),
+    (['attacks_only'], "Filter must be an object, got list"),
+    ('attacks_only', "Filter must be an object, got str"),
+])
+def test_normalize_filter_rejects_bad_filters(raw, message):
+    with pytest.raises(ValueError, match=message):
+        normalize_filter(raw)
+
+
+def test_log_filter_matches():
+    attack = _record()
+    normal = _record(attack_type='normal', category='normal', confidence=99.0)
+    assert LogFilter(normalize_filter({})).matches(normal)
+    assert not LogFilter(normalize_filter({'attacks_only': True})).matches(normal)
+    assert LogFilter(normalize_filter({'category': 'DoS'})).matches(attack)
+    assert not LogFilter(normalize_filter({'category': 'Probe'})).matches(attack)
+    assert not LogFilter(normalize_filter({'dst_ip': '10.0.0.9'})).matches(attack)
+    assert not LogFilter(normalize_filter({'min_confidence': 95})).matches(attack)
+
+
+def test_identical_filters_share_a_room():
+    registry = SubscriptionRegistry()
+    _, room_a, _ = registry.subscribe('a', {'category': 'DoS,Probe', 'attacks_only': 'yes'})
+    _, room_b, _ = registry.subscribe('b', {'attacks_only': True, 'category': ['Probe', 'DoS']})
+    assert room_a == room_b
+    assert registry.summary() == {room_a: 2}
+
+
+def test_rooms_follow_subscribe_and_disconnect():
+    registry = SubscriptionRegistry()
+    _, everything, _ = registry.subscribe('a', {})
+    _, probes, _ = registry.subscribe('b', {'category': 'Probe'})
+    assert registry.rooms_for(_record()) == [everything]
+
+    old_room, new_room, _ = registry.subscribe('b', {'logs': 'none'})
+    assert (old_room, new_room) == (probes, None)
+    assert registry.summary() == {everything: 1}
+
+    registry.disconnect('a')
+    registry.disconnect('b')
+    assert registry.summary() == {}
+    assert registry.rooms_for(_record()) == []
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from config import ATTACK_CATEGORIES
+from traffic_scenarios import SCENARIOS, _select_rows, compile_schedule
+
+LABELS = np.array(['normal', 'neptune', 'udpstorm', 'snmpguess', 'warezclient', 'satan', 'normal'])
+
+
+def test_category_selects_every_label_of_the_category():
+    assert _select_rows(LABELS, {'category': 'DoS'}).tolist() == [1, 2]
+    assert _select_rows(LABELS, {'category': 'R2L'}).tolist() == [3, 4]
+    assert _select_rows(LABELS, {'category': 'normal'}).tolist() == [0, 6]
+
+
+def test_labels_and_category_combine():
+    assert _select_rows(LABELS, {'labels': ['satan'], 'category': 'DoS'}).tolist() == [1, 2, 5]
+
+
+def test_empty_selector_selects_everything():
+    assert _select_rows(LABELS, {}).tolist() == list(range(len(LABELS)))
+
+
+def test_unknown_category_is_an_error():
+    with pytest.raises(ValueError, match="Unknown category 'Dos'"):
+        _select_rows(LABELS, {'category': 'Dos'})
+
+
+def test_classifier_category_map_is_built_from_config():
+    from models.classifier import IDSClassifier
+    expected = {label: category for category, labels in ATTACK_CATEGORIES.items() for label in labels}
+    assert IDSClassifier().attack_categories == dict(expected, normal='normal')
+
+
+def test_steady_stream_sends_rate_times_duration():
+    profile = {'duration': 10, 'seed': 1, 'streams': [
+        {'name': 'background', 'select': {'labels': ['normal']}, 'shape': 'steady', 'rate': 20}]}
+    schedule = compile_schedule(profile, LABELS)
+    assert len(schedule.times) == 200
+    assert np.all(np.diff(schedule.times) >= 0)
+    assert set(LABELS[schedule.rows]) == {'normal'}
+
+
+def test_burst_only_sends_inside_the_burst():
+    profile = {'duration': 10, 'seed': 1, 'streams': [
+        {'select': {'category': 'DoS'}, 'shape': 'burst', 'rate': 10, 'multiplier': 10,
+         'start': 4, 'length': 2}]}
+    schedule = compile_schedule(profile, LABELS)
+    assert len(schedule.times) == 200
+    assert schedule.times.min() >= 4 and schedule.times.max() < 6
+
+
+def test_builtin_scenarios_compile():
+    for name, profile in SCENARIOS.items():
+        schedule = compile_schedule(profile, LABELS, seed=0)
+        assert len(schedule.times) > 0, name
@@ -0,0 +1,253 @@
+"""
+Scenario-based traffic replay
+Compiles a declarative traffic profile (steady background, DoS bursts, probe
+trickles, diurnal ramps, ...) into a precomputed send schedule of KDD rows,
+then replays it in real time or time-dilated
+
+Profile format (dict or JSON file):
+    {
+        "duration": 60,              # scenario seconds
+        "seed": 42,
+        "streams": [
+            {"name": "background", "select": {"labels": ["normal"]},
+             "shape": "steady", "rate": 20},
+            {"name": "syn_flood", "select": {"labels": ["neptune"]},
+             "shape": "burst", "rate": 20, "multiplier": 10, "start": 20, "length": 5},
+            {"name": "probe", "select": {"category": "Probe"},
+             "shape": "steady", "rate": 0.5, "arrivals": "poisson"},
+            {"name": "daily", "select": {"labels": ["normal"]},
+             "shape": "diurnal", "rate": 5, "peak": 50, "period": 60}
+        ]
+    }
+
+Shapes (rate in packets/s, all streams optionally limited to "start"/"end"):
+    steady   constant `rate`
+    burst    `base_rate` (default 0), `rate * multiplier` during [start, start + length),
+             repeating every `every` seconds if given
+    ramp     linear from `rate` to `peak` between start and end
+    diurnal  sinusoid between `rate` (trough) and `peak` with `period` seconds
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+from config import ATTACK_CATEGORIES
+
+# Resolution of the rate integration grid (seconds)
+GRID_STEP = 0.01
+
+SCENARIOS = {
+    'dos_burst': {
+        'duration': 60,
+        'streams': [
+            {'name': 'background', 'select': {'labels': ['normal']}, 'shape': 'steady', 'rate': 20},
+            {'name': 'neptune_flood', 'select': {'labels': ['neptune']}, 'shape': 'burst',
+             'rate': 20, 'multiplier': 10, 'start': 20, 'length': 10},
+        ],
+    },
+    'probe_trickle': {
+        'duration': 120,
+        'streams': [
+            {'name': 'background', 'select': {'labels': ['normal']}, 'shape': 'steady', 'rate': 10},
+            {'name': 'probe', 'select': {'category': 'Probe'}, 'shape': 'steady',
+             'rate': 0.2, 'arrivals': 'poisson'},
+        ],
+    },
+    'diurnal': {
+        'duration': 240,
+        'streams': [
+            {'name': 'users', 'select': {'labels': ['normal']}, 'shape': 'diurnal',
+             'rate': 2, 'peak': 40, 'period': 240},
+            {'name': 'r2l', 'select': {'category': 'R2L'}, 'shape': 'steady',
+             'rate': 0.5, 'arrivals': 'poisson'},
+        ],
+    },
+    'mixed': {
+        'duration': 90,
+        'streams': [
+            {'name': 'background', 'select': {'labels': ['normal']}, 'shape': 'diurnal',
+             'rate': 10, 'peak': 30, 'period': 90},
+            {'name': 'dos_bursts', 'select': {'category': 'DoS'}, 'shape': 'burst',
+             'rate': 15, 'multiplier': 8, 'start': 15, 'length': 5, 'every': 30},
+            {'name': 'probe', 'select': {'category': 'Probe'}, 'shape': 'steady',
+             'rate': 0.5, 'arrivals': 'poisson'},
+            {'name': 'r2l_ramp', 'select': {'category': 'R2L'}, 'shape': 'ramp',
+             'rate': 0, 'peak': 5, 'start': 45, 'end': 90},
+        ],
+    },
+}
+
+
+class Schedule:
+    """Precomputed send schedule: event times (scenario seconds) and dataset row positions"""
+
+    def __init__(self, times, rows, stream_ids, stream_names, duration):
+        self.times = times
+        self.rows = rows
+        self.stream_ids = stream_ids
+        self.stream_names = stream_names
+        self.duration = duration
+
+    def __len__(self):
+        return len(self.times)
+
+    def summary(self):
+        """Event count per stream"""
+        counts = np.bincount(self.stream_ids, minlength=len(self.stream_names))
+        return dict(zip(self.stream_names, counts.tolist()))
+
+
+def load_profile(name_or_path):
+    """Built-in scenario name, JSON file path or an already parsed dict"""
+    if isinstance(name_or_path, dict):
+        return name_or_path
+    if name_or_path in SCENARIOS:
+        return SCENARIOS[name_or_path]
+    if os.path.exists(name_or_path):
+        with open(name_or_path) as f:
+            return json.load(f)
+    raise ValueError(f"Unknown scenario '{name_or_path}' (built-in: {', '.join(SCENARIOS)})")
+
+
+def _select_rows(labels, select):
+    """Positions of dataset rows matching a stream's selector"""
+    wanted = set(select.get('labels', []))
+    category = select.get('category')
+    if category == 'normal':
+        wanted.add('normal')
+    elif category:
+        if category not in ATTACK_CATEGORIES:
+            raise ValueError(f"Unknown category '{category}' (known: normal, {', '.join(ATTACK_CATEGORIES)})")
+        wanted.update(ATTACK_CATEGORIES[category])
+    if not wanted:
+        return np.arange(len(labels))
+    return np.flatnonzero(np.isin(labels, list(wanted)))
+
+
+def _rate_curve(stream, grid, duration):
+    """Packets/s of one stream sampled on the time grid"""
+    shape = stream.get('shape', 'steady')
+    rate = float(stream.get('rate', 0))
+    start = float(stream.get('start', 0))
+    end = float(stream.get('end', duration))
+
+    if shape == 'steady':
+        curve = np.full_like(grid, rate)
+    elif shape == 'burst':
+        curve = np.full_like(grid, float(stream.get('base_rate', 0)))
+        offset = grid - start
+        if 'every' in stream:
+            offset = np.where(offset >= 0, offset % float(stream['every']), offset)
+        in_burst = (offset >= 0) & (offset < float(stream.get('length', 1)))
+        curve[in_burst] = rate * float(stream.get('multiplier', 10))
+    elif shape == 'ramp':
+        peak = float(stream.get('peak', rate))
+        progress = np.clip((grid - start) / max(end - start, GRID_STEP), 0, 1)
+        curve = rate + (peak - rate) * progress
+    elif shape == 'diurnal':
+        peak = float(stream.get('peak', rate))
+        period = float(stream.get('period', duration))
+        curve = rate + (peak - rate) * 0.5 * (1 - np.cos(2 * np.pi * (grid - start) / period))
+    else:
+        raise ValueError(f"Unknown traffic shape '{shape}'")
+
+    curve[(grid < start) | (grid >= end)] = 0
+    return curve
+
+
+def _arrival_times(curve, grid, arrivals, rng):
+    """Invert the cumulative rate curve into event times (evenly spaced or Poisson)"""
+    expected = np.concatenate([[0.0], np.cumsum(curve) * GRID_STEP])
+    edges = np.concatenate([grid, [grid[-1] + GRID_STEP]])
+    total = expected[-1]
+    if total <= 0:
+        return np.empty(0)
+    if arrivals == 'poisson':
+        marks = np.cumsum(rng.exponential(1.0, size=int(total + 6 * np.sqrt(total) + 10)))
+        marks = marks[marks < total]
+    else:
+        marks = np.arange(0.5, total)
+    return np.interp(marks, expected, edges)
+
+
+def compile_schedule(profile, labels, seed=None):
+    """
+    Compile a profile into a Schedule over a dataset
+
+    Args:
+        profile: Scenario dict (see module docstring)
+        labels: Array-like of KDD labels, one per dataset row
+        seed: Overrides profile['seed'] for row sampling / Poisson arrivals
+    """
+    labels = np.asarray(labels)
+    duration = float(profile['duration'])
+    rng = np.random.default_rng(profile.get('seed') if seed is None else seed)
+    grid = np.arange(0, duration, GRID_STEP)
+
+    all_times, all_rows, all_ids, names = [], [], [], []
+    for stream_id, stream in enumerate(profile['streams']):
+        names.append(stream.get('name', f"stream-{stream_id}"))
+        candidates = _select_rows(labels, stream.get('select', {}))
+        if len(candidates) == 0:
+            print(f"⚠️  Stream '{names[-1]}' matches no dataset rows - skipped")
+            continue
+        times = _arrival_times(_rate_curve(stream, grid, duration), grid,
+                               stream.get('arrivals', 'uniform'), rng)
+        all_times.append(times)
+        all_rows.append(rng.choice(candidates, size=len(times)))
+        all_ids.append(np.full(len(times), stream_id))
+
+    if not all_times:
+        return Schedule(np.empty(0), np.empty(0, dtype=int), np.empty(0, dtype=int), names, duration)
+
+    times = np.concatenate(all_times)
+    order = np.argsort(times, kind='stable')
+    return Schedule(times[order], np.concatenate(all_rows)[order],
+                    np.concatenate(all_ids)[order], names, duration)
+
+
+def replay(schedule, items, send, speed=1.0, report_every=5.0):
+    """
+    Send precomputed items on the schedule's clock
+
+    Args:
+        schedule: Compiled Schedule
+        items: Sequence aligned with the schedule (items[i] is sent at schedule.times[i])
+        send: Callable(item) -> bool (True if sent successfully)
+        speed: Time dilation; 2.0 replays twice as fast, 0.5 at half speed
+
+    Returns:
+        Dict with sent/failed counts, elapsed time and worst lag behind schedule
+    """
+    sent = 0
+    failed = 0
+    max_lag = 0.0
+    start = time.perf_counter()
+    next_report = start + report_every
+
+    for due, item in zip(schedule.times / speed, items):
+        now = time.perf_counter() - start
+        if due > now:
+            time.sleep(due - now)
+        else:
+            max_lag = max(max_lag, now - due)
+
+        if send(item):
+            sent += 1
+        else:
+            failed += 1
+
+        if time.perf_counter() >= next_report:
+            elapsed = time.perf_counter() - start
+            print(f"[scenario t={elapsed * speed:6.1f}s] sent {sent} | failed {failed} | "
+                  f"lag {max_lag * 1000:.1f}ms")
+            next_report += report_every
+
+    return {
+        'sent': sent,
+        'failed': failed,
+        'elapsed_s': round(time.perf_counter() - start, 3),
+        'max_lag_ms': round(max_lag * 1000, 3),
+    }
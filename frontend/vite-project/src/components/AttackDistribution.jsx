@@ -1,42 +1,18 @@
-import { useEffect, useState } from "react";
+import { useState } from "react";
 import { io } from "socket.io-client";
+import useLiveStats from "../hooks/useLiveStats";
 
-const socket = io("http://localhost:5000");
+// Stats only: the server sends this connection no network_logs events
+const socket = io("http://localhost:5000", { query: { logs: "none" } });
 
 export default function AttackDistribution() {
-  const [distribution, setDistribution] = useState({});
-  const [totalAttacks, setTotalAttacks] = useState(0);
-  const [loading, setLoading] = useState(true);
   const [hoveredSlice, setHoveredSlice] = useState(null);
 
-  useEffect(() => {
-    // Fetch initial stats
-    const fetchStats = async () => {
-      try {
-        const res = await fetch("http://localhost:5000/api/stats");
-        if (!res.ok) throw new Error(`HTTP ${res.status}`);
-        const data = await res.json();
-        console.log("Stats fetched:", data); // Debug log
-        setDistribution(data.attack_distribution || {});
-        setTotalAttacks(data.attack_count || 0);
-        setLoading(false);
-      } catch (err) {
-        console.error("Error fetching stats:", err);
-        setLoading(false);
-      }
-    };
-
-    fetchStats();
-
-    // Listen for real-time updates
-    socket.on("stats_update", (data) => {
-      console.log("Stats update received:", data); // Debug log
-      setDistribution(data.attack_distribution || {});
-      setTotalAttacks(data.attack_count || 0);
-    });
-
-    return () => socket.off("stats_update");
-  }, []);
+  // Snapshot on connect, then only the changed counters (stats_delta)
+  const stats = useLiveStats(socket);
+  const loading = stats === null;
+  const distribution = stats?.attack_distribution || {};
+  const totalAttacks = stats?.attack_count || 0;
 
   // Color palette for different attack types
   const colors = {
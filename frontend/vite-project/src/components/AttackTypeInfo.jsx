@@ -1,7 +1,8 @@
 import { useEffect, useState } from "react";
 import { io } from "socket.io-client";
 
-const socket = io("http://localhost:5000");
+// Only attack events are sent to this connection (server-side subscription filter)
+const socket = io("http://localhost:5000", { query: { attacks_only: "true" } });
 
 export default function AttackTypeInfo() {
   const [attacks, setAttacks] = useState([]);
@@ -0,0 +1,48 @@
+import { useEffect, useState } from "react";
+
+// Live backend counters from the delta-encoded stats stream:
+// a stats_snapshot (full counters + seq) followed by stats_delta events
+// carrying only the changed counters. A seq gap triggers a resync.
+export default function useLiveStats(socket) {
+  const [stats, setStats] = useState(null);
+
+  useEffect(() => {
+    let seq = null;
+
+    const applySnapshot = (snapshot) => {
+      seq = snapshot.seq;
+      setStats(snapshot);
+    };
+    const resync = () => socket.emit("stats_resync", applySnapshot);
+
+    const applyDelta = (delta) => {
+      if (seq === null || delta.seq <= seq) return; // no base yet, or stale
+      if (delta.seq !== seq + 1) {
+        seq = null; // missed an update: drop deltas until the new snapshot
+        resync();
+        return;
+      }
+      seq = delta.seq;
+      setStats((prev) => ({
+        ...prev,
+        ...delta,
+        attack_distribution: {
+          ...prev.attack_distribution,
+          ...(delta.attack_distribution || {}),
+        },
+      }));
+    };
+
+    socket.on("stats_snapshot", applySnapshot);
+    socket.on("stats_delta", applyDelta);
+    // The connect-time snapshot may have arrived before this component mounted
+    resync();
+
+    return () => {
+      socket.off("stats_snapshot", applySnapshot);
+      socket.off("stats_delta", applyDelta);
+    };
+  }, [socket]);
+
+  return stats;
+}
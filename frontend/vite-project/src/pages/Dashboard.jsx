@@ -1,46 +1,24 @@
-import { useEffect, useState } from "react";
 import { io } from "socket.io-client";
+import useLiveStats from "../hooks/useLiveStats";
 //import ChatbotWidget from "../components/ChatbotWidget";
 import AttackDistribution from "../components/AttackDistribution";
 import AttackTypeInfo from "../components/AttackTypeInfo";
 import MLFeaturesInfo from "../components/MLFeaturesInfo";
 
-const socket = io("http://localhost:5000");
+// Stats only: the server sends this connection no network_logs events
+const socket = io("http://localhost:5000", { query: { logs: "none" } });
 
 export default function Dashboard() {
-  const [metrics, setMetrics] = useState({
-    packets_per_sec: 0,
-    active_sessions: 0,
-    attack_count: 0,
-    total_packets: 0,
-  });
-
-  useEffect(() => {
-    // Fetch initial stats
-    fetch("http://localhost:5000/api/stats")
-      .then((res) => res.json())
-      .then((data) => {
-        setMetrics({
-          packets_per_sec: data.packets_per_sec,
-          active_sessions: data.active_sessions,
-          attack_count: data.attack_count,
-          total_packets: data.total_packets,
-        });
-      })
-      .catch((err) => console.error("Error fetching stats:", err));
-
-    // Listen for real-time stats updates
-    socket.on("stats_update", (data) => {
-      setMetrics({
-        packets_per_sec: data.packets_per_sec,
-        active_sessions: data.active_sessions,
-        attack_count: data.attack_count,
-        total_packets: data.total_packets,
-      });
-    });
-
-    return () => socket.off("stats_update");
-  }, []);
+  // Snapshot on connect, then only the changed counters (stats_delta)
+  const stats = useLiveStats(socket);
+  const metrics = {
+    packets_per_sec: stats?.packets_per_sec || 0,
+    active_sessions: stats?.active_sessions || 0,
+    attack_count: stats?.attack_count || 0,
+    total_packets: stats?.total_packets || 0,
+    shed_packets: stats?.shed_packets || 0,
+    shedding: Boolean(stats?.shedding),
+  };
 
   return (
     <div className="bg-gradient-to-br from-black via-slate-900 to-black text-white p-6 flex flex-col">
@@ -104,11 +82,14 @@ export default function Dashboard() {
               <StatCard
                 title="Attack Rate"
                 value={
-                  metrics.total_packets > 0
+                  // Attacks are only counted among classified (not shed) packets
+                  metrics.total_packets - metrics.shed_packets > 0
                     ? (
-                        ((metrics.attack_count / metrics.total_packets) * 100).toFixed(
-                          2
-                        )
+                        (
+                          (metrics.attack_count /
+                            (metrics.total_packets - metrics.shed_packets)) *
+                          100
+                        ).toFixed(2)
                       )
                     : "0"
                 }
@@ -117,15 +98,19 @@ export default function Dashboard() {
               />
               <StatCard
                 title="System Status"
-                value="OPERATIONAL"
+                value={metrics.shedding ? "SHEDDING" : "OPERATIONAL"}
                 unit=""
-                color="text-green-400"
+                color={metrics.shedding ? "text-yellow-400" : "text-green-400"}
               />
             </div>
 
             <div className="border-t border-gray-700 pt-4">
               <h3 className="text-sm text-gray-400 mb-3">Recent Activity</h3>
               <div className="space-y-2 text-xs text-gray-300">
+                <div className="flex justify-between">
+                  <span>Shed (not classified):</span>
+                  <span className="text-yellow-300">{metrics.shed_packets}</span>
+                </div>
                 <div className="flex justify-between">
                   <span>Last Update:</span>
                   <span className="text-cyan-300">
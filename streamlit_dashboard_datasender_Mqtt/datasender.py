@@ -7,6 +7,8 @@ import queue
 import time
 import logging
 import socket
+import struct
+import zlib
 
 # Suppress MQTT threading warnings
 logging.getLogger("paho.mqtt.client").setLevel(logging.CRITICAL)
@@ -15,6 +17,16 @@ logging.disable(logging.CRITICAL)
 # Module-level queue for MQTT (thread-safe, no Streamlit access)
 mqtt_message_queue = queue.Queue()
 
+# Batched envelope format understood by the backend (backend/mqtt/envelope.py):
+# b'KDDE' | version u8 | codec u8 (1 = zlib) | count u32 | zlib(JSON array)
+ENVELOPE_HEADER = struct.Struct('!4sBBI')
+ENVELOPE_SIZE = 50
+
+def encode_envelope(payloads):
+    """Pack serialized packets into one zlib-compressed MQTT message"""
+    body = zlib.compress(('[' + ','.join(payloads) + ']').encode('utf-8'), 1)
+    return ENVELOPE_HEADER.pack(b'KDDE', 1, 1, len(payloads)) + body
+
 def get_local_ip():
     """Finds the local IP address of this machine"""
     try:
@@ -209,6 +221,10 @@ KDD_COLUMNS = [
     'dst_host_srv_rerror_rate','label','difficulty'
 ]
 
+# Rows parsed from the dataset file; the sender samples from these, so a
+# multi-GB capture never has to be loaded in full
+KDD_MAX_ROWS = 200000
+
 @st.cache_data
 def load_kdd_data():
     """Load KDD test dataset from file or embedded source"""
@@ -225,7 +241,7 @@ def load_kdd_data():
         if os.path.exists(file_path):
             try:
                 st.info(f"✅ Loaded KDD dataset from {file_path}")
-                df = pd.read_csv(file_path, header=None, names=KDD_COLUMNS)
+                df = pd.read_csv(file_path, header=None, names=KDD_COLUMNS, nrows=KDD_MAX_ROWS)
                 return df
             except Exception as e:
                 st.warning(f"Could not load from {file_path}: {e}")
@@ -309,6 +325,10 @@ if kdd_df is not None:
     with col2:
         packet_count = st.number_input("Number of Packets", min_value=1, max_value=1000, value=50, key="count")
     
+    use_envelopes = st.checkbox(f"Batch packets ({ENVELOPE_SIZE} per compressed MQTT message)", value=False,
+                                key="envelopes",
+                                help="Much higher throughput; the backend classifies each batch in one call")
+    
     # Send button
     if st.button("SEND PACKETS", use_container_width=True):
         if st.session_state.mqtt_connected and st.session_state.mqtt_client:
@@ -345,6 +365,7 @@ if kdd_df is not None:
                 
                 sent_count = 0
                 attack_count = 0
+                pending = []
                 
                 for idx, row in sample_df.iterrows():
                     packet = {
@@ -378,16 +399,32 @@ if kdd_df is not None:
                         "timestamp": datetime.now().isoformat()
                     }
                     
-                    try:
-                        st.session_state.mqtt_client.publish(
-                            "nids/unique123/live_packets",
-                            json.dumps(packet),
-                            qos=1
-                        )
-                        sent_count += 1
-                        
+                    if use_envelopes:
+                        pending.append(json.dumps(packet))
                         if row['label'] != 'normal':
                             attack_count += 1
+                        if len(pending) < ENVELOPE_SIZE and len(pending) + sent_count < len(sample_df):
+                            continue
+                    
+                    try:
+                        if use_envelopes:
+                            st.session_state.mqtt_client.publish(
+                                "nids/unique123/live_packets",
+                                encode_envelope(pending),
+                                qos=1
+                            )
+                            sent_count += len(pending)
+                            pending = []
+                        else:
+                            st.session_state.mqtt_client.publish(
+                                "nids/unique123/live_packets",
+                                json.dumps(packet),
+                                qos=1
+                            )
+                            sent_count += 1
+                            
+                            if row['label'] != 'normal':
+                                attack_count += 1
                         
                         progress = sent_count / len(sample_df)
                         progress_bar.progress(progress)